@@ -0,0 +1,233 @@
+"""
+Minimal two-pass 6502 assembler for the bundled workloads
+
+Syntax, one statement per line, ";" starts a comment:
+    NAME = expression          constant
+    label:                     label, may share the line with an instruction
+    LDA #<label                immediate, < and > select the low and high byte
+    LDA $10 / LDA $10,X        zero page when the value fits in a byte
+    LDA label,Y                labels always use the absolute modes
+    LDA ($10),Y / JMP ($1234)  indirect modes
+    ASL / ASL A                accumulator
+    .byte 1, $02, label        raw bytes
+Expressions are numbers ($hex, %binary, decimal) and names joined by + and -
+"""
+from typing import Dict, List, Optional, Tuple
+
+import re
+
+from src.cpu.cpu_instruction_set import MNEMONICS, OPCODES, find_opcode
+
+# Canonical encodings where the table lists the mnemonic more than once
+PREFERRED = {("NOP", "IMP"): 0xEA}
+
+LENGTHS = {
+    "IMP": 1, "IMM": 2, "ZP0": 2, "ZPX": 2, "ZPY": 2, "IZX": 2, "IZY": 2, "REL": 2,
+    "ABS": 3, "ABX": 3, "ABY": 3, "IND": 3,
+}
+
+BRANCHES = {"BCC", "BCS", "BEQ", "BMI", "BNE", "BPL", "BVC", "BVS"}
+
+TERM_PATTERN = re.compile(r"\s*([+-]?)\s*(\$[0-9A-Fa-f]+|%[01]+|\d+|[A-Za-z_]\w*)\s*")
+
+
+class AssemblerError(ValueError):
+    pass
+
+
+def _number(token: str) -> int:
+    if token.startswith("$"):
+        return int(token[1:], 16)
+
+    if token.startswith("%"):
+        return int(token[1:], 2)
+
+    return int(token)
+
+
+def _evaluate(expression: str, symbols: Dict[str, int], line: int) -> Optional[int]:
+    """
+    Returns the value of an expression, or None while one of its names is unknown
+    """
+    value = 0
+    position = 0
+    unknown = False
+
+    while position < len(expression):
+        match = TERM_PATTERN.match(expression, position)
+
+        if match is None or (position and not match.group(1)):
+            raise AssemblerError(f"line {line}: cannot parse {expression!r}")
+
+        sign, token = match.groups()
+        position = match.end()
+
+        if token[0].isalpha() or token[0] == "_":
+            if token not in symbols:
+                unknown = True
+                continue
+
+            term = symbols[token]
+        else:
+            term = _number(token)
+
+        value += -term if sign == "-" else term
+
+    return None if unknown else value
+
+
+def _is_zero_page(expression: str, symbols: Dict[str, int]) -> bool:
+    # Labels are resolved in the second pass, only constants and literals can pick zero page
+    try:
+        value = _evaluate(expression, symbols, 0)
+    except AssemblerError:
+        return False
+
+    return value is not None and 0 <= value <= 0xFF
+
+
+def _operand(mnemonic: str, text: str, constants: Dict[str, int]) -> Tuple[str, str]:
+    """
+    Works out the addressing mode of an operand, returns it with the address expression
+    """
+    text = text.strip()
+    upper = text.upper()
+
+    if not text or upper == "A":
+        return "IMP", ""
+
+    if mnemonic in BRANCHES:
+        return "REL", text
+
+    if text.startswith("#"):
+        return "IMM", text[1:]
+
+    if text.startswith("("):
+        if upper.endswith(",X)"):
+            return "IZX", text[1:-3]
+
+        if upper.endswith("),Y"):
+            return "IZY", text[1:-3]
+
+        return "IND", text[1:-1]
+
+    for suffix, zero_page, absolute in ((",X", "ZPX", "ABX"), (",Y", "ZPY", "ABY")):
+        if upper.endswith(suffix):
+            expression = text[:-2]
+            mode = zero_page if _is_zero_page(expression, constants) else absolute
+
+            return mode, expression
+
+    return ("ZP0" if _is_zero_page(text, constants) else "ABS"), text
+
+
+def _encoding(mnemonic: str, mode: str, line: int) -> int:
+    if (mnemonic, mode) in PREFERRED:
+        return PREFERRED[(mnemonic, mode)]
+
+    if mnemonic not in MNEMONICS:
+        raise AssemblerError(f"line {line}: unknown instruction {mnemonic}")
+
+    try:
+        return find_opcode(mnemonic, mode)
+    except KeyError:
+        # Zero page operands fall back to the absolute form when there is no zero page one,
+        # BRK without operand gets a zero signature byte
+        fallback = {"ZP0": "ABS", "ZPX": "ABX", "ZPY": "ABY", "IMP": "IMM"}.get(mode)
+
+        if fallback is not None:
+            return _encoding(mnemonic, fallback, line)
+
+        raise AssemblerError(f"line {line}: {mnemonic} has no {mode} addressing mode")
+
+
+def assemble(source: str, origin: int = 0x0400) -> Tuple[bytes, Dict[str, int]]:
+    """
+    Assembles source for the given origin
+    Returns the machine code and the symbol table
+    """
+    constants: Dict[str, int] = {}
+    statements: List[Tuple[int, int, str, str]] = []  # line, address, mnemonic, operand
+    labels: Dict[str, int] = {}
+    address = origin
+
+    # First pass: constants, labels and instruction sizes
+    for number, raw in enumerate(source.splitlines(), 1):
+        text = raw.split(";", 1)[0].strip()
+
+        if "=" in text and not text.startswith("."):
+            name, expression = (part.strip() for part in text.split("=", 1))
+            value = _evaluate(expression, constants, number)
+
+            if value is None:
+                raise AssemblerError(f"line {number}: constants must be defined before use")
+
+            constants[name] = value
+            continue
+
+        while ":" in text:
+            label, text = (part.strip() for part in text.split(":", 1))
+            labels[label] = address
+
+        if not text:
+            continue
+
+        mnemonic, _, operand = text.partition(" ")
+        mnemonic = mnemonic.upper()
+
+        if mnemonic == ".BYTE":
+            count = len(operand.split(","))
+        else:
+            mode, _ = _operand(mnemonic, operand, constants)
+            count = LENGTHS[OPCODES[_encoding(mnemonic, mode, number)].addressing_mode]
+
+        statements.append((number, address, mnemonic, operand))
+        address += count
+
+    symbols = {**constants, **labels}
+    code = bytearray()
+
+    # Second pass: encode
+    for number, address, mnemonic, operand in statements:
+        if mnemonic == ".BYTE":
+            for expression in operand.split(","):
+                code.append(_resolve(expression, symbols, number) & 0xFF)
+
+            continue
+
+        mode, expression = _operand(mnemonic, operand, constants)
+        opcode = _encoding(mnemonic, mode, number)
+        mode = OPCODES[opcode].addressing_mode
+
+        code.append(opcode)
+
+        if mode == "IMP":
+            continue
+
+        if mode == "IMM":
+            selector = expression.strip()[:1]
+            value = _resolve(expression.strip().lstrip("<>"), symbols, number)
+            code.append((value >> 8 if selector == ">" else value) & 0xFF)
+        elif mode == "REL":
+            offset = _resolve(expression, symbols, number) - (address + 2)
+
+            if not -0x80 <= offset <= 0x7F:
+                raise AssemblerError(f"line {number}: branch target out of range")
+
+            code.append(offset & 0xFF)
+        elif LENGTHS[mode] == 2:
+            code.append(_resolve(expression, symbols, number) & 0xFF)
+        else:
+            value = _resolve(expression, symbols, number)
+            code += bytes((value & 0xFF, (value >> 8) & 0xFF))
+
+    return bytes(code), symbols
+
+
+def _resolve(expression: str, symbols: Dict[str, int], line: int) -> int:
+    value = _evaluate(expression.strip(), symbols, line)
+
+    if value is None:
+        raise AssemblerError(f"line {line}: undefined name in {expression.strip()!r}")
+
+    return value
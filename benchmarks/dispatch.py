@@ -0,0 +1,91 @@
+"""
+Compares the precompiled dispatch table against the former string based dispatch
+Run from the repository root: `python -m benchmarks.dispatch`
+"""
+from time import perf_counter
+
+from src.cpu.cpu import Cpu
+from src.cpu.cpu_instruction_set import OPCODES
+
+# LDA #$00; loop: CLC; ADC #$01; STA $10; CMP #$FF; BNE loop; JMP $0400
+PROGRAM = bytes([
+    0xA9, 0x00,
+    0x18,
+    0x69, 0x01,
+    0x85, 0x10,
+    0xC9, 0xFF,
+    0xD0, 0xF7,
+    0x4C, 0x00, 0x04,
+])
+
+ORIGIN = 0x0400
+
+
+def _make_cpu() -> Cpu:
+    cpu = Cpu()
+
+    cpu.bus.load(PROGRAM, ORIGIN)
+    cpu.state.register_PC = ORIGIN
+
+    return cpu
+
+
+def run_string_dispatch(cpu: Cpu, count: int) -> None:
+    """
+    Former Cpu.run loop body: two lookup indexes and two getattr calls per instruction
+    """
+    state = cpu.state
+
+    for _ in range(count):
+        state.opcode = cpu.bus.read(state.register_PC)
+        state.register_PC += 1
+
+        state.current_addressing_mode = OPCODES[state.opcode].addressing_mode
+        state.current_instruction = OPCODES[state.opcode].operation
+
+        getattr(cpu.addr_modes, state.current_addressing_mode)()
+        getattr(cpu.instructions, state.current_instruction)()
+
+
+def run_table_dispatch(cpu: Cpu, count: int) -> None:
+    """
+    Current Cpu.run loop body: a single dispatch table index per instruction
+    """
+    state = cpu.state
+    dispatch = cpu.dispatch
+
+    for _ in range(count):
+        opcode = cpu.bus.read(state.register_PC)
+        state.opcode = opcode
+        state.register_PC += 1
+
+        addressing_mode, operation, _ = dispatch[opcode]
+
+        addressing_mode()
+        operation()
+
+
+def measure(runner, count: int = 200_000) -> float:
+    """
+    Returns the instructions per second achieved by a runner
+    """
+    cpu = _make_cpu()
+
+    start = perf_counter()
+    runner(cpu, count)
+    elapsed = perf_counter() - start
+
+    return count / elapsed
+
+
+def main() -> None:
+    string_ips = measure(run_string_dispatch)
+    table_ips = measure(run_table_dispatch)
+
+    print(f"string dispatch: {string_ips:12,.0f} instructions/s")
+    print(f"table dispatch:  {table_ips:12,.0f} instructions/s")
+    print(f"speedup:         {table_ips / string_ips:12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Times every documented opcode of data/instruction_set.json on its own
+Run from the repository root: `python -m benchmarks.opcodes`
+
+    python -m benchmarks.opcodes --save baseline.json
+    python -m benchmarks.opcodes --baseline baseline.json --threshold 0.15
+
+Each opcode runs in a tight loop with the program counter put back before every
+execution, so jumps, branches and returns repeat the same instruction as well.
+Times are per instruction and include the fetch and dispatch of the run loop.
+Flags start clear: BCC, BNE, BPL and BVC are taken, the other branches are not.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+from typing import Dict, List, Optional
+
+import json
+import platform
+import sys
+
+from src.cpu.cpu import Cpu, STATE_HANDLERS
+from src.cpu.cpu_instruction_set import OPCODES
+
+# Bump when the result layout changes
+RESULTS_VERSION = 1
+
+ORIGIN = 0x0400
+
+# Operand bytes after every opcode: zero page $10, absolute $2010, branch offset +$10
+OPERAND = bytes([0x10, 0x20])
+
+# Pointers used by the indirect modes, all pointing into RAM at $3000
+POINTERS = {0x10: 0x3000, 0x2010: 0x3000}
+
+# The 151 opcodes of the NMOS 6502 datasheet, the table also names $DA and $FA as NOP
+DOCUMENTED = tuple(
+    entry.opcode for entry in OPCODES
+    if entry.instruction != "???" and (entry.instruction != "NOP" or entry.opcode == 0xEA)
+)
+
+
+def _make_cpu(opcode: int, state_handler: str) -> Cpu:
+    cpu = Cpu(state_handler=state_handler)
+
+    cpu.bus.load(bytes([opcode]) + OPERAND, ORIGIN)
+
+    for address, target in POINTERS.items():
+        cpu.bus.load(bytes([target & 0xFF, target >> 8]), address)
+
+    cpu.state.register_SP = 0xFF
+    cpu.state.register_PC = ORIGIN
+
+    return cpu
+
+
+def measure(opcode: int, state_handler: str = "fast", count: int = 20_000, repeat: int = 3) -> float:
+    """
+    Returns the best time per execution of an opcode, in nanoseconds
+    """
+    best = float("inf")
+
+    for _ in range(repeat):
+        cpu = _make_cpu(opcode, state_handler)
+
+        state = cpu.state
+        read = cpu.bus.read
+        dispatch = cpu.dispatch
+
+        start = perf_counter()
+
+        # Body of the interpreter loop in Cpu.run, with the program counter reset
+        for _ in range(count):
+            state.register_PC = ORIGIN
+
+            pc = state.register_PC
+            code = read(pc)
+            state.opcode = code
+            state.register_PC = (pc + 1) & 0xFFFF
+
+            addressing_mode, operation, cycles = dispatch[code]
+
+            cycles += addressing_mode() & operation()
+            state.cycles += cycles
+
+        best = min(best, perf_counter() - start)
+
+    return best / count * 1e9
+
+
+def run_all(state_handler: str = "fast", count: int = 20_000, repeat: int = 3, opcodes=DOCUMENTED) -> Dict:
+    """
+    Measures opcodes, returns the JSON document written by --save
+    """
+    results = {}
+
+    for opcode in opcodes:
+        entry = OPCODES[opcode]
+
+        results[f"{opcode:02X}"] = {
+            "instruction": entry.instruction,
+            "addressing_mode": entry.addressing_mode,
+            "ns": measure(opcode, state_handler, count, repeat),
+        }
+
+    return {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "state_handler": state_handler,
+        "count": count,
+        "results": results,
+    }
+
+
+def diff(current: Dict, baseline: Dict, threshold: float = 0.15) -> List[Dict]:
+    """
+    Compares two documents opcode by opcode, largest relative slowdown first
+    Changes beyond threshold in either direction are flagged
+    """
+    changes = []
+
+    for key, result in current["results"].items():
+        before = baseline["results"].get(key)
+
+        if before is None:
+            continue
+
+        ratio = result["ns"] / before["ns"]
+
+        changes.append({
+            "opcode": key,
+            "instruction": result["instruction"],
+            "addressing_mode": result["addressing_mode"],
+            "before": before["ns"],
+            "after": result["ns"],
+            "ratio": ratio,
+            "slower": ratio > 1 + threshold,
+            "faster": ratio < 1 - threshold,
+        })
+
+    return sorted(changes, key=lambda change: change["ratio"], reverse=True)
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--state-handler", default="fast", choices=list(STATE_HANDLERS))
+    parser.add_argument("--count", type=int, default=20_000, help="executions per measurement")
+    parser.add_argument("--repeat", type=int, default=3, help="measurements per opcode, the fastest counts")
+    parser.add_argument("--save", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file to diff against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative change worth flagging")
+    args = parser.parse_args(arguments)
+
+    document = run_all(args.state_handler, args.count, args.repeat)
+
+    ordered = sorted(document["results"].items(), key=lambda item: item[1]["ns"], reverse=True)
+
+    print(f"{'opcode':6} {'instr':5} {'mode':4} {'ns':>8}")
+
+    for key, result in ordered:
+        print(f"{key:6} {result['instruction']:5} {result['addressing_mode']:4} {result['ns']:8.1f}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(document, f, indent=2)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+
+    changes = diff(document, baseline, args.threshold)
+
+    print()
+    print(f"{'opcode':6} {'instr':5} {'mode':4} {'before':>8} {'after':>8} {'ratio':>6}")
+
+    for change in changes:
+        marker = "  SLOWER" if change["slower"] else "  faster" if change["faster"] else ""
+
+        print(
+            f"{change['opcode']:6} {change['instruction']:5} {change['addressing_mode']:4} "
+            f"{change['before']:8.1f} {change['after']:8.1f} {change['ratio']:6.2f}{marker}"
+        )
+
+    return 1 if any(change["slower"] for change in changes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
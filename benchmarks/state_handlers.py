@@ -0,0 +1,67 @@
+"""
+Compares the fast and the checked state handlers on an instruction mix
+Run from the repository root: `python -m benchmarks.state_handlers`
+"""
+from time import perf_counter
+
+from src.cpu.cpu import Cpu, STATE_HANDLERS
+
+ORIGIN = 0x0400
+
+# 16 * 256 iterations of loads, stores, arithmetic, shifts, stack and branches
+PROGRAM = bytes([
+    0xA2, 0x00,       # LDX #$00
+    0xA0, 0x10,       # LDY #$10
+    0x8A,             # loop: TXA
+    0x18,             # CLC
+    0x69, 0x37,       # ADC #$37
+    0x38,             # SEC
+    0xE9, 0x11,       # SBC #$11
+    0x0A,             # ASL A
+    0x4A,             # LSR A
+    0x48,             # PHA
+    0x68,             # PLA
+    0x95, 0x20,       # STA $20,X
+    0xB5, 0x20,       # LDA $20,X
+    0x29, 0x0F,       # AND #$0F
+    0xE8,             # INX
+    0xD0, 0xEC,       # BNE loop
+    0x88,             # DEY
+    0xD0, 0xE9,       # BNE loop
+    0x00,             # BRK
+])
+
+# Instructions executed by PROGRAM, including the final BRK
+INSTRUCTIONS = 2 + 16 * (256 * 14 + 2) + 1
+
+
+def measure(state_handler: str, backend: str = "interpreter") -> float:
+    """
+    Returns the instructions per second achieved with a state handler
+    """
+    cpu = Cpu(state_handler=state_handler, backend=backend)
+    cpu.load(PROGRAM, ORIGIN)
+
+    start = perf_counter()
+    cpu.run()
+    elapsed = perf_counter() - start
+
+    return INSTRUCTIONS / elapsed
+
+
+def main() -> None:
+    results = {name: measure(name) for name in STATE_HANDLERS}
+
+    for name, ips in results.items():
+        print(f"{name + ':':9} {ips:12,.0f} instructions/s")
+
+    print(f"speedup:  {results['fast'] / results['checked']:12.2f}x")
+
+    jit = measure("fast", "jit")
+
+    print(f"{'jit:':9} {jit:12,.0f} instructions/s")
+    print(f"speedup:  {jit / results['fast']:12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Runs the bundled 6502 workloads on every backend and state handler
+Run from the repository root: `python -m benchmarks.throughput`
+
+    python -m benchmarks.throughput --json results.json
+    python -m benchmarks.throughput --compare results.json --threshold 0.1
+
+With --compare the exit status is 1 when a combination got slower than the threshold allows
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional
+
+import json
+import platform
+import sys
+import time
+
+from src.cpu.cpu import BACKENDS, Cpu, STATE_HANDLERS
+
+from .workloads import WORKLOADS, Workload
+
+# Bump when the result layout changes
+RESULTS_VERSION = 1
+
+_instruction_counts: Dict[str, int] = {}
+
+
+def count_instructions(workload: Workload) -> int:
+    """
+    Returns the instructions executed by a workload, BRK included
+    Counted once by stepping the interpreter, runs are deterministic
+    """
+    if workload.name not in _instruction_counts:
+        cpu = Cpu()
+        workload.load(cpu)
+
+        count = 0
+
+        while True:
+            cpu.step()
+            count += 1
+
+            if cpu.exit_reason is not None:
+                break
+
+        _instruction_counts[workload.name] = count
+
+    return _instruction_counts[workload.name]
+
+
+def measure(workload: Workload, backend: str = "interpreter", state_handler: str = "fast", repeat: int = 3) -> Dict:
+    """
+    Returns the best of repeat runs on fresh machines
+    Raises RuntimeError when the workload computes a wrong result
+    """
+    instructions = count_instructions(workload)
+    best = float("inf")
+    cycles = 0
+
+    for _ in range(repeat):
+        cpu = Cpu(state_handler=state_handler, backend=backend)
+        workload.load(cpu)
+
+        start = perf_counter()
+        cycles = cpu.run()
+        elapsed = perf_counter() - start
+
+        if not workload.check(cpu):
+            raise RuntimeError(f"{workload.name} computed a wrong result on {backend}/{state_handler}")
+
+        best = min(best, elapsed)
+
+    return {
+        "workload": workload.name,
+        "backend": backend,
+        "state_handler": state_handler,
+        "instructions": instructions,
+        "cycles": cycles,
+        "seconds": best,
+        "instructions_per_second": instructions / best,
+        "cycles_per_second": cycles / best,
+        "mhz": cycles / best / 1e6,
+    }
+
+
+def run_suite(
+    workloads: Iterable[str] = WORKLOADS,
+    backends: Iterable[str] = BACKENDS,
+    state_handlers: Iterable[str] = STATE_HANDLERS,
+    repeat: int = 3,
+) -> Dict:
+    """
+    Measures every combination, returns the JSON document written by --json
+    """
+    results = [
+        measure(WORKLOADS[name], backend, state_handler, repeat)
+        for name in workloads
+        for backend in backends
+        for state_handler in state_handlers
+    ]
+
+    return {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.1) -> List[Dict]:
+    """
+    Matches results by workload, backend and state handler
+    Returns one entry per match, flagged as a regression when the instruction rate
+    dropped by more than threshold
+    """
+    def key(result: Dict) -> tuple:
+        return result["workload"], result["backend"], result["state_handler"]
+
+    previous = {key(result): result for result in baseline["results"]}
+    changes = []
+
+    for result in current["results"]:
+        before = previous.get(key(result))
+
+        if before is None:
+            continue
+
+        ratio = result["instructions_per_second"] / before["instructions_per_second"]
+
+        changes.append({
+            "workload": result["workload"],
+            "backend": result["backend"],
+            "state_handler": result["state_handler"],
+            "ratio": ratio,
+            "regression": ratio < 1 - threshold,
+        })
+
+    return changes
+
+
+def _print_results(document: Dict) -> None:
+    print(f"{'workload':14} {'backend':12} {'handler':8} {'instr/s':>12} {'cycles/s':>12} {'MHz':>7}")
+
+    for result in document["results"]:
+        print(
+            f"{result['workload']:14} {result['backend']:12} {result['state_handler']:8} "
+            f"{result['instructions_per_second']:12,.0f} {result['cycles_per_second']:12,.0f} {result['mhz']:7.3f}"
+        )
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workload", action="append", choices=list(WORKLOADS), help="repeatable, default all")
+    parser.add_argument("--backend", action="append", choices=list(BACKENDS), help="repeatable, default all")
+    parser.add_argument("--state-handler", action="append", choices=list(STATE_HANDLERS), help="repeatable, default all")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per combination, the fastest counts")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results file of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.1, help="tolerated slowdown, 0.1 is 10%%")
+    args = parser.parse_args(arguments)
+
+    document = run_suite(
+        args.workload or WORKLOADS,
+        args.backend or BACKENDS,
+        args.state_handler or STATE_HANDLERS,
+        args.repeat,
+    )
+
+    _print_results(document)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(document, f, indent=2)
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare, "r") as f:
+        baseline = json.load(f)
+
+    changes = compare(document, baseline, args.threshold)
+
+    print()
+
+    for change in changes:
+        marker = "  REGRESSION" if change["regression"] else ""
+        print(f"{change['workload']:14} {change['backend']:12} {change['state_handler']:8} {change['ratio']:6.2f}x{marker}")
+
+    return 1 if any(change["regression"] for change in changes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,431 @@
+"""
+6502 programs used by the throughput benchmark
+Every workload starts at ORIGIN, stops on BRK and can verify its own result
+"""
+from random import Random
+from typing import Callable, Dict, NamedTuple
+
+import zlib
+
+from src.cpu.cpu import Cpu
+
+from .assembler import assemble
+
+ORIGIN = 0x0400
+
+
+class Workload(NamedTuple):
+    name: str
+    source: str                    # Assembly, see benchmarks.assembler
+    data: Dict[int, bytes]         # Memory preloaded before the run, by address
+    check: Callable[[Cpu], bool]   # True when the run produced the expected result
+
+    def program(self) -> bytes:
+        return assemble(self.source, ORIGIN)[0]
+
+    def load(self, cpu: Cpu) -> None:
+        """
+        Places data and program in memory and points the program counter at the program
+        """
+        for address, block in self.data.items():
+            cpu.bus.load(block, address)
+
+        cpu.load(self.program(), ORIGIN)
+
+
+def _random_bytes(seed: int, length: int) -> bytes:
+    rng = Random(seed)
+
+    return bytes(rng.getrandbits(8) for _ in range(length))
+
+
+# Sieve of Eratosthenes over 4096 numbers, one flag byte per number
+SIEVE = Workload(
+    name="sieve",
+    source="""
+FLAGS = $2000
+LIMIT = $30         ; high byte of FLAGS + 4096
+PTR = $00
+NUM = $02
+COUNT = $04
+
+        LDA #<FLAGS
+        STA PTR
+        LDA #>FLAGS
+        STA PTR+1
+        LDX #$10
+        LDY #$00
+        TYA
+clear:  STA (PTR),Y
+        INY
+        BNE clear
+        INC PTR+1
+        DEX
+        BNE clear
+
+        STA COUNT
+        STA COUNT+1
+        STA NUM+1
+        LDA #$02
+        STA NUM
+
+next:   LDA NUM             ; PTR = FLAGS + NUM
+        STA PTR
+        CLC
+        LDA NUM+1
+        ADC #>FLAGS
+        STA PTR+1
+        LDY #$00
+        LDA (PTR),Y
+        BNE skip
+
+        INC COUNT           ; NUM is prime
+        BNE mark
+        INC COUNT+1
+
+mark:   CLC                 ; PTR += NUM until past the flags
+        LDA PTR
+        ADC NUM
+        STA PTR
+        LDA PTR+1
+        ADC NUM+1
+        STA PTR+1
+        CMP #LIMIT
+        BCS skip
+        LDA #$01
+        STA (PTR),Y
+        BNE mark
+
+skip:   INC NUM
+        BNE done
+        INC NUM+1
+done:   LDA NUM+1
+        CMP #$10
+        BCC next
+        BRK
+""",
+    data={},
+    check=lambda cpu: cpu.bus.read(0x04) | cpu.bus.read(0x05) << 8 == 564,
+)
+
+
+CRC32_DATA = _random_bytes(32, 1024)
+
+# Bitwise CRC-32 (reflected polynomial $EDB88320) of 1 KiB
+CRC32 = Workload(
+    name="crc32",
+    source="""
+BUFFER = $2000
+LENGTH = $0400
+PTR = $00
+LEN = $02
+CRC = $10
+
+        LDA #$FF
+        STA CRC
+        STA CRC+1
+        STA CRC+2
+        STA CRC+3
+        LDA #<BUFFER
+        STA PTR
+        LDA #>BUFFER
+        STA PTR+1
+        LDA #<LENGTH
+        STA LEN
+        LDA #>LENGTH
+        STA LEN+1
+        LDY #$00
+
+byte:   LDA (PTR),Y
+        EOR CRC
+        STA CRC
+        LDX #$08
+bit:    LSR CRC+3
+        ROR CRC+2
+        ROR CRC+1
+        ROR CRC
+        BCC zero
+        LDA CRC+3
+        EOR #$ED
+        STA CRC+3
+        LDA CRC+2
+        EOR #$B8
+        STA CRC+2
+        LDA CRC+1
+        EOR #$83
+        STA CRC+1
+        LDA CRC
+        EOR #$20
+        STA CRC
+zero:   DEX
+        BNE bit
+
+        INC PTR
+        BNE count
+        INC PTR+1
+count:  LDA LEN
+        BNE low
+        DEC LEN+1
+low:    DEC LEN
+        LDA LEN
+        ORA LEN+1
+        BNE byte
+
+        LDX #$03
+final:  LDA CRC,X
+        EOR #$FF
+        STA CRC,X
+        DEX
+        BPL final
+        BRK
+""",
+    data={0x2000: CRC32_DATA},
+    check=lambda cpu: int.from_bytes(cpu.bus.read_block(0x10, 4), "little") == zlib.crc32(CRC32_DATA),
+)
+
+
+SORT_DATA = _random_bytes(200, 200)
+
+# Bubble sort of 200 bytes
+BUBBLE_SORT = Workload(
+    name="bubble_sort",
+    source=f"""
+BUF = $2000
+N = {len(SORT_DATA)}
+SWAPPED = $00
+
+outer:  LDA #$00
+        STA SWAPPED
+        LDX #$00
+inner:  LDA BUF,X
+        CMP BUF+1,X
+        BCC next
+        BEQ next
+        TAY
+        LDA BUF+1,X
+        STA BUF,X
+        TYA
+        STA BUF+1,X
+        INC SWAPPED
+next:   INX
+        CPX #N-1
+        BNE inner
+        LDA SWAPPED
+        BNE outer
+        BRK
+""",
+    data={0x2000: SORT_DATA},
+    check=lambda cpu: bytes(cpu.bus.read_block(0x2000, len(SORT_DATA))) == bytes(sorted(SORT_DATA)),
+)
+
+
+MEMCPY_DATA = _random_bytes(16, 0x4000)
+
+# Copies 16 KiB from $4000 to $8000 a page at a time
+MEMCPY = Workload(
+    name="memcpy",
+    source="""
+SRC = $00
+DST = $02
+
+        LDA #$00
+        STA SRC
+        STA DST
+        LDA #$40
+        STA SRC+1
+        LDA #$80
+        STA DST+1
+        LDX #$40
+        LDY #$00
+copy:   LDA (SRC),Y
+        STA (DST),Y
+        INY
+        BNE copy
+        INC SRC+1
+        INC DST+1
+        DEX
+        BNE copy
+        BRK
+""",
+    data={0x4000: MEMCPY_DATA},
+    check=lambda cpu: bytes(cpu.bus.read_block(0x8000, 0x4000)) == MEMCPY_DATA,
+)
+
+
+# Adds the packed BCD number 12345 to an 8 digit counter 1000 times
+# ADC ignores the decimal flag in this emulator, digits are adjusted in software
+BCD = Workload(
+    name="bcd",
+    source="""
+NUM = $10           ; 4 bytes, least significant first
+ADDEND = $14
+REPS = $18
+CARRY = $1A
+LO = $1B
+T = $1C
+
+        LDA #$45
+        STA ADDEND
+        LDA #$23
+        STA ADDEND+1
+        LDA #$01
+        STA ADDEND+2
+        LDA #<1000
+        STA REPS
+        LDA #>1000
+        STA REPS+1
+
+loop:   LDA #$00
+        STA CARRY
+        LDX #$00
+
+byte:   LDA NUM,X           ; low digits
+        AND #$0F
+        STA T
+        LDA ADDEND,X
+        AND #$0F
+        CLC
+        ADC T
+        ADC CARRY
+        LDY #$00
+        CMP #$0A
+        BCC lowok
+        SBC #$0A
+        LDY #$01
+lowok:  STY CARRY
+        STA LO
+
+        LDA NUM,X           ; high digits
+        LSR
+        LSR
+        LSR
+        LSR
+        STA T
+        LDA ADDEND,X
+        LSR
+        LSR
+        LSR
+        LSR
+        CLC
+        ADC T
+        ADC CARRY
+        LDY #$00
+        CMP #$0A
+        BCC highok
+        SBC #$0A
+        LDY #$01
+highok: STY CARRY
+        ASL
+        ASL
+        ASL
+        ASL
+        ORA LO
+        STA NUM,X
+
+        INX
+        CPX #$04
+        BNE byte
+
+        LDA REPS
+        BNE low
+        DEC REPS+1
+low:    DEC REPS
+        LDA REPS
+        ORA REPS+1
+        BNE loop
+        BRK
+""",
+    data={},
+    check=lambda cpu: bytes(cpu.bus.read_block(0x10, 4)) == bytes([0x00, 0x50, 0x34, 0x12]),
+)
+
+
+STATE_MACHINE_DATA = _random_bytes(5, 2048)
+
+# Remainder modulo 5 of a 2 KiB big-endian number, a five state automaton fed bit by bit
+STATE_MACHINE = Workload(
+    name="state_machine",
+    source="""
+BUFFER = $2000
+PTR = $00
+LEN = $02
+T = $04
+RESULT = $10
+
+        LDA #<BUFFER
+        STA PTR
+        LDA #>BUFFER
+        STA PTR+1
+        LDA #$00
+        STA LEN
+        LDA #$08            ; 2048 bytes
+        STA LEN+1
+        LDX #$00
+
+byte:   LDY #$00
+        LDA (PTR),Y
+        STA T
+        LDY #$08
+
+bit:    ASL T
+        BCS one
+        CPX #$00            ; state = 2 * state mod 5
+        BEQ done
+        CPX #$01
+        BEQ z1
+        CPX #$02
+        BEQ z2
+        CPX #$03
+        BEQ z3
+        LDX #$03
+        JMP done
+z1:     LDX #$02
+        JMP done
+z2:     LDX #$04
+        JMP done
+z3:     LDX #$01
+        JMP done
+
+one:    CPX #$00            ; state = (2 * state + 1) mod 5
+        BEQ o0
+        CPX #$01
+        BEQ o1
+        CPX #$02
+        BEQ o2
+        CPX #$03
+        BEQ o3
+        JMP done
+o0:     LDX #$01
+        JMP done
+o1:     LDX #$03
+        JMP done
+o2:     LDX #$00
+        JMP done
+o3:     LDX #$02
+
+done:   DEY
+        BNE bit
+
+        INC PTR
+        BNE count
+        INC PTR+1
+count:  LDA LEN
+        BNE low
+        DEC LEN+1
+low:    DEC LEN
+        LDA LEN
+        ORA LEN+1
+        BNE byte
+
+        STX RESULT
+        BRK
+""",
+    data={0x2000: STATE_MACHINE_DATA},
+    check=lambda cpu: cpu.bus.read(0x10) == int.from_bytes(STATE_MACHINE_DATA, "big") % 5,
+)
+
+
+WORKLOADS: Dict[str, Workload] = {
+    workload.name: workload
+    for workload in (SIEVE, CRC32, BUBBLE_SORT, MEMCPY, BCD, STATE_MACHINE)
+}
@@ -1,4 +1,5 @@
 from subprocess import run
+import sys
 
 def test():
     """
@@ -12,4 +13,25 @@ def dev():
     Run project. Equivalent to:
     `poetry run python ./src/app.py`
     """
-    run(['python', './src/app.py'])
\ No newline at end of file
+    run(['python', './src/app.py'])
+
+def batch():
+    """
+    Run programs in parallel. Equivalent to:
+    `poetry run python -m src.batch [programs...]`
+    """
+    run(['python', '-m', 'src.batch', *sys.argv[1:]])
+
+def benchmark():
+    """
+    Run the throughput benchmark. Equivalent to:
+    `poetry run python -m benchmarks.throughput [options...]`
+    """
+    run(['python', '-m', 'benchmarks.throughput', *sys.argv[1:]])
+
+def serve():
+    """
+    Run the job server. Equivalent to:
+    `poetry run python -m src.server serve [options...]`
+    """
+    run(['python', '-m', 'src.server', 'serve', *sys.argv[1:]])
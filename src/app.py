@@ -1,8 +1,35 @@
+import sys
+
+from argparse import ArgumentParser
+
 from cpu.cpu import Cpu
+from cpu.cpu_loader import ImageFormat, load_image
+from cpu.cpu_trace import StreamTraceSink, TraceLevel
+
+DEFAULT_IMAGE = "test.bin"
+DEFAULT_START = 0x0400
+
+
+parser = ArgumentParser(description="Runs a program image with a full trace")
+parser.add_argument("image", nargs="?", help=f"raw, PRG, Intel HEX or iNES image, {DEFAULT_IMAGE} started at {DEFAULT_START:#06x} when left out")
+parser.add_argument("--format", choices=[member.value for member in ImageFormat], help="image format, detected by default")
+parser.add_argument("--address", type=lambda value: int(value, 0), default=0x0000, help="load address of raw images")
+parser.add_argument("--start", type=lambda value: int(value, 0), help="first instruction, defaults to the image entry point")
+
+args = parser.parse_args()
+
+# Without an image app.py runs test.bin from 0x0400 as it always did, named images start at their entry point
+if args.image is None:
+    args.image = DEFAULT_IMAGE
+
+    if args.start is None:
+        args.start = DEFAULT_START
 
+cpu = Cpu(trace=StreamTraceSink(sys.stdout, TraceLevel.FULL))
 
-with open("test.bin", "rb") as f:
-    binary = f.read()
+image = load_image(cpu, args.image, args.format, args.address, args.start)
 
-    cpu = Cpu()
-    cpu.run(binary)
+try:
+    cpu.run()
+finally:
+    image.close()
@@ -0,0 +1,146 @@
+"""
+Runs many independent programs in parallel, one reusable Cpu per worker process
+
+    python -m src.batch program.bin other.bin --address 0x0400 --max-cycles 1000000
+    python -m src.batch --jobs jobs.jsonl
+
+A jobs file holds one JSON object per line with a "path" and optionally "name",
+"address", "start", "max_cycles" and "max_instructions".
+Results are printed as JSON lines in completion order.
+"""
+from argparse import ArgumentParser
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Set
+
+import json
+import os
+import sys
+
+from .cpu.cpu import Cpu
+
+class BatchJob(NamedTuple):
+    name: str
+    program: bytes
+    address: int = 0x0000
+    start: Optional[int] = None
+    max_cycles: Optional[int] = None
+    max_instructions: Optional[int] = None
+
+
+# Per process worker state, created once by _init_worker
+_cpu: Optional[Cpu] = None
+_power_on: bytes = b""
+
+def _init_worker() -> None:
+    global _cpu, _power_on
+
+    _cpu = Cpu()
+    _power_on = _cpu.snapshot()
+
+def _run_job(job: BatchJob) -> Dict:
+    """
+    Runs one job on the worker's cpu, restored to its power-on state first
+    """
+    if _cpu is None:
+        _init_worker()
+
+    cpu = _cpu
+    cpu.restore(_power_on)
+
+    try:
+        cpu.load(job.program, job.address, job.start)
+        cycles = cpu.run(max_cycles=job.max_cycles, max_instructions=job.max_instructions)
+    except Exception as error:
+        return {"name": job.name, "exit_reason": "error", "error": f"{type(error).__name__}: {error}"}
+
+    return job_result(job.name, cpu, cycles)
+
+def job_result(name: str, cpu: Cpu, cycles: int) -> Dict:
+    """
+    JSON-ready outcome of a job that ran to completion on cpu
+    """
+    return {
+        "name": name,
+        "exit_reason": cpu.exit_reason.value,
+        "cycles": cycles,
+        "registers": {
+            "A": cpu.state.register_A,
+            "X": cpu.state.register_X,
+            "Y": cpu.state.register_Y,
+            "SP": cpu.state.register_SP,
+            "SR": cpu.state.register_SR,
+            "PC": cpu.state.register_PC,
+        },
+    }
+
+def run_batch(jobs: Iterable[BatchJob], workers: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Spreads jobs over a process pool and yields their results in completion order
+    Only a few jobs per worker are in flight, so jobs can be produced lazily
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = iter(jobs)
+    pending: Set[Future] = set()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        while True:
+            for job in jobs:
+                pending.add(executor.submit(_run_job, job))
+
+                if len(pending) >= workers * 4:
+                    break
+
+            if not pending:
+                return
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                yield future.result()
+
+def _read_jobs(paths: Iterable[str], address: int, start: Optional[int], max_cycles: Optional[int], max_instructions: Optional[int]) -> Iterator[BatchJob]:
+    for path in paths:
+        with open(path, "rb") as f:
+            yield BatchJob(path, f.read(), address, start, max_cycles, max_instructions)
+
+def _read_jobs_file(path: str) -> Iterator[BatchJob]:
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+
+            spec = json.loads(line)
+
+            with open(spec["path"], "rb") as program:
+                yield BatchJob(
+                    spec.get("name", spec["path"]),
+                    program.read(),
+                    spec.get("address", 0x0000),
+                    spec.get("start"),
+                    spec.get("max_cycles"),
+                    spec.get("max_instructions"),
+                )
+
+def main(argv: Optional[list] = None) -> None:
+    parser = ArgumentParser(prog="python -m src.batch", description="Run 6502 programs in parallel")
+    parser.add_argument("programs", nargs="*", help="binary images to run")
+    parser.add_argument("--jobs", help="JSON lines file describing one job per line")
+    parser.add_argument("--address", type=lambda value: int(value, 0), default=0x0000, help="load address")
+    parser.add_argument("--start", type=lambda value: int(value, 0), help="first instruction, defaults to the load address")
+    parser.add_argument("--max-cycles", type=int, help="cycle budget per job")
+    parser.add_argument("--max-instructions", type=int, help="instruction budget per job")
+    parser.add_argument("--workers", type=int, help="worker processes, defaults to the core count")
+
+    args = parser.parse_args(argv)
+
+    if args.jobs:
+        jobs = _read_jobs_file(args.jobs)
+    else:
+        jobs = _read_jobs(args.programs, args.address, args.start, args.max_cycles, args.max_instructions)
+
+    for result in run_batch(jobs, args.workers):
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
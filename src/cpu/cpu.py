@@ -3,102 +3,499 @@ from .interfaces.abstract_cpu_bus import AbstractCpuBus
 from .interfaces.abstract_cpu_state_handler import AbstractCpuStateHandler
 from .interfaces.abstract_cpu_instructions import AbstractCpuInstructions
 from .interfaces.abstract_cpu_addressing_modes import AbstractCpuAddressingModes
+from .interfaces.abstract_trace_sink import AbstractTraceSink
 
 from .cpu_addressing_modes import CpuAddressingModes
+from .cpu_bus import CpuBus
+from .cpu_fast_state_handler import CpuFastStateHandler
+from .cpu_instruction_set import IMPLIED_OPCODES, OPCODES
 from .cpu_instructions import CpuInstructions
+from .cpu_scheduler import CpuScheduler
+from .cpu_snapshot import restore_snapshot, take_snapshot
 from .cpu_state_handler import CpuStateHandler
+from .cpu_watchpoint import Watchpoint, WatchHit
 
-import json
+from enum import Enum
+from itertools import count
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple, Type
 
-with open("./data/instruction_set.json", "r") as f:
-    lookup = json.load(f)
+# The jit and the profiler are only imported once selected
+if TYPE_CHECKING:
+    from .cpu_jit import CpuJit
+    from .cpu_profiler import CpuProfiler
 
-class CpuBus(AbstractCpuBus):
-    def __init__(self, cpu: AbstractCpu):
-        self.cpu = cpu
-        self.ram = [0] * 64 * 1024
+class ExitReason(str, Enum):
+    BRK = "brk"                           # A BRK instruction was executed
+    MAX_CYCLES = "max_cycles"             # The cycle budget was used up
+    MAX_INSTRUCTIONS = "max_instructions" # The instruction budget was used up
+    BREAKPOINT = "breakpoint"             # The program counter reached a breakpoint
+    WATCHPOINT = "watchpoint"             # An instruction accessed a watched address
+    STOPPED = "stopped"                   # stop() was called during the run
 
-    def read(self, address: int, read_only: bool = False) -> int:
-        return self.ram[address]
+# Register file implementations selectable per Cpu
+STATE_HANDLERS: Dict[str, Type[AbstractCpuStateHandler]] = {
+    "fast": CpuFastStateHandler,     # Plain attributes, values are masked by the handlers
+    "checked": CpuStateHandler,      # Validates every write, for debugging
+}
 
-    def write(self, address: int, data: int) -> None:
-        if address > len(self.ram) - 1:
-            raise IndexError(f'Address out of range: {address} > {len(self.ram) - 1}')
-        
-        self.ram[address] = data
+# Execution engines selectable per Cpu
+BACKENDS = ("interpreter", "jit")
 
-    def load(self, program: bytearray) -> None:
-        for i, byte in enumerate(program):
-            self.write(i, byte)
+# Interrupt vectors, each holds the little-endian address of its handler
+NMI_VECTOR = 0xFFFA
+RESET_VECTOR = 0xFFFC
+IRQ_VECTOR = 0xFFFE
+
+# Cycles the cpu spends entering an interrupt or coming out of reset
+INTERRUPT_CYCLES = 7
 
-# TODO: Implement interrupts
 class Cpu(AbstractCpu):
-    def __init__(self):
-        self.state: AbstractCpuStateHandler = CpuStateHandler()
+    def __init__(self, trace: Optional[AbstractTraceSink] = None, state_handler: str = "fast", backend: str = "interpreter"):
+        if state_handler not in STATE_HANDLERS:
+            raise ValueError(f"{state_handler} is not a state handler, expected one of {list(STATE_HANDLERS)}")
+
+        if backend not in BACKENDS:
+            raise ValueError(f"{backend} is not a backend, expected one of {list(BACKENDS)}")
+
+        self.state: AbstractCpuStateHandler = STATE_HANDLERS[state_handler]()
         self.bus: AbstractCpuBus = CpuBus(self)
         self.addr_modes: AbstractCpuAddressingModes = CpuAddressingModes(self)
         self.instructions: AbstractCpuInstructions = CpuInstructions(self)
 
-    # TODO: Organize this better
-    # TODO: Implement cycle counter
-    def run(self, binary) -> None:
-        self.bus.load(binary)
+        self.trace = trace
+        self.exit_reason: Optional[ExitReason] = None
+
+        # Counts executed instructions while set, see cpu_profiler
+        self.profiler: Optional["CpuProfiler"] = None
+
+        # run() stops before executing an instruction at one of these addresses
+        self.breakpoints: Set[int] = set()
+
+        # run() stops after an instruction that accessed a watched address
+        self.watchpoints: List[Watchpoint] = []
+        self.watch_hit: Optional[WatchHit] = None
+
+        # Timed device callbacks, run() executes up to the next one
+        self.scheduler = CpuScheduler(self)
+
+        # Interrupt requests waiting for the next instruction boundary
+        self.irq_pending = False
+        self.nmi_pending = False
+
+        # Cycle count the current slice of run() stops at, lowered by irq(), nmi(), stop()
+        # and by events scheduled for an earlier cycle
+        self._slice_end: float = float("inf")
+        self._stop_requested = False
+
+        self.dispatch: Tuple[Tuple[Callable[[], int], Callable[[], int], int], ...] = self._build_dispatch()
+
+        # Compiles basic blocks, used by run() whenever tracing is off
+        self.jit: Optional["CpuJit"] = None
+
+        if backend == "jit":
+            from .cpu_jit import CpuJit
+
+            self.jit = CpuJit(self)
+
+    def _build_dispatch(self) -> tuple:
+        """
+        Binds every opcode of the instruction set to its handlers once
+        Each entry is an (addressing_mode, operation, base_cycles) tuple
+        """
+        return tuple(
+            (
+                getattr(self.addr_modes, entry.addressing_mode),
+                getattr(self.instructions, entry.operation),
+                entry.cycles,
+            )
+            for entry in OPCODES
+        )
+
+    @property
+    def trace(self) -> Optional[AbstractTraceSink]:
+        return self._trace
+
+    @trace.setter
+    def trace(self, sink: Optional[AbstractTraceSink]) -> None:
+        # A sink at level OFF is dropped so the run loop stays headless
+        self._trace = sink if sink is not None and sink.level else None
+
+    def load(self, program: bytes, address: int = 0x0000, start: Optional[int] = None) -> None:
+        """
+        Places a program in memory and points the program counter at start
+        Execution starts at the load address unless start is given
+        """
+        self.bus.load(program, address)
+        self.start_at(address if start is None else start)
 
-        self.state.register_PC = 0x0400
+    def start_at(self, address: int) -> None:
+        """
+        Points the program counter at address with the flags a loaded program starts with
+        """
+        self.state.register_PC = address
 
         self.state.flag_Z = bool(1)
         self.state.flag_I = bool(1)
 
-        print(f"Status: {self.state.register_SR:08b}")
+    def step(self) -> int:
+        """
+        Executes a single instruction, after due events and pending interrupts
+        Returns the cycles it took, including page crossing and branch penalties
+        and the cycles spent entering an interrupt
+        """
+        state = self.state
+        start = state.cycles
+
+        if self.scheduler.deadline <= start:
+            self.scheduler.run_due(start)
+
+        if self.nmi_pending or self.irq_pending and not state.flag_I:
+            self._service_interrupt()
+
+        self._execute()
+
+        return state.cycles - start
+
+    def _execute(self) -> None:
+        """
+        Executes the instruction at the program counter and nothing else
+        Due events and pending interrupts are left to the caller
+        """
+        state = self.state
+
+        before = state.cycles
+        pc = state.register_PC
+
+        self.watch_hit = None
+
+        opcode = self.bus.read(pc)
+        state.opcode = opcode
+        state.register_PC = (pc + 1) & 0xFFFF
+
+        addressing_mode, operation, cycles = self.dispatch[opcode]
+
+        # Branches add their own penalties to state.cycles while executing
+        cycles += addressing_mode() & operation()
+        state.cycles += cycles
+
+        if self._trace is not None:
+            self._trace.record(self, pc)
+
+        if self.profiler is not None:
+            self.profiler.record(pc, opcode, state.cycles - before)
+
+        if opcode == 0x00:
+            self.exit_reason = ExitReason.BRK
+        elif self.watch_hit is not None:
+            self.exit_reason = ExitReason.WATCHPOINT
+        else:
+            self.exit_reason = None
+
+    def run(self, max_cycles: Optional[int] = None, max_instructions: Optional[int] = None) -> int:
+        """
+        Executes instructions until a BRK, or until one of the budgets is used up
+        The budget that stopped the run is kept in exit_reason
+        Code runs in slices that end at the next scheduled event, events and
+        interrupts are handled between slices
+        Traced, profiled and debugged runs always use the interpreter
+        A breakpoint at the address the run starts from does not stop it
+        Returns the cycles consumed
+        """
+        state = self.state
+        scheduler = self.scheduler
+        trace = self._trace
+
+        start = state.cycles
+        cycle_limit = start + max_cycles if max_cycles is not None else float("inf")
+        remaining = max_instructions if max_instructions is not None else float("inf")
+
+        instrumented = self.profiler is not None or self.breakpoints or self.watchpoints
+        jit = self.jit if trace is None and not instrumented else None
+
+        self.exit_reason = None
+        self.watch_hit = None
+        self._stop_requested = False
 
         while True:
-            print(f"PC: {self.state.register_PC:04x}")
+            if scheduler.deadline <= state.cycles:
+                scheduler.run_due(state.cycles)
+
+                if self._stop_requested:
+                    self.exit_reason = ExitReason.STOPPED
+                    break
+
+            if self.nmi_pending or self.irq_pending and not state.flag_I:
+                self._service_interrupt()
+
+                if state.register_PC in self.breakpoints:
+                    self.exit_reason = ExitReason.BREAKPOINT
+                    break
+
+            # While an IRQ waits for the I flag to clear, every instruction may be the one clearing it
+            limit = 1 if self.irq_pending else remaining
+
+            self._slice_end = min(cycle_limit, scheduler.deadline)
+
+            if jit is not None:
+                _, executed = jit.run(self._slice_end, limit)
+            elif instrumented:
+                executed = self._run_instrumented(limit)
+            else:
+                executed = self._run_interpreter(limit)
+
+            remaining -= executed
+
+            if self.exit_reason is not None:
+                break
+
+            if self._stop_requested:
+                self.exit_reason = ExitReason.STOPPED
+                break
+
+            if state.cycles >= cycle_limit:
+                self.exit_reason = ExitReason.MAX_CYCLES
+                break
+
+            if remaining <= 0:
+                self.exit_reason = ExitReason.MAX_INSTRUCTIONS
+                break
+
+        if trace is not None:
+            trace.flush()
+
+        return state.cycles - start
+
+    def _run_interpreter(self, instruction_limit: float) -> int:
+        """
+        Interpreter loop of run(), executes one slice
+        Stops after a BRK, at the end of the slice or after instruction_limit instructions
+        Like the jit, nothing runs when the slice is already over
+        Returns the instructions executed
+        """
+        state = self.state
+        bus = self.bus
+        dispatch = self.dispatch
+        trace = self._trace
+
+        # Entering an interrupt can take the cpu past the end of the slice before it starts
+        if state.cycles >= self._slice_end:
+            return 0
+
+        instructions = range(1, instruction_limit + 1) if instruction_limit != float("inf") else count(1)
+        executed = 0
+
+        for executed in instructions:
+            pc = state.register_PC
+
+            opcode = bus.read(pc)
+            state.opcode = opcode
+            state.register_PC = (pc + 1) & 0xFFFF
+
+            addressing_mode, operation, cycles = dispatch[opcode]
+
+            # Branches add their own penalties to state.cycles while executing
+            cycles += addressing_mode() & operation()
+            state.cycles += cycles
+
+            if trace is not None:
+                trace.record(self, pc)
+
+            if opcode == 0x00:
+                self.exit_reason = ExitReason.BRK
+                break
+
+            if state.cycles >= self._slice_end:
+                break
+
+        return executed
+
+    def _run_instrumented(self, instruction_limit: float) -> int:
+        """
+        Interpreter loop of run() that also fills the profiler counters
+        and stops on breakpoints and watchpoints
+        Kept apart so plain runs pay nothing for it
+        """
+        state = self.state
+        bus = self.bus
+        dispatch = self.dispatch
+        trace = self._trace
+
+        profiler = self.profiler
+        breakpoints = self.breakpoints
+
+        if profiler is not None:
+            opcode_counts = profiler.opcode_counts
+            opcode_cycles = profiler.opcode_cycles
+            pc_counts = profiler.pc_counts
+            pc_cycles = profiler.pc_cycles
+
+        # Entering an interrupt can take the cpu past the end of the slice before it starts
+        if state.cycles >= self._slice_end:
+            return 0
 
-            self.state.opcode = self.bus.read(self.state.register_PC)
-            self.state.register_PC += 1
+        instructions = range(1, instruction_limit + 1) if instruction_limit != float("inf") else count(1)
+        executed = 0
 
-            print(f"OPCODE: {self.state.opcode:02x}")
+        for executed in instructions:
+            pc = state.register_PC
+            before = state.cycles
 
-            self.state.current_addressing_mode = lookup[self.state.opcode]["addressing_mode"]
-            self.state.current_instruction = lookup[self.state.opcode]["operation"]
+            opcode = bus.read(pc)
+            state.opcode = opcode
+            state.register_PC = (pc + 1) & 0xFFFF
 
-            print(f"INSTRUCTION: {self.state.current_instruction}")
-            print(f"ADDRESSING MODE: {self.state.current_addressing_mode}")
+            addressing_mode, operation, cycles = dispatch[opcode]
 
-            getattr(self.addr_modes, self.state.current_addressing_mode)()
-            getattr(self.instructions, self.state.current_instruction)()
+            # Branches add their own penalties to state.cycles while executing
+            cycles += addressing_mode() & operation()
+            state.cycles += cycles
 
-            print(f"A: 0x{self.state.register_A:02x},", end=" ")
-            print(f"X: 0x{self.state.register_X:02x},", end=" ")
-            print(f"Y: 0x{self.state.register_Y:02x},", end=" ")
-            print(f"SP: 0x{self.state.register_SP:02x}")
+            if profiler is not None:
+                spent = state.cycles - before
+                opcode_counts[opcode] += 1
+                opcode_cycles[opcode] += spent
+                pc_counts[pc] += 1
+                pc_cycles[pc] += spent
 
-            print(f"N: {int(self.state.flag_N)},", end=" ")
-            print(f"V: {int(self.state.flag_V)},", end=" ")
-            print(f"U: {int(self.state.flag_U)},", end=" ")
-            print(f"B: {int(self.state.flag_B)},", end=" ")
-            print(f"D: {int(self.state.flag_D)},", end=" ")
-            print(f"I: {int(self.state.flag_I)},", end=" ")
-            print(f"Z: {int(self.state.flag_Z)},", end=" ")
-            print(f"C: {int(self.state.flag_C)}")
+            if trace is not None:
+                trace.record(self, pc)
 
-            print("\n")
+            if opcode == 0x00:
+                self.exit_reason = ExitReason.BRK
+                break
+
+            if self.watch_hit is not None:
+                self.exit_reason = ExitReason.WATCHPOINT
+                break
 
-            if self.state.register_PC == 0x0435:
-                from time import sleep
-                sleep(1)
+            if state.register_PC in breakpoints:
+                self.exit_reason = ExitReason.BREAKPOINT
+                break
 
-            if self.state.current_instruction == "BRK":
+            if state.cycles >= self._slice_end:
                 break
 
+        return executed
+
+    def irq(self) -> None:
+        """
+        Requests a maskable interrupt
+        It stays pending until the I flag is clear at an instruction boundary
+        """
+        self.irq_pending = True
+        self._slice_end = -1
+
+    def nmi(self) -> None:
+        """
+        Requests a non-maskable interrupt, taken at the next instruction boundary
+        """
+        self.nmi_pending = True
+        self._slice_end = -1
+
+    def stop(self) -> None:
+        """
+        Makes the current run() return after the instruction being executed
+        Meant for devices and callbacks, on the jit a stop from a read observer
+        takes effect at the end of the compiled block
+        """
+        self._stop_requested = True
+        self._slice_end = -1
+
+    def _service_interrupt(self) -> None:
+        """
+        Enters the handler of the pending NMI, or else of the pending IRQ
+        Pushes PC and SR with B clear, like hardware interrupts do, and sets the I flag
+        """
+        state = self.state
+        bus = self.bus
+
+        if self.nmi_pending:
+            self.nmi_pending = False
+            vector = NMI_VECTOR
+        else:
+            self.irq_pending = False
+            vector = IRQ_VECTOR
+
+        bus.write(0x0100 + state.register_SP, (state.register_PC >> 8) & 0x00FF)
+        state.register_SP = (state.register_SP - 1) & 0xFF
+        bus.write(0x0100 + state.register_SP, state.register_PC & 0x00FF)
+        state.register_SP = (state.register_SP - 1) & 0xFF
+
+        bus.write(0x0100 + state.register_SP, (state.register_SR & ~0x10 | 0x20) & 0xFF)
+        state.register_SP = (state.register_SP - 1) & 0xFF
+
+        state.flag_I = bool(1)
+
+        state.addr_abs = vector
+        state.register_PC = bus.read(vector) | (bus.read(vector + 1) << 8)
+
+        state.cycles += INTERRUPT_CYCLES
+
+    def add_breakpoint(self, address: int) -> None:
+        self.breakpoints.add(address & 0xFFFF)
+
+    def remove_breakpoint(self, address: int) -> None:
+        self.breakpoints.discard(address & 0xFFFF)
+
+    def add_watchpoint(self, start: int, end: Optional[int] = None, read: bool = False, write: bool = True) -> Watchpoint:
+        """
+        Watches the addresses from start to end (inclusive), only start by default
+        The access that stopped a run is kept in watch_hit
+        """
+        watchpoint = Watchpoint(self, start, end, read, write)
+        watchpoint.attach()
+
+        self.watchpoints.append(watchpoint)
+
+        return watchpoint
+
+    def remove_watchpoint(self, watchpoint: Watchpoint) -> None:
+        watchpoint.detach()
+
+        self.watchpoints.remove(watchpoint)
+
+    def snapshot(self, compressed: bool = False) -> bytes:
+        """
+        Serializes the whole machine state, see cpu_snapshot for the layout
+        The memory map itself is configuration and is not part of it
+        """
+        return take_snapshot(self, compressed)
+
+    def restore(self, snapshot: bytes) -> None:
+        """
+        Restores a machine state produced by snapshot()
+        """
+        restore_snapshot(self, snapshot)
+
     def fetch(self) -> int:
-        if self.state.addr_abs != "IMP":
+        if self.state.opcode not in IMPLIED_OPCODES:
             self.state.fetched = self.bus.read(self.state.addr_abs)
 
         return self.state.fetched
 
     def reset(self) -> None:
         """
-        Work in progress
+        Puts the cpu in its power-on state and jumps through the reset vector
+        Memory and scheduled events are left alone, pending interrupts are dropped
         """
-        pass
+        state = self.state
+
+        state.register_A = 0x00
+        state.register_X = 0x00
+        state.register_Y = 0x00
+        state.register_SP = 0xFD
+        state.register_SR = 0x00
+
+        state.flag_U = bool(1)
+        state.flag_I = bool(1)
+
+        state.addr_rel = 0x0000
+        state.fetched = 0x00
+
+        state.addr_abs = RESET_VECTOR
+        state.register_PC = self.bus.read(RESET_VECTOR) | (self.bus.read(RESET_VECTOR + 1) << 8)
+
+        self.irq_pending = False
+        self.nmi_pending = False
+
+        state.cycles += INTERRUPT_CYCLES
@@ -11,7 +11,8 @@ class CpuAddressingModes(AbstractCpuAddressingModes):
         Increments program counter by 1
         """
         operand = self.cpu.bus.read(address)
-        self.cpu.state.register_PC += (1 if increment else 0)
+        if increment:
+            self.cpu.state.register_PC = (self.cpu.state.register_PC + 1) & 0xFFFF
 
         return operand
 
@@ -47,9 +48,7 @@ class CpuAddressingModes(AbstractCpuAddressingModes):
         Access memory at a specific address read + X register offset
         """
         low_byte, high_byte = self._read_word(self.cpu.state.register_PC)
-        self.cpu.state.addr_abs = (high_byte << 8) | low_byte
-
-        self.cpu.state.addr_abs += self.cpu.state.register_X
+        self.cpu.state.addr_abs = (((high_byte << 8) | low_byte) + self.cpu.state.register_X) & 0xFFFF
 
         has_crossed_boundary = self._check_page_boundary(self.cpu.state.addr_abs, high_byte)
 
@@ -64,9 +63,7 @@ class CpuAddressingModes(AbstractCpuAddressingModes):
         Access memory at a specific address read + Y register offset
         """
         low_byte, high_byte = self._read_word(self.cpu.state.register_PC)
-        self.cpu.state.addr_abs = (high_byte << 8) | low_byte
-
-        self.cpu.state.addr_abs += self.cpu.state.register_Y
+        self.cpu.state.addr_abs = (((high_byte << 8) | low_byte) + self.cpu.state.register_Y) & 0xFFFF
 
         has_crossed_boundary = self._check_page_boundary(self.cpu.state.addr_abs, high_byte)
 
@@ -81,7 +78,7 @@ class CpuAddressingModes(AbstractCpuAddressingModes):
         Specifies a value to be used in an operation
         """
         self.cpu.state.addr_abs = self.cpu.state.register_PC
-        self.cpu.state.register_PC += 1
+        self.cpu.state.register_PC = (self.cpu.state.register_PC + 1) & 0xFFFF
 
         return 0
 
@@ -139,9 +136,7 @@ class CpuAddressingModes(AbstractCpuAddressingModes):
 
         low_byte, high_byte = self._read_word(pointer, increment=False)
 
-        self.cpu.state.addr_abs = (high_byte << 8) | low_byte
-        self.cpu.state.addr_abs += self.cpu.state.register_Y
-        self.cpu.state.addr_abs &= 0xFFFF
+        self.cpu.state.addr_abs = (((high_byte << 8) | low_byte) + self.cpu.state.register_Y) & 0xFFFF
 
         has_crossed_boundary = self._check_page_boundary(self.cpu.state.addr_abs, high_byte)
 
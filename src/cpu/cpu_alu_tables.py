@@ -0,0 +1,105 @@
+from .cpu_cache import load_cached, source_key
+
+from pathlib import Path
+from typing import Dict, Tuple
+
+# Precomputed results and flags of the ALU operations, built on first use and
+# cached as a pickle in data/, rebuilt whenever this file changes
+# Identical entries are shared, so the large tables hold references to at most
+# a thousand tuples, about 1.5 MiB for all of them together
+# The tables are read as module attributes (NZ, ADC, COMPARE, ASL, LSR, ROL, ROR)
+# or all at once through load_tables()
+
+CACHE_PATH = Path(__file__).resolve().parents[2] / "data" / "alu_tables.pickle"
+
+# Bump when the cached layout changes
+CACHE_VERSION = 1
+
+TABLE_NAMES = ("NZ", "ADC", "COMPARE", "ASL", "LSR", "ROL", "ROR")
+
+_tables: Dict[str, tuple] = {}
+
+def _build_nz() -> Tuple[Tuple[bool, bool], ...]:
+    """
+    (flag_Z, flag_N) of every 8 bit value, for loads, transfers, logic, INC and DEC
+    """
+    return tuple((value == 0x00, bool(value & 0x80)) for value in range(0x100))
+
+def _build_adc() -> Tuple[Tuple[int, bool, bool, bool, bool], ...]:
+    """
+    (result, flag_C, flag_Z, flag_N, flag_V) indexed by carry << 16 | A << 8 | operand
+    SBC uses the same table with the operand inverted
+    """
+    # One entry per 9 bit sum and overflow, overflow is set when the sum
+    # has a different sign than both inputs
+    entries = [
+        (temp & 0xFF, temp > 0xFF, not temp & 0xFF, bool(temp & 0x80), bool(overflow))
+        for temp in range(0x200)
+        for overflow in range(2)
+    ]
+
+    return tuple(
+        entries[(temp := a + operand + carry) << 1 | ((a ^ temp) & (operand ^ temp)) >> 7 & 1]
+        for carry in range(2)
+        for a in range(0x100)
+        for operand in range(0x100)
+    )
+
+def _build_compare() -> Tuple[Tuple[bool, bool, bool], ...]:
+    """
+    (flag_C, flag_Z, flag_N) of CMP, CPX and CPY indexed by register << 8 | operand
+    """
+    # One entry per difference, offset by 0xFF to index from zero, equal ones shared
+    shared = {}
+    entries = [
+        shared.setdefault(entry, entry)
+        for entry in ((difference >= 0, difference == 0, bool(difference & 0x80)) for difference in range(-0xFF, 0x100))
+    ]
+
+    return tuple(
+        entries[register - operand + 0xFF]
+        for register in range(0x100)
+        for operand in range(0x100)
+    )
+
+def _build_shift(shift) -> Tuple[Tuple[int, bool, bool, bool], ...]:
+    """
+    (result, flag_C, flag_Z, flag_N) indexed by carry << 8 | value
+    shift maps (value, carry) to the 9 bit intermediate result and the carry out
+    """
+    table = []
+
+    for carry in range(2):
+        for value in range(0x100):
+            temp, carry_out = shift(value, carry)
+            result = temp & 0xFF
+
+            table.append((result, carry_out, result == 0x00, bool(temp & 0x80)))
+
+    return tuple(table)
+
+def _build() -> Dict[str, tuple]:
+    return {
+        "NZ": _build_nz(),
+        "ADC": _build_adc(),
+        "COMPARE": _build_compare(),
+        "ASL": _build_shift(lambda value, carry: (value << 1, bool((value << 1) & 0xFF00))),
+        "LSR": _build_shift(lambda value, carry: (value >> 1, bool(value & 0x01))),
+        "ROL": _build_shift(lambda value, carry: ((value << 1) | carry, bool(((value << 1) | carry) & 0xFF00))),
+        "ROR": _build_shift(lambda value, carry: ((value >> 1) | (carry << 7), bool(value & 0x01))),
+    }
+
+def load_tables() -> Dict[str, tuple]:
+    """
+    Returns every table by name, loading them from the cache or building them once per process
+    """
+    if not _tables:
+        _tables.update(load_cached(CACHE_PATH, CACHE_VERSION, source_key(Path(__file__)), _build))
+
+    return _tables
+
+def __getattr__(name: str) -> tuple:
+    if name in TABLE_NAMES:
+        return load_tables()[name]
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
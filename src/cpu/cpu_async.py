@@ -0,0 +1,247 @@
+"""
+Cooperative execution on an asyncio event loop
+
+run_async runs one cpu in cycle quanta and yields to the loop between them.
+Devices written as coroutines wait for emulator events with wait_for_write,
+wait_for_read and wait_for_cycle, the cpu stops right after the instruction
+that triggered the event so the device reacts before the next one executes.
+On the jit backend a read stops the cpu at the end of the compiled block instead.
+FairScheduler shares one loop between many cpus, balancing the host time each gets.
+"""
+from .interfaces.abstract_cpu import AbstractCpu
+
+from .cpu import ExitReason
+from .cpu_watchpoint import WatchHit
+
+from time import perf_counter_ns
+from typing import Dict, List, Optional, Tuple
+
+import asyncio
+import heapq
+
+# Exit reasons that end a run, the others only end a quantum
+FINAL_EXIT_REASONS = (ExitReason.BRK, ExitReason.BREAKPOINT, ExitReason.WATCHPOINT)
+
+
+async def run_async(cpu: AbstractCpu, quantum: int = 10_000, max_cycles: Optional[int] = None) -> int:
+    """
+    Runs a cpu like Cpu.run, yielding to the event loop after every quantum of cycles
+    and whenever a device event stops it, cancel the task to stop it from outside
+    Returns the cycles consumed
+    """
+    state = cpu.state
+    start = state.cycles
+
+    while True:
+        budget = quantum if max_cycles is None else min(quantum, start + max_cycles - state.cycles)
+
+        cpu.run(max_cycles=budget)
+
+        if cpu.exit_reason in FINAL_EXIT_REASONS:
+            break
+
+        if max_cycles is not None and state.cycles - start >= max_cycles:
+            cpu.exit_reason = ExitReason.MAX_CYCLES
+            break
+
+        await asyncio.sleep(0)
+
+    return state.cycles - start
+
+
+async def _wait_for_access(cpu: AbstractCpu, access: str, start: int, end: Optional[int]) -> WatchHit:
+    end = start if end is None else end
+    future = asyncio.get_running_loop().create_future()
+
+    def observer(address: int, value: int) -> None:
+        if start <= address <= end and not future.done():
+            future.set_result(WatchHit(access, address, value))
+            cpu.stop()
+
+    if access == "write":
+        cpu.bus.add_write_observer(start, end, observer)
+    else:
+        cpu.bus.add_read_observer(start, end, observer)
+
+    try:
+        return await future
+    finally:
+        if access == "write":
+            cpu.bus.remove_write_observer(start, end, observer)
+        else:
+            cpu.bus.remove_read_observer(start, end, observer)
+
+
+async def wait_for_write(cpu: AbstractCpu, start: int, end: Optional[int] = None) -> WatchHit:
+    """
+    Waits for the next write to the addresses from start to end (inclusive)
+    The device resumes once the writing instruction has completed
+    """
+    return await _wait_for_access(cpu, "write", start, end)
+
+
+async def wait_for_read(cpu: AbstractCpu, start: int, end: Optional[int] = None) -> WatchHit:
+    """
+    Waits for the next read of the addresses from start to end (inclusive)
+    """
+    return await _wait_for_access(cpu, "read", start, end)
+
+
+async def wait_for_cycle(cpu: AbstractCpu, cycle: int) -> int:
+    """
+    Waits until the cpu has executed up to cycle, returns the cycle count reached
+    """
+    future = asyncio.get_running_loop().create_future()
+
+    def due(_: int) -> None:
+        if not future.done():
+            future.set_result(cpu.state.cycles)
+            cpu.stop()
+
+    event = cpu.scheduler.schedule(cycle, due)
+
+    try:
+        return await future
+    finally:
+        cpu.scheduler.cancel(event)
+
+
+class _Machine:
+    __slots__ = ("cpu", "weight", "cycle_limit", "future", "start", "runtime_ns", "virtual_ns", "cycles_per_ns")
+
+    def __init__(self, cpu: AbstractCpu, weight: float, max_cycles: Optional[int], future: asyncio.Future, virtual_ns: float):
+        self.cpu = cpu
+        self.weight = weight
+        self.start = cpu.state.cycles
+        self.cycle_limit = self.start + max_cycles if max_cycles is not None else None
+        self.future = future
+
+        self.runtime_ns = 0           # Host time spent running this cpu
+        self.virtual_ns = virtual_ns  # Host time divided by weight, the least served runs next
+        self.cycles_per_ns = 0.0      # Measured speed, sizes the quanta
+
+
+class FairScheduler:
+    """
+    Runs many cpus on one event loop, giving each a share of host time in proportion to its weight
+
+    Machines take turns by least weighted host time used so far, like a fair share scheduler.
+    Each turn runs a quantum of cycles sized from the speed measured on earlier turns so that it
+    takes about slice_ns, then yields to the loop, which bounds the latency of other coroutines
+    whether a machine is slow (traced, checked) or fast (jit).
+    Machines join with the least weighted time of those already running so they cannot starve them.
+    """
+    def __init__(self, slice_ns: int = 1_000_000, initial_quantum: int = 1_000):
+        self.slice_ns = slice_ns
+        self.initial_quantum = initial_quantum
+
+        self._queue: List[Tuple[float, int, _Machine]] = []
+        self._sequence = 0
+
+        # Machines not done yet, the one taking its turn included
+        self._machines: Dict[AbstractCpu, _Machine] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def add(self, cpu: AbstractCpu, max_cycles: Optional[int] = None, weight: float = 1.0) -> "asyncio.Future[int]":
+        """
+        Queues a cpu, to be called from the event loop
+        The returned future gets the cycles consumed once the cpu stops with a BRK,
+        a breakpoint or a watchpoint, or once it used up max_cycles
+        """
+        if weight <= 0:
+            raise ValueError(f"Weight has to be positive, got {weight}")
+
+        future = asyncio.get_running_loop().create_future()
+        virtual_ns = self._queue[0][0] if self._queue else 0.0
+
+        machine = _Machine(cpu, weight, max_cycles, future, virtual_ns)
+
+        self._machines[cpu] = machine
+        self._push(machine)
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+        return future
+
+    def usage(self) -> Dict[AbstractCpu, int]:
+        """
+        Host time used so far by each cpu not done yet, in nanoseconds
+        """
+        return {cpu: machine.runtime_ns for cpu, machine in self._machines.items()}
+
+    async def run(self, forever: bool = False) -> None:
+        """
+        Runs queued cpus until none is left, or until cancelled when forever is set
+        """
+        self._wakeup = asyncio.Event()
+
+        while True:
+            if not self._queue:
+                if not forever:
+                    break
+
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            _, _, machine = heapq.heappop(self._queue)
+
+            if machine.future.done():
+                self._machines.pop(machine.cpu, None)
+                continue
+
+            try:
+                finished = self._turn(machine)
+            except Exception as error:
+                machine.future.set_exception(error)
+                finished = True
+
+            if finished:
+                del self._machines[machine.cpu]
+            else:
+                self._push(machine)
+
+            await asyncio.sleep(0)
+
+    def _turn(self, machine: _Machine) -> bool:
+        """
+        Runs one quantum of a machine, returns whether it is done
+        """
+        cpu = machine.cpu
+        state = cpu.state
+
+        if machine.cycles_per_ns:
+            quantum = max(1, int(machine.cycles_per_ns * self.slice_ns))
+        else:
+            quantum = self.initial_quantum
+
+        if machine.cycle_limit is not None:
+            quantum = min(quantum, machine.cycle_limit - state.cycles)
+
+        before = state.cycles
+        started = perf_counter_ns()
+
+        cpu.run(max_cycles=quantum)
+
+        elapsed = max(1, perf_counter_ns() - started)
+
+        machine.runtime_ns += elapsed
+        machine.virtual_ns += elapsed / machine.weight
+
+        # Only quanta that ran their full budget say how fast the machine is
+        if cpu.exit_reason == ExitReason.MAX_CYCLES:
+            machine.cycles_per_ns = (state.cycles - before) / elapsed
+
+        if cpu.exit_reason in FINAL_EXIT_REASONS or (machine.cycle_limit is not None and state.cycles >= machine.cycle_limit):
+            machine.future.set_result(state.cycles - machine.start)
+            return True
+
+        return False
+
+    def _push(self, machine: _Machine) -> None:
+        self._sequence += 1
+        heapq.heappush(self._queue, (machine.virtual_ns, self._sequence, machine))
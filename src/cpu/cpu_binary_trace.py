@@ -0,0 +1,305 @@
+"""
+Compact binary execution traces
+
+A trace file is a header followed by one fixed size record per executed instruction,
+optionally inside a gzip or zstd stream (zstd needs the zstandard package):
+    header  magic "6502TRC", layout version, record size
+    record  PC, opcode, A, X, Y, SP, SR, cycles after the instruction, little-endian
+
+    python -m src.cpu.cpu_binary_trace dump run.trace [--limit 20]
+    python -m src.cpu.cpu_binary_trace diff expected.trace actual.trace
+"""
+from .interfaces.abstract_trace_sink import AbstractTraceSink
+
+from .cpu_trace import TraceLevel
+
+from argparse import ArgumentParser
+from contextlib import closing
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+
+import gzip
+import struct
+import sys
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+TRACE_MAGIC = b"6502TRC"
+TRACE_VERSION = 1
+
+HEADER = struct.Struct("<7sBB")
+RECORD = struct.Struct("<HBBBBBBQ")
+
+COMPRESSIONS = (None, "gzip", "zstd")
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# NumPy dtype matching RECORD
+DTYPE_FIELDS = [
+    ("pc", "<u2"), ("opcode", "u1"), ("a", "u1"), ("x", "u1"), ("y", "u1"),
+    ("sp", "u1"), ("sr", "u1"), ("cycles", "<u8"),
+]
+
+
+class TraceRecord(NamedTuple):
+    pc: int
+    opcode: int
+    a: int
+    x: int
+    y: int
+    sp: int
+    sr: int
+    cycles: int
+
+
+def _require_zstandard() -> None:
+    if zstandard is None:
+        raise RuntimeError("zstd traces need the zstandard package")
+
+
+def _open_write(path: str, compression: Optional[str]) -> BinaryIO:
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"{compression} is not a compression, expected one of {list(COMPRESSIONS)}")
+
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+
+    if compression == "zstd":
+        _require_zstandard()
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, "wb"), closefd=True)
+
+    return open(path, "wb")
+
+
+def _open_read(path: str) -> BinaryIO:
+    """
+    Opens a trace for reading, detecting the compression from the first bytes
+    """
+    with open(path, "rb") as raw:
+        magic = raw.read(4)
+
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(path, "rb")
+
+    if magic == ZSTD_MAGIC:
+        _require_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+
+    return open(path, "rb")
+
+
+def _read_header(stream: BinaryIO) -> None:
+    header = stream.read(HEADER.size)
+
+    if len(header) != HEADER.size:
+        raise ValueError("Not a trace: the header is truncated")
+
+    magic, version, record_size = HEADER.unpack(header)
+
+    if magic != TRACE_MAGIC:
+        raise ValueError("Not a trace: bad magic")
+
+    if version != TRACE_VERSION or record_size != RECORD.size:
+        raise ValueError(f"Unsupported trace layout version {version} with {record_size} byte records")
+
+
+class BinaryTraceSink(AbstractTraceSink):
+    """
+    Packs a record per instruction into a preallocated buffer and writes it out in bulk
+    Records are always complete, any level other than OFF traces everything
+    """
+    def __init__(self, path: str, compression: Optional[str] = None, buffer_records: int = 65536, level: TraceLevel = TraceLevel.FULL):
+        self.level = TraceLevel(level)
+
+        self._file = _open_write(path, compression)
+        self._file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, RECORD.size))
+
+        self._buffer = bytearray(RECORD.size * buffer_records)
+        self._offset = 0
+        self._pack_into = RECORD.pack_into
+
+    def record(self, cpu, pc: int) -> None:
+        state = cpu.state
+
+        self._pack_into(
+            self._buffer, self._offset,
+            pc, state.opcode, state.register_A, state.register_X, state.register_Y,
+            state.register_SP, state.register_SR, state.cycles,
+        )
+
+        self._offset += RECORD.size
+
+        if self._offset == len(self._buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._offset:
+            self._file.write(memoryview(self._buffer)[:self._offset])
+            self._offset = 0
+
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def read_chunks(path: str, records_per_chunk: int = 65536) -> Iterator[bytes]:
+    """
+    Yields the raw records of a trace in chunks of whole records
+    """
+    with _open_read(path) as stream:
+        _read_header(stream)
+
+        size = RECORD.size * records_per_chunk
+        pending = b""
+
+        while True:
+            data = stream.read(size - len(pending))
+
+            if not data:
+                break
+
+            pending += data
+
+            if len(pending) == size:
+                yield pending
+                pending = b""
+
+        if len(pending) % RECORD.size:
+            raise ValueError("Trace ends with a truncated record")
+
+        if pending:
+            yield pending
+
+
+def read_trace(path: str) -> Iterator[TraceRecord]:
+    """
+    Yields the records of a trace one by one, in constant memory
+    """
+    for chunk in read_chunks(path):
+        for fields in RECORD.iter_unpack(chunk):
+            yield TraceRecord(*fields)
+
+
+def read_trace_array(path: str):
+    """
+    Returns the whole trace as a NumPy structured array with the fields of TraceRecord
+    """
+    if numpy is None:
+        raise RuntimeError("read_trace_array needs numpy")
+
+    dtype = numpy.dtype(DTYPE_FIELDS)
+    chunks = [numpy.frombuffer(chunk, dtype=dtype) for chunk in read_chunks(path)]
+
+    return numpy.concatenate(chunks) if chunks else numpy.empty(0, dtype=dtype)
+
+
+def first_difference(path_a: str, path_b: str) -> Optional[Tuple[int, Optional[TraceRecord], Optional[TraceRecord]]]:
+    """
+    Streams two traces side by side and returns the index of the first differing record
+    with both records, None in place of the record of a trace that ended first
+    Returns None for identical traces
+    """
+    # Closing the generators closes both files, even when returning halfway through
+    with closing(read_chunks(path_a)) as chunks_a, closing(read_chunks(path_b)) as chunks_b:
+        index = 0
+        rest_a = b""
+        rest_b = b""
+
+        while True:
+            if not rest_a:
+                rest_a = next(chunks_a, b"")
+
+            if not rest_b:
+                rest_b = next(chunks_b, b"")
+
+            if not rest_a and not rest_b:
+                return None
+
+            if not rest_a or not rest_b:
+                return (
+                    index,
+                    TraceRecord(*RECORD.unpack_from(rest_a)) if rest_a else None,
+                    TraceRecord(*RECORD.unpack_from(rest_b)) if rest_b else None,
+                )
+
+            # Compare the overlapping part in one go, chunks of both sides need not line up
+            length = min(len(rest_a), len(rest_b))
+
+            if rest_a[:length] != rest_b[:length]:
+                offset = 0
+
+                while rest_a[offset:offset + RECORD.size] == rest_b[offset:offset + RECORD.size]:
+                    offset += RECORD.size
+
+                return (
+                    index + offset // RECORD.size,
+                    TraceRecord(*RECORD.unpack_from(rest_a, offset)),
+                    TraceRecord(*RECORD.unpack_from(rest_b, offset)),
+                )
+
+            index += length // RECORD.size
+            rest_a = rest_a[length:]
+            rest_b = rest_b[length:]
+
+
+def _format(record: Optional[TraceRecord]) -> str:
+    if record is None:
+        return "<end of trace>"
+
+    return (
+        f"{record.pc:04X}  {record.opcode:02X}  A:{record.a:02X} X:{record.x:02X} Y:{record.y:02X} "
+        f"SP:{record.sp:02X} SR:{record.sr:08b} cycles:{record.cycles}"
+    )
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = ArgumentParser(description="Binary trace tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    dump = commands.add_parser("dump", help="print records as text")
+    dump.add_argument("path")
+    dump.add_argument("--limit", type=int, help="stop after this many records")
+
+    diff = commands.add_parser("diff", help="find the first differing record")
+    diff.add_argument("expected")
+    diff.add_argument("actual")
+
+    args = parser.parse_args(arguments)
+
+    if args.command == "dump":
+        for index, record in enumerate(read_trace(args.path)):
+            if args.limit is not None and index >= args.limit:
+                break
+
+            print(f"{index:10}  {_format(record)}")
+
+        return 0
+
+    difference = first_difference(args.expected, args.actual)
+
+    if difference is None:
+        print("traces are identical")
+        return 0
+
+    index, expected, actual = difference
+
+    print(f"first difference at record {index}")
+    print(f"  expected {_format(expected)}")
+    print(f"  actual   {_format(actual)}")
+
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
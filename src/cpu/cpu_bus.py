@@ -0,0 +1,220 @@
+from .interfaces.abstract_cpu_bus import AbstractCpuBus
+from .interfaces.abstract_cpu import AbstractCpu
+from .interfaces.abstract_bus_device import AbstractBusDevice
+
+from typing import Callable, List, Tuple
+
+PAGE_SIZE = 0x100
+PAGE_COUNT = 0x100
+
+class CpuBus(AbstractCpuBus):
+    def __init__(self, cpu: AbstractCpu):
+        self.cpu = cpu
+        self._ram = bytearray(PAGE_SIZE * PAGE_COUNT)
+
+        # Zero-copy view over the whole address space
+        self.ram = memoryview(self._ram)
+
+        # Handlers of plain RAM pages index the backing store directly
+        self._read_ram = self._ram.__getitem__
+        self._write_ram = self._ram.__setitem__
+
+        # Handlers registered through the map_* methods
+        self._mapped_readers: List[Callable[[int], int]] = [self._read_ram] * PAGE_COUNT
+        self._mapped_writers: List[Callable[[int, int], None]] = [self._write_ram] * PAGE_COUNT
+
+        # Callbacks told about every write to a page before it happens
+        self._write_observers: List[Tuple[Callable[[int, int], None], ...]] = [()] * PAGE_COUNT
+
+        # Callbacks told about every read of a page, with the value read
+        self._read_observers: List[Tuple[Callable[[int, int], None], ...]] = [()] * PAGE_COUNT
+
+        # Page table, one read and one write handler per 256 byte page
+        self._readers: List[Callable[[int], int]] = list(self._mapped_readers)
+        self._writers: List[Callable[[int, int], None]] = list(self._mapped_writers)
+
+        self._update_fast_path()
+
+    def read(self, address: int, read_only: bool = False) -> int:
+        return self._readers[address >> 8](address)
+
+    def write(self, address: int, data: int) -> None:
+        self._writers[address >> 8](address, data)
+
+    def map_ram(self, start: int, end: int) -> None:
+        """
+        Maps the pages from start to end (inclusive) as plain RAM
+        """
+        self._map(start, end, self._read_ram, self._write_ram)
+
+    def map_rom(self, start: int, data: bytes) -> None:
+        """
+        Copies data into the backing store at start and makes its pages read-only
+        """
+        self.write_block(start, data)
+        self._map(start, start + len(data) - 1, self._read_ram, self._ignore_write)
+
+    def map_device(self, start: int, end: int, device: AbstractBusDevice) -> None:
+        """
+        Routes every access to the pages from start to end (inclusive) to a device
+        """
+        self._map(start, end, device.read, device.write)
+
+    def is_memory(self, address: int) -> bool:
+        """
+        Whether reads of address come straight from the backing store, as for RAM and ROM
+        """
+        return self._mapped_readers[address >> 8] is self._read_ram
+
+    def add_write_observer(self, start: int, end: int, observer: Callable[[int, int], None]) -> None:
+        """
+        Calls observer(address, value) before every write to the pages covering start to end
+        Observers see every write to those pages and filter addresses themselves
+        """
+        for page in range(start >> 8, (end >> 8) + 1):
+            self._write_observers[page] += (observer,)
+            self._update_page(page)
+
+        self._update_fast_path()
+
+    def remove_write_observer(self, start: int, end: int, observer: Callable[[int, int], None]) -> None:
+        for page in range(start >> 8, (end >> 8) + 1):
+            self._write_observers[page] = tuple(
+                registered for registered in self._write_observers[page] if registered != observer
+            )
+            self._update_page(page)
+
+        self._update_fast_path()
+
+    def add_read_observer(self, start: int, end: int, observer: Callable[[int, int], None]) -> None:
+        """
+        Calls observer(address, value) after every read of the pages covering start to end
+        Block reads return views of the backing store and are not observed
+        """
+        for page in range(start >> 8, (end >> 8) + 1):
+            self._read_observers[page] += (observer,)
+            self._update_page(page)
+
+        self._update_fast_path()
+
+    def remove_read_observer(self, start: int, end: int, observer: Callable[[int, int], None]) -> None:
+        for page in range(start >> 8, (end >> 8) + 1):
+            self._read_observers[page] = tuple(
+                registered for registered in self._read_observers[page] if registered != observer
+            )
+            self._update_page(page)
+
+        self._update_fast_path()
+
+    def load(self, program: bytes, address: int = 0x0000) -> None:
+        """
+        Copies a whole program into memory starting at a base address
+        """
+        self.write_block(address, program)
+
+    def read_block(self, address: int, length: int) -> memoryview:
+        """
+        Returns a zero-copy view of length bytes starting at address
+        Block access goes to the backing store and bypasses mapped devices
+        """
+        self._check_block(address, length)
+
+        return self.ram[address:address + length]
+
+    def write_block(self, address: int, data: bytes) -> None:
+        """
+        Copies a block of bytes into memory with a single slice assignment
+        Block access goes to the backing store and bypasses mapped devices
+        """
+        self._check_block(address, len(data))
+
+        if len(data):
+            self._notify_block(address, data)
+
+        self.ram[address:address + len(data)] = data
+
+    def _map(self, start: int, end: int, reader: Callable[[int], int], writer: Callable[[int, int], None]) -> None:
+        if start & 0xFF or (end & 0xFF) != 0xFF:
+            raise ValueError(f'Range {start:#06x}-{end:#06x} is not aligned to {PAGE_SIZE} byte pages')
+
+        self._check_block(start, end - start + 1)
+
+        for page in range(start >> 8, (end >> 8) + 1):
+            self._mapped_readers[page] = reader
+            self._mapped_writers[page] = writer
+            self._update_page(page)
+
+        self._update_fast_path()
+
+    def _update_page(self, page: int) -> None:
+        """
+        Rebuilds the page table entries of a page from its mapping and observers
+        """
+        self._readers[page] = self._mapped_readers[page]
+        self._writers[page] = self._mapped_writers[page]
+
+        observers = self._write_observers[page]
+
+        if observers:
+            writer = self._mapped_writers[page]
+
+            def observed_write(address: int, data: int) -> None:
+                for observer in observers:
+                    observer(address, data)
+
+                writer(address, data)
+
+            self._writers[page] = observed_write
+
+        read_observers = self._read_observers[page]
+
+        if read_observers:
+            reader = self._mapped_readers[page]
+
+            def observed_read(address: int) -> int:
+                value = reader(address)
+
+                for observer in read_observers:
+                    observer(address, value)
+
+                return value
+
+            self._readers[page] = observed_read
+
+    def _notify_block(self, address: int, data: bytes) -> None:
+        """
+        Tells write observers about the bytes of a block write that land on their pages
+        """
+        for page in range(address >> 8, ((address + len(data) - 1) >> 8) + 1):
+            observers = self._write_observers[page]
+
+            if not observers:
+                continue
+
+            first = max(address, page << 8)
+            last = min(address + len(data), (page + 1) << 8)
+
+            for target in range(first, last):
+                for observer in observers:
+                    observer(target, data[target - address])
+
+    def _update_fast_path(self) -> None:
+        """
+        While every page is plain RAM, read and write go straight to the backing store
+        """
+        if all(reader is self._read_ram for reader in self._readers):
+            self.read = self._read_ram
+        else:
+            self.__dict__.pop("read", None)
+
+        if all(writer is self._write_ram for writer in self._writers):
+            self.write = self._write_ram
+        else:
+            self.__dict__.pop("write", None)
+
+    def _ignore_write(self, address: int, data: int) -> None:
+        pass
+
+    def _check_block(self, address: int, length: int) -> None:
+        if address < 0 or length < 0 or address + length > len(self._ram):
+            raise IndexError(f'Block out of range: {address:#06x} + {length} > {len(self._ram):#06x}')
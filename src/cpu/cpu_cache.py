@@ -0,0 +1,41 @@
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Callable, Tuple
+
+def source_key(path: Path) -> Tuple[int, int]:
+    """
+    Modification time and size of a file, a cache built from it is stale once they change
+    """
+    stat = os.stat(path)
+
+    return stat.st_mtime_ns, stat.st_size
+
+def load_cached(cache_path: Path, version: int, key: tuple, build: Callable[[], Any]) -> Any:
+    """
+    Returns the value pickled at cache_path when its version and key match,
+    otherwise builds it and writes the cache for the next process
+    A read-only checkout still works, it just builds the value every time
+    """
+    try:
+        with open(cache_path, "rb") as f:
+            cached_version, cached_key, value = pickle.load(f)
+
+        if cached_version == version and tuple(cached_key) == tuple(key):
+            return value
+    except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+        pass
+
+    value = build()
+
+    try:
+        temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+
+        with open(temp_path, "wb") as f:
+            pickle.dump((version, key, value), f, pickle.HIGHEST_PROTOCOL)
+
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+
+    return value
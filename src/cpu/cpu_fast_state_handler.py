@@ -0,0 +1,65 @@
+from .interfaces.abstract_cpu_state_handler import AbstractCpuStateHandler
+
+class CpuFastStateHandler(AbstractCpuStateHandler):
+    """
+    Register file kept in plain slotted attributes
+    Nothing is validated: the instruction handlers mask every value that can wrap,
+    use CpuStateHandler to have out of range values reported instead
+    """
+    __slots__ = (
+        # Helpers
+        "addr_abs", "addr_rel", "fetched", "cycles", "opcode",
+        "current_addressing_mode", "current_instruction",
+        # Flags
+        "flag_C", "flag_Z", "flag_I", "flag_D", "flag_B", "flag_U", "flag_V", "flag_N",
+        # Registers, the status register is assembled from the flags
+        "register_A", "register_X", "register_Y", "register_PC", "register_SP",
+    )
+
+    def __init__(self):
+        self.addr_abs = 0x0000              # Absolute address
+        self.addr_rel = 0x0000              # Relative address
+        self.fetched = 0x0000               # Fetched data
+        self.cycles = 0                     # Cycles
+        self.opcode = 0x00                  # Opcode
+        self.current_addressing_mode = None # Current addressing mode
+        self.current_instruction = None     # Current instruction
+
+        self.flag_C = False # Carry
+        self.flag_Z = False # Zero
+        self.flag_I = False # Interrupt
+        self.flag_D = False # Decimal
+        self.flag_B = False # Break
+        self.flag_U = False # Unused
+        self.flag_V = False # Overflow
+        self.flag_N = False # Negative
+
+        self.register_A = 0x00    # 8-bit Accumulator
+        self.register_X = 0x00    # 8-bit X register
+        self.register_Y = 0x00    # 8-bit Y register
+        self.register_SP = 0x00   # 8-bit Stack pointer
+        self.register_PC = 0x0000 # 16-bit Program counter
+
+    @property
+    def register_SR(self) -> int:
+        return (
+            self.flag_C
+            | self.flag_Z << 1
+            | self.flag_I << 2
+            | self.flag_D << 3
+            | self.flag_B << 4
+            | self.flag_U << 5
+            | self.flag_V << 6
+            | self.flag_N << 7
+        )
+
+    @register_SR.setter
+    def register_SR(self, value: int):
+        self.flag_C = bool(value & (1 << 0))
+        self.flag_Z = bool(value & (1 << 1))
+        self.flag_I = bool(value & (1 << 2))
+        self.flag_D = bool(value & (1 << 3))
+        self.flag_B = bool(value & (1 << 4))
+        self.flag_U = bool(value & (1 << 5))
+        self.flag_V = bool(value & (1 << 6))
+        self.flag_N = bool(value & (1 << 7))
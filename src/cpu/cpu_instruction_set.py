@@ -0,0 +1,62 @@
+from .cpu_cache import load_cached, source_key
+
+import json
+from pathlib import Path
+from typing import Dict, NamedTuple, Tuple
+
+# The instruction set is read from the JSON table once per process
+# The parsed table is cached as a pickle next to it and rebuilt whenever the JSON changes
+JSON_PATH = Path(__file__).resolve().parents[2] / "data" / "instruction_set.json"
+CACHE_PATH = JSON_PATH.with_suffix(".pickle")
+
+# Bump when the cached layout changes
+CACHE_VERSION = 1
+
+class Opcode(NamedTuple):
+    opcode: int          # Byte value, index in OPCODES
+    instruction: str     # Mnemonic, "???" for undocumented opcodes
+    operation: str       # Name of the CpuInstructions handler
+    addressing_mode: str # Name of the CpuAddressingModes handler
+    cycles: int          # Base cycles, without page crossing or branch penalties
+
+def _parse() -> Tuple[tuple, ...]:
+    with open(JSON_PATH, "r") as f:
+        entries = json.load(f)
+
+    if len(entries) != 0x100:
+        raise ValueError(f"{JSON_PATH} has {len(entries)} opcodes, expected 256")
+
+    return tuple(
+        (opcode, entry["instruction"], entry["operation"], entry["addressing_mode"], entry["cycles"])
+        for opcode, entry in enumerate(entries)
+    )
+
+def _load() -> Tuple[tuple, ...]:
+    """
+    Returns the table as plain tuples, from the cache when it matches the JSON
+    """
+    return load_cached(CACHE_PATH, CACHE_VERSION, source_key(JSON_PATH), _parse)
+
+# Per-opcode metadata indexed by byte value
+OPCODES: Tuple[Opcode, ...] = tuple(Opcode(*entry) for entry in _load())
+
+# Opcodes of every mnemonic, in ascending order
+MNEMONICS: Dict[str, Tuple[int, ...]] = {}
+
+for _entry in OPCODES:
+    MNEMONICS[_entry.instruction] = MNEMONICS.get(_entry.instruction, ()) + (_entry.opcode,)
+
+del _entry
+
+# Opcodes whose operand is the accumulator, fetch() must not read memory for them
+IMPLIED_OPCODES = frozenset(entry.opcode for entry in OPCODES if entry.addressing_mode == "IMP")
+
+def find_opcode(instruction: str, addressing_mode: str) -> int:
+    """
+    Returns the opcode of a mnemonic in an addressing mode
+    """
+    for opcode in MNEMONICS.get(instruction, ()):
+        if OPCODES[opcode].addressing_mode == addressing_mode:
+            return opcode
+
+    raise KeyError(f"{instruction} has no {addressing_mode} addressing mode")
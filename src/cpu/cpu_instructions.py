@@ -1,41 +1,54 @@
 from .interfaces.abstract_cpu_instructions import AbstractCpuInstructions
 from .interfaces.abstract_cpu import AbstractCpu
 
+from .cpu_alu_tables import load_tables
+
+# ALU tables, bound by the first CpuInstructions so importing the package stays cheap
+ADC_TABLE = ASL_TABLE = COMPARE_TABLE = LSR_TABLE = NZ_TABLE = ROL_TABLE = ROR_TABLE = None
+
+def _bind_tables() -> None:
+    global ADC_TABLE, ASL_TABLE, COMPARE_TABLE, LSR_TABLE, NZ_TABLE, ROL_TABLE, ROR_TABLE
+
+    tables = load_tables()
+
+    ADC_TABLE, ASL_TABLE, COMPARE_TABLE, LSR_TABLE = tables["ADC"], tables["ASL"], tables["COMPARE"], tables["LSR"]
+    NZ_TABLE, ROL_TABLE, ROR_TABLE = tables["NZ"], tables["ROL"], tables["ROR"]
+
 class CpuInstructions(AbstractCpuInstructions):
     def __init__(self, cpu: AbstractCpu):
         self.cpu: AbstractCpu = cpu
+
+        if ADC_TABLE is None:
+            _bind_tables()
     
     def ADC(self) -> int:
         self.cpu.fetch()
-        temp = self.cpu.state.register_A + self.cpu.state.fetched + self.cpu.state.flag_C
-        self.cpu.state.flag_C = bool(temp > 255)
-        self.cpu.state.flag_Z = bool((temp & 0x00FF) == 0)
-        self.cpu.state.flag_N = bool(temp & 0x80)
-        self.cpu.state.flag_V = bool((~(self.cpu.state.register_A ^ self.cpu.state.fetched) & (self.cpu.state.register_A ^ temp)) & 0x0080)
+        state = self.cpu.state
 
-        self.cpu.state.register_A = temp & 0x00FF
+        index = state.flag_C << 16 | state.register_A << 8 | state.fetched
+        state.register_A, state.flag_C, state.flag_Z, state.flag_N, state.flag_V = ADC_TABLE[index]
 
         return 1
 
     def AND(self) -> int:
         self.cpu.fetch()
-        self.cpu.state.register_A &= self.cpu.state.fetched
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_A == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_A & 0x80)
+        state = self.cpu.state
+
+        state.register_A &= state.fetched
+        state.flag_Z, state.flag_N = NZ_TABLE[state.register_A]
 
         return 1
 
     def ASL(self) -> int:
         self.cpu.fetch()
-        temp = self.cpu.state.fetched << 1
-        self.cpu.state.flag_C = bool((temp & 0xFF00) > 0)
-        self.cpu.state.flag_Z = bool((temp & 0x00FF) == 0)
-        self.cpu.state.flag_N = bool(temp & 0x80)
+        state = self.cpu.state
+
+        result, state.flag_C, state.flag_Z, state.flag_N = ASL_TABLE[state.fetched]
 
-        if self.cpu.state.current_addressing_mode == "IMP":
-            self.cpu.state.register_A = temp & 0x00FF
+        if state.opcode == 0x0A: # Accumulator
+            state.register_A = result
         else:
-            self.cpu.bus.write(self.cpu.state.addr_abs, temp & 0x00FF)
+            self.cpu.bus.write(state.addr_abs, result)
 
         return 0
 
@@ -121,19 +134,19 @@ class CpuInstructions(AbstractCpuInstructions):
         return 0
 
     def BRK(self) -> int:
-        self.cpu.state.register_PC += 1
+        self.cpu.state.register_PC = (self.cpu.state.register_PC + 1) & 0xFFFF
 
         self.cpu.state.flag_I = bool(1)
 
         self.cpu.bus.write(0x0100 + self.cpu.state.register_SP, (self.cpu.state.register_PC >> 8) & 0x00FF)
-        self.cpu.state.register_SP -= 1
+        self.cpu.state.register_SP = (self.cpu.state.register_SP - 1) & 0xFF
         self.cpu.bus.write(0x0100 + self.cpu.state.register_SP, self.cpu.state.register_PC & 0x00FF)
-        self.cpu.state.register_SP -= 1
+        self.cpu.state.register_SP = (self.cpu.state.register_SP - 1) & 0xFF
 
         self.cpu.state.flag_B = bool(1)
         
         self.cpu.bus.write(0x0100 + self.cpu.state.register_SP, self.cpu.state.register_SR)
-        self.cpu.state.register_SP -= 1
+        self.cpu.state.register_SP = (self.cpu.state.register_SP - 1) & 0xFF
         self.cpu.state.flag_B = bool(0)
 
         self.cpu.state.register_PC = self.cpu.bus.read(0xFFFE) | (self.cpu.bus.read(0xFFFF) << 8)
@@ -182,73 +195,87 @@ class CpuInstructions(AbstractCpuInstructions):
 
     def CMP(self) -> int:
         self.cpu.fetch()
-        temp = self.cpu.state.register_A - self.cpu.state.fetched
-        self.cpu.state.flag_C = bool(self.cpu.state.register_A >= self.cpu.state.fetched)
-        self.cpu.state.flag_Z = bool((temp & 0x00FF) == 0x0000)
-        self.cpu.state.flag_N = bool(temp & 0x0080)
+        state = self.cpu.state
+
+        state.flag_C, state.flag_Z, state.flag_N = COMPARE_TABLE[state.register_A << 8 | state.fetched]
+
         return 1
 
     def CPX(self) -> int:
         self.cpu.fetch()
-        temp = self.cpu.state.register_X - self.cpu.state.fetched
-        self.cpu.state.flag_C = bool(self.cpu.state.register_X >= self.cpu.state.fetched)
-        self.cpu.state.flag_Z = bool((temp & 0x00FF) == 0x0000)
-        self.cpu.state.flag_N = bool(temp & 0x0080)
+        state = self.cpu.state
+
+        state.flag_C, state.flag_Z, state.flag_N = COMPARE_TABLE[state.register_X << 8 | state.fetched]
+
         return 0
 
     def CPY(self) -> int:
         self.cpu.fetch()
-        temp = self.cpu.state.register_Y - self.cpu.state.fetched
-        self.cpu.state.flag_C = bool(self.cpu.state.register_Y >= self.cpu.state.fetched)
-        self.cpu.state.flag_Z = bool((temp & 0x00FF) == 0x0000)
-        self.cpu.state.flag_N = bool(temp & 0x0080)
+        state = self.cpu.state
+
+        state.flag_C, state.flag_Z, state.flag_N = COMPARE_TABLE[state.register_Y << 8 | state.fetched]
+
         return 0
 
     def DEC(self) -> int:
         self.cpu.fetch()
-        temp = self.cpu.state.fetched - 1
-        self.cpu.bus.write(self.cpu.state.addr_abs, temp & 0x00FF)
-        self.cpu.state.flag_Z = bool((temp & 0x00FF) == 0x0000)
-        self.cpu.state.flag_N = bool(temp & 0x0080)
+        state = self.cpu.state
+
+        temp = (state.fetched - 1) & 0xFF
+        self.cpu.bus.write(state.addr_abs, temp)
+        state.flag_Z, state.flag_N = NZ_TABLE[temp]
+
         return 0
 
     def DEX(self) -> int:
-        self.cpu.state.register_X -= 1
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_X == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_X & 0x80)
+        state = self.cpu.state
+
+        state.register_X = (state.register_X - 1) & 0xFF
+        state.flag_Z, state.flag_N = NZ_TABLE[state.register_X]
+
         return 0
 
     def DEY(self) -> int:
-        self.cpu.state.register_Y -= 1
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_Y == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_Y & 0x80)
+        state = self.cpu.state
+
+        state.register_Y = (state.register_Y - 1) & 0xFF
+        state.flag_Z, state.flag_N = NZ_TABLE[state.register_Y]
+
         return 0
 
     def EOR(self) -> int:
         self.cpu.fetch()
-        self.cpu.state.register_A ^= self.cpu.state.fetched
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_A == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_A & 0x80)
+        state = self.cpu.state
+
+        state.register_A ^= state.fetched
+        state.flag_Z, state.flag_N = NZ_TABLE[state.register_A]
+
         return 1
 
     def INC(self) -> int:
         self.cpu.fetch()
-        temp = self.cpu.state.fetched + 1
-        self.cpu.bus.write(self.cpu.state.addr_abs, temp & 0x00FF)
-        self.cpu.state.flag_Z = bool((temp & 0x00FF) == 0x0000)
-        self.cpu.state.flag_N = bool(temp & 0x0080)
+        state = self.cpu.state
+
+        temp = (state.fetched + 1) & 0xFF
+        self.cpu.bus.write(state.addr_abs, temp)
+        state.flag_Z, state.flag_N = NZ_TABLE[temp]
+
         return 0
 
     def INX(self) -> int:
-        self.cpu.state.register_X += 1
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_X == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_X & 0x80)
+        state = self.cpu.state
+
+        state.register_X = (state.register_X + 1) & 0xFF
+        state.flag_Z, state.flag_N = NZ_TABLE[state.register_X]
+
         return 0
 
     def INY(self) -> int:
-        self.cpu.state.register_Y += 1
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_Y == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_Y & 0x80)
+        state = self.cpu.state
+
+        state.register_Y = (state.register_Y + 1) & 0xFF
+        state.flag_Z, state.flag_N = NZ_TABLE[state.register_Y]
+
         return 0
 
     def JMP(self) -> int:
@@ -256,12 +283,12 @@ class CpuInstructions(AbstractCpuInstructions):
         return 0
 
     def JSR(self) -> int:
-        self.cpu.state.register_PC -= 1
+        self.cpu.state.register_PC = (self.cpu.state.register_PC - 1) & 0xFFFF
 
         self.cpu.bus.write(0x0100 + self.cpu.state.register_SP, (self.cpu.state.register_PC >> 8) & 0x00FF)
-        self.cpu.state.register_SP -= 1
+        self.cpu.state.register_SP = (self.cpu.state.register_SP - 1) & 0xFF
         self.cpu.bus.write(0x0100 + self.cpu.state.register_SP, self.cpu.state.register_PC & 0x00FF)
-        self.cpu.state.register_SP -= 1
+        self.cpu.state.register_SP = (self.cpu.state.register_SP - 1) & 0xFF
         
         self.cpu.state.register_PC = self.cpu.state.addr_abs
         
@@ -269,46 +296,42 @@ class CpuInstructions(AbstractCpuInstructions):
 
     def LDA(self) -> int:
         self.cpu.fetch()
-        
-        self.cpu.state.register_A = self.cpu.state.fetched
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_A == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_A & 0x80)
-        
+        state = self.cpu.state
+
+        state.register_A = state.fetched
+        state.flag_Z, state.flag_N = NZ_TABLE[state.fetched]
+
         return 1
 
     def LDX(self) -> int:
         self.cpu.fetch()
-        
-        self.cpu.state.register_X = self.cpu.state.fetched
-        print(self.cpu.state.register_X == 0x00)
+        state = self.cpu.state
+
+        state.register_X = state.fetched
+        state.flag_Z, state.flag_N = NZ_TABLE[state.fetched]
 
-        self.cpu.state.flag_Z = bool(int(self.cpu.state.register_X == 0x00))
-        self.cpu.state.flag_N = bool(self.cpu.state.register_X & 0x80)
-        
         return 1
 
     def LDY(self) -> int:
         self.cpu.fetch()
-        
-        self.cpu.state.register_Y = self.cpu.state.fetched
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_Y == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_Y & 0x80)
-        
+        state = self.cpu.state
+
+        state.register_Y = state.fetched
+        state.flag_Z, state.flag_N = NZ_TABLE[state.fetched]
+
         return 1
 
     def LSR(self) -> int:
         self.cpu.fetch()
+        state = self.cpu.state
 
-        self.cpu.state.flag_C = bool(self.cpu.state.fetched & 0x0001)
-        temp = self.cpu.state.fetched >> 1
-
-        self.cpu.state.flag_Z = bool((temp & 0x00FF) == 0x0000)
-        self.cpu.state.flag_N = bool(temp & 0x0080)
+        result, state.flag_C, state.flag_Z, state.flag_N = LSR_TABLE[state.fetched]
 
-        if self.cpu.state.current_addressing_mode == 'IMP':
-            self.cpu.state.register_A = temp & 0x00FF
+        if state.opcode == 0x4A: # Accumulator
+            state.register_A = result
         else:
-            self.cpu.bus.write(self.cpu.state.addr_abs, temp & 0x00FF)
+            self.cpu.bus.write(state.addr_abs, result)
+
         return 0
 
     def NOP(self) -> int:
@@ -319,14 +342,16 @@ class CpuInstructions(AbstractCpuInstructions):
 
     def ORA(self) -> int:
         self.cpu.fetch()
-        self.cpu.state.register_A |= self.cpu.state.fetched
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_A == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_A & 0x80)
+        state = self.cpu.state
+
+        state.register_A |= state.fetched
+        state.flag_Z, state.flag_N = NZ_TABLE[state.register_A]
+
         return 1
 
     def PHA(self) -> int:
         self.cpu.bus.write(0x0100 + self.cpu.state.register_SP, self.cpu.state.register_A)
-        self.cpu.state.register_SP -= 1
+        self.cpu.state.register_SP = (self.cpu.state.register_SP - 1) & 0xFF
         return 0
 
     def PHP(self) -> int:
@@ -336,18 +361,20 @@ class CpuInstructions(AbstractCpuInstructions):
         self.cpu.bus.write(0x0100 + self.cpu.state.register_SP, self.cpu.state.register_SR | self.cpu.state.flag_B << 4 | self.cpu.state.flag_U << 5)
         self.cpu.state.flag_B = bool(0) # check if the
         self.cpu.state.flag_U = bool(0)
-        self.cpu.state.register_SP -= 1
+        self.cpu.state.register_SP = (self.cpu.state.register_SP - 1) & 0xFF
         return 0
 
     def PLA(self) -> int:
-        self.cpu.state.register_SP += 1
-        self.cpu.state.register_A = self.cpu.bus.read(0x0100 + self.cpu.state.register_SP)
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_A == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_A & 0x80)
+        state = self.cpu.state
+
+        state.register_SP = (state.register_SP + 1) & 0xFF
+        state.register_A = self.cpu.bus.read(0x0100 + state.register_SP)
+        state.flag_Z, state.flag_N = NZ_TABLE[state.register_A]
+
         return 0
 
     def PLP(self) -> int:
-        self.cpu.state.register_SP += 1
+        self.cpu.state.register_SP = (self.cpu.state.register_SP + 1) & 0xFF
         self.cpu.state.register_SR = self.cpu.bus.read(0x0100 + self.cpu.state.register_SP)
 
         self.cpu.state.flag_U = bool(1)
@@ -356,51 +383,51 @@ class CpuInstructions(AbstractCpuInstructions):
 
     def ROL(self) -> int:
         self.cpu.fetch()
-        temp = (self.cpu.state.fetched << 1) | self.cpu.state.flag_C
-        self.cpu.state.flag_C = bool(temp & 0xFF00)
-        self.cpu.state.flag_Z = bool((temp & 0x00FF) == 0x0000)
-        self.cpu.state.flag_N = bool(temp & 0x0080)
+        state = self.cpu.state
+
+        result, state.flag_C, state.flag_Z, state.flag_N = ROL_TABLE[state.flag_C << 8 | state.fetched]
 
-        if self.cpu.state.current_addressing_mode == 'IMP':
-            self.cpu.state.register_A = temp & 0x00FF
+        if state.opcode == 0x2A: # Accumulator
+            state.register_A = result
         else:
-            self.cpu.bus.write(self.cpu.state.addr_abs, temp & 0x00FF)
+            self.cpu.bus.write(state.addr_abs, result)
+
         return 0
 
     def ROR(self) -> int:
         self.cpu.fetch()
-        temp = (self.cpu.state.fetched >> 1) | (self.cpu.state.flag_C << 7)
-        self.cpu.state.flag_C = bool(self.cpu.state.fetched & 0x0001)
-        self.cpu.state.flag_Z = bool((temp & 0x00FF) == 0x0000)
-        self.cpu.state.flag_N = bool(temp & 0x0080)
+        state = self.cpu.state
+
+        result, state.flag_C, state.flag_Z, state.flag_N = ROR_TABLE[state.flag_C << 8 | state.fetched]
 
-        if self.cpu.state.current_addressing_mode == 'IMP':
-            self.cpu.state.register_A = temp & 0x00FF
+        if state.opcode == 0x6A: # Accumulator
+            state.register_A = result
         else:
-            self.cpu.bus.write(self.cpu.state.addr_abs, temp & 0x00FF)
+            self.cpu.bus.write(state.addr_abs, result)
+
         return 0
 
     def RTI(self) -> int:
-        self.cpu.state.register_SP += 1
+        self.cpu.state.register_SP = (self.cpu.state.register_SP + 1) & 0xFF
         self.cpu.state.register_SR = self.cpu.bus.read(0x0100 + self.cpu.state.register_SP)
         
         self.cpu.state.flag_B = bool(0)
         self.cpu.state.flag_U = bool(0)
 
-        self.cpu.state.register_SP += 1
+        self.cpu.state.register_SP = (self.cpu.state.register_SP + 1) & 0xFF
         self.cpu.state.register_PC = self.cpu.bus.read(0x0100 + self.cpu.state.register_SP)
-        self.cpu.state.register_SP += 1
+        self.cpu.state.register_SP = (self.cpu.state.register_SP + 1) & 0xFF
         self.cpu.state.register_PC |= self.cpu.bus.read(0x0100 + self.cpu.state.register_SP) << 8
 
         return 0
 
     def RTS(self) -> int:
-        self.cpu.state.register_SP += 1
+        self.cpu.state.register_SP = (self.cpu.state.register_SP + 1) & 0xFF
         self.cpu.state.register_PC = self.cpu.bus.read(0x0100 + self.cpu.state.register_SP)
-        self.cpu.state.register_SP += 1
+        self.cpu.state.register_SP = (self.cpu.state.register_SP + 1) & 0xFF
         self.cpu.state.register_PC |= self.cpu.bus.read(0x0100 + self.cpu.state.register_SP) << 8
 
-        self.cpu.state.register_PC += 1
+        self.cpu.state.register_PC = (self.cpu.state.register_PC + 1) & 0xFFFF
         return 0
 
     def SEC(self) -> int:
@@ -432,39 +459,44 @@ class CpuInstructions(AbstractCpuInstructions):
 
     def SBC(self) -> int:
         self.cpu.fetch()
-        value = self.cpu.state.fetched ^ 0x00FF
-
-        temp = self.cpu.state.register_A + value + self.cpu.state.flag_C
-        self.cpu.state.flag_C = bool(temp > 0xFF)
-        self.cpu.state.flag_Z = bool((temp & 0x00FF) == 0x0000)
-        self.cpu.state.flag_N = bool(temp & 0x80)
-        self.cpu.state.flag_V = bool((self.cpu.state.register_A ^ temp) & (value ^ temp) & 0x0080) #TODO: Check this
-        self.cpu.state.register_A = temp & 0x00FF
-        
+        state = self.cpu.state
+
+        # Subtraction is addition of the inverted operand
+        index = state.flag_C << 16 | state.register_A << 8 | (state.fetched ^ 0xFF)
+        state.register_A, state.flag_C, state.flag_Z, state.flag_N, state.flag_V = ADC_TABLE[index]
+
         return 1
 
     def TAX(self) -> int:
-        self.cpu.state.register_X = self.cpu.state.register_A
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_X == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_X & 0x80)
+        state = self.cpu.state
+
+        state.register_X = state.register_A
+        state.flag_Z, state.flag_N = NZ_TABLE[state.register_A]
+
         return 0
 
     def TAY(self) -> int:
-        self.cpu.state.register_Y = self.cpu.state.register_A
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_Y == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_Y & 0x80)
+        state = self.cpu.state
+
+        state.register_Y = state.register_A
+        state.flag_Z, state.flag_N = NZ_TABLE[state.register_A]
+
         return 0
 
     def TSX(self) -> int:
-        self.cpu.state.register_X = self.cpu.state.register_SP
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_X == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_X & 0x80)
+        state = self.cpu.state
+
+        state.register_X = state.register_SP
+        state.flag_Z, state.flag_N = NZ_TABLE[state.register_SP]
+
         return 0
 
     def TXA(self) -> int:
-        self.cpu.state.register_A = self.cpu.state.register_X
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_A == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_A & 0x80)
+        state = self.cpu.state
+
+        state.register_A = state.register_X
+        state.flag_Z, state.flag_N = NZ_TABLE[state.register_X]
+
         return 0
 
     def TXS(self) -> int:
@@ -472,10 +504,12 @@ class CpuInstructions(AbstractCpuInstructions):
         return 0
 
     def TYA(self) -> int:
-        self.cpu.state.register_A = self.cpu.state.register_Y
-        self.cpu.state.flag_Z = bool(self.cpu.state.register_A == 0x00)
-        self.cpu.state.flag_N = bool(self.cpu.state.register_A & 0x80)
+        state = self.cpu.state
+
+        state.register_A = state.register_Y
+        state.flag_Z, state.flag_N = NZ_TABLE[state.register_Y]
+
         return 0
-    
+
     def XXX(self) -> int:
         return 0
\ No newline at end of file
@@ -0,0 +1,547 @@
+from .interfaces.abstract_cpu import AbstractCpu
+
+from .cpu_instruction_set import OPCODES, Opcode
+
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import re
+
+# Longest run of instructions compiled into one block
+MAX_BLOCK_LENGTH = 64
+
+# Instruction length by addressing mode
+LENGTHS = {
+    "IMP": 1, "IMM": 2, "ZP0": 2, "ZPX": 2, "ZPY": 2, "IZX": 2, "IZY": 2, "REL": 2,
+    "ABS": 3, "ABX": 3, "ABY": 3, "IND": 3,
+}
+
+# Operations that take the extra cycle when their addressing mode crosses a page
+PAGE_PENALTY = {"ADC", "AND", "CMP", "EOR", "LDA", "LDX", "LDY", "ORA", "SBC"}
+
+# Operations that read their operand through Cpu.fetch
+FETCHING = {
+    "ADC", "AND", "ASL", "BIT", "CMP", "CPX", "CPY", "DEC", "EOR", "INC",
+    "LDA", "LDX", "LDY", "LSR", "ORA", "ROL", "ROR", "SBC",
+}
+
+# Operations that end a block, they change the program counter
+TERMINATORS = {"BCC", "BCS", "BEQ", "BMI", "BNE", "BPL", "BVC", "BVS", "JMP", "JSR", "RTI", "RTS"}
+
+# Operations left to the interpreter
+INTERPRETED = {"BRK"}
+
+# Branch conditions on the flag locals
+BRANCHES = {
+    "BCC": "not C", "BCS": "C", "BEQ": "Z", "BMI": "N",
+    "BNE": "not Z", "BPL": "not N", "BVC": "not V", "BVS": "V",
+}
+
+# Locals holding registers and flags inside a block, with the state attribute behind each
+LOCALS = {
+    "A": "register_A", "X": "register_X", "Y": "register_Y", "SP": "register_SP",
+    "C": "flag_C", "Z": "flag_Z", "I": "flag_I", "D": "flag_D",
+    "B": "flag_B", "U": "flag_U", "V": "flag_V", "N": "flag_N",
+}
+
+LOCAL_PATTERN = re.compile(r"\b(" + "|".join(LOCALS) + r")\b")
+ASSIGN_PATTERN = re.compile(r"^\s*(" + "|".join(LOCALS) + r")\s*=[^=]")
+
+STATUS = "(C | Z << 1 | I << 2 | D << 3 | B << 4 | U << 5 | V << 6 | N << 7)"
+
+SET_STATUS = [
+    "C = bool(t & 0x01)", "Z = bool(t & 0x02)", "I = bool(t & 0x04)", "D = bool(t & 0x08)",
+    "B = bool(t & 0x10)", "U = bool(t & 0x20)", "V = bool(t & 0x40)", "N = bool(t & 0x80)",
+]
+
+# Marks where a block leaves or loops back to its start,
+# expanded once the written locals and the cycle totals are known
+EXIT = "@exit"
+LOOP = "@loop"
+
+
+class Block(NamedTuple):
+    function: Optional[Callable]  # None when the instruction at start is left to the interpreter
+    length: int                   # Instructions in the block
+    worst_cycles: int             # Most cycles a pass through the block can take
+    addresses: range              # Bytes the block was compiled from
+
+
+class CpuJit:
+    """
+    Compiles straight-line 6502 code into Python functions, one per basic block
+    Blocks are cached by start address and dropped when the bus writes into their bytes
+
+    Only registers, flags, memory and cycles are kept exact, the helper fields of the
+    state (addr_abs, fetched...) are not updated by compiled code
+    Remapping pages that hold compiled code requires a clear()
+    """
+    def __init__(self, cpu: AbstractCpu):
+        self.cpu = cpu
+
+        self.blocks: Dict[int, Block] = {}
+
+        # Compiled block starts by code byte address, and code byte count per page
+        self._owners: Dict[int, Set[int]] = {}
+        self._page_bytes: Dict[int, int] = {}
+
+        # Bumped on every invalidation so running blocks can bail out
+        self.epoch = 0
+
+    def run(self, cycle_limit: float, instruction_limit: float) -> Tuple[int, int]:
+        """
+        Executes blocks until a BRK or until a limit is reached
+        Stops at the same instruction as the interpreter would, so events and interrupts
+        land on the same boundaries on both backends
+        The cycle limit is lowered to the slice end of the cpu whenever irq(), nmi(),
+        stop() or a newly scheduled event moves it, blocks leave right after the store that did so
+        Returns the cycles and instructions executed
+        """
+        cpu = self.cpu
+        state = cpu.state
+        bus = cpu.bus
+        blocks = self.blocks
+
+        start = state.cycles
+        executed = 0
+
+        while executed < instruction_limit:
+            cycle_limit = min(cycle_limit, cpu._slice_end)
+
+            if state.cycles >= cycle_limit:
+                break
+
+            pc = state.register_PC
+            block = blocks.get(pc)
+
+            if block is None:
+                block = self._compile(pc)
+
+            if (
+                block.function is not None
+                and executed + block.length <= instruction_limit
+                and state.cycles + block.worst_cycles < cycle_limit
+            ):
+                cycles, count = block.function(state, bus, self, cycle_limit - state.cycles, instruction_limit - executed)
+                state.cycles += cycles
+                executed += count
+                continue
+
+            # Near a limit, or on an instruction the compiler leaves alone
+            cpu._execute()
+            executed += 1
+
+            if cpu.exit_reason is not None:
+                break
+
+        return state.cycles - start, executed
+
+    def invalidate(self, start: int) -> None:
+        """
+        Drops the block compiled at start
+        """
+        block = self.blocks.pop(start, None)
+
+        if block is None:
+            return
+
+        self.epoch += 1
+
+        for address in block.addresses:
+            owners = self._owners[address]
+            owners.discard(start)
+
+            if not owners:
+                del self._owners[address]
+                self._release_byte(address)
+
+    def clear(self) -> None:
+        for start in list(self.blocks):
+            self.invalidate(start)
+
+    def _on_write(self, address: int, data: int) -> None:
+        owners = self._owners.get(address)
+
+        if owners:
+            for start in list(owners):
+                self.invalidate(start)
+
+    def _claim_byte(self, address: int) -> None:
+        page = address >> 8
+        self._page_bytes[page] = self._page_bytes.get(page, 0) + 1
+
+        if self._page_bytes[page] == 1:
+            self.cpu.bus.add_write_observer(page << 8, (page << 8) | 0xFF, self._on_write)
+
+    def _release_byte(self, address: int) -> None:
+        page = address >> 8
+        self._page_bytes[page] -= 1
+
+        if self._page_bytes[page] == 0:
+            del self._page_bytes[page]
+            self.cpu.bus.remove_write_observer(page << 8, (page << 8) | 0xFF, self._on_write)
+
+    def _compile(self, start: int) -> Block:
+        """
+        Decodes the basic block at start and compiles it
+        """
+        bus = self.cpu.bus
+        ram = bus.ram
+
+        body: List[Tuple[int, str]] = []
+        pc = start
+        length = 0
+        worst_cycles = 0
+        terminated = False
+
+        # Base cycles of the first n instructions, added once when the block leaves
+        base_cycles = [0]
+
+        while length < MAX_BLOCK_LENGTH and pc < 0x10000:
+            entry = OPCODES[ram[pc]]
+            size = LENGTHS[entry.addressing_mode]
+
+            # Only code in RAM or ROM is constant enough to compile
+            if pc + size > 0x10000 or entry.operation in INTERPRETED or not all(
+                bus.is_memory(address) for address in range(pc, pc + size)
+            ):
+                break
+
+            operand = ram[pc + 1] if size > 1 else 0
+            if size == 3:
+                operand |= ram[pc + 2] << 8
+
+            length += 1
+            worst_cycles += self._emit(body, entry, operand, start, pc + size, length)
+            base_cycles.append(base_cycles[-1] + entry.cycles)
+            pc += size
+
+            if entry.operation in TERMINATORS:
+                terminated = True
+                break
+
+        if length == 0:
+            # Left to the interpreter, still dropped when the byte at start changes
+            block = Block(None, 1, 0, range(start, start + 1))
+        else:
+            if not terminated:
+                body.append((0, f"{EXIT}|0x{pc & 0xFFFF:04X}|{length}"))
+
+            namespace: dict = {}
+            exec(compile(self._source(body, base_cycles, worst_cycles), f"<jit {start:04X}>", "exec"), namespace)
+
+            block = Block(namespace["block"], length, worst_cycles, range(start, pc))
+
+        self.blocks[start] = block
+
+        for address in block.addresses:
+            if address not in self._owners:
+                self._owners[address] = set()
+                self._claim_byte(address)
+
+            self._owners[address].add(start)
+
+        return block
+
+    def _source(self, body: List[Tuple[int, str]], base_cycles: List[int], worst_cycles: int) -> str:
+        """
+        Wraps the block body into a function loading and storing the locals it uses
+        A block branching back to its own start loops inside the function while the budgets allow
+        """
+        body = self._drop_dead_assignments(body)
+        code = [text for _, text in body if not text.startswith((EXIT, LOOP))]
+        used = sorted({name for line in code for name in LOCAL_PATTERN.findall(line)})
+        written = sorted({match.group(1) for line in code for match in [ASSIGN_PATTERN.match(line)] if match})
+
+        length = len(base_cycles) - 1
+        loops = any(text.startswith(LOOP) for _, text in body)
+
+        lines = [
+            "def block(s, bus, jit, cycle_budget, instruction_budget):",
+            "    read = bus.read",
+            "    write = bus.write",
+            "    epoch = jit.epoch",
+            "    slice_end = jit.cpu._slice_end",
+            "    c = 0",
+            "    n = 0",
+        ]
+        lines += [f"    {name} = s.{LOCALS[name]}" for name in used]
+
+        if loops:
+            lines.append("    while True:")
+
+        for indent, text in body:
+            prefix = "    " * (indent + 1 + loops)
+
+            if text.startswith(LOOP):
+                _, target, penalty = text.split("|")
+                lines.append(f"{prefix}c += {int(penalty) + base_cycles[length]}")
+                lines.append(f"{prefix}n += {length}")
+                lines.append(f"{prefix}if c + {worst_cycles} < cycle_budget and n + {length} <= instruction_budget and jit.cpu._slice_end == slice_end:")
+                lines.append(f"{prefix}    continue")
+                text = f"{EXIT}|{target}|0"
+
+            if text.startswith(EXIT):
+                _, target, count = text.split("|")
+                lines += [f"{prefix}s.{LOCALS[name]} = {name}" for name in written]
+                lines.append(f"{prefix}s.register_PC = {target}")
+                lines.append(f"{prefix}return c + {base_cycles[int(count)]}, n + {count}")
+            else:
+                lines.append(prefix + text)
+
+        return "\n".join(lines) + "\n"
+
+    def _drop_dead_assignments(self, body: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+        """
+        Removes register and flag assignments overwritten before anything reads them,
+        most instructions set N and Z only for the next one to set them again
+        Conditional code and exits are taken to read every local
+        """
+        live = set(LOCALS)
+        kept: List[Tuple[int, str]] = []
+
+        for indent, text in reversed(body):
+            if indent > 0 or text.startswith(("if ", EXIT, LOOP)):
+                live = set(LOCALS)
+            else:
+                match = ASSIGN_PATTERN.match(text)
+
+                if match:
+                    if match.group(1) not in live:
+                        continue
+
+                    live.discard(match.group(1))
+                    text_read = text.split("=", 1)[1]
+                else:
+                    text_read = text
+
+                live.update(LOCAL_PATTERN.findall(text_read))
+
+            kept.append((indent, text))
+
+        kept.reverse()
+
+        return kept
+
+    def _emit(self, body: List[Tuple[int, str]], entry: Opcode, operand: int, start: int, next_pc: int, count: int) -> int:
+        """
+        Appends the code of one instruction to the block body
+        Base cycles are left to the block exits, only penalties are counted here
+        Returns the most cycles the instruction can take
+        """
+        mode = entry.addressing_mode
+        operation = entry.operation
+        cycles = entry.cycles
+        worst = cycles
+
+        def emit(text: str, indent: int = 0) -> None:
+            body.append((indent, text))
+
+        def leave(target: str, indent: int = 0) -> None:
+            emit(f"{EXIT}|{target}|{count}", indent)
+
+        writes = []
+
+        def write(address: str, value: str) -> None:
+            emit(f"write({address}, {value})")
+            writes.append(address)
+
+        # Effective address in a, page crossing in cross
+        address = "a"
+        cross = None
+
+        if mode == "ZP0" or mode == "ABS":
+            address = f"0x{operand:04X}"
+        elif mode == "ZPX" or mode == "ZPY":
+            emit(f"a = (0x{operand:02X} + {mode[2]}) & 0xFF")
+        elif mode == "ABX" or mode == "ABY":
+            emit(f"a = (0x{operand:04X} + {mode[2]}) & 0xFFFF")
+            cross = f"(a >> 8) != 0x{operand >> 8:02X}"
+        elif mode == "IND":
+            low, high = operand & 0xFF, operand >> 8
+
+            # Same page boundary handling as CpuAddressingModes.IND
+            if low == 0xFF:
+                low, high = 0x00, high + 1
+
+            pointer = (high << 8) | low
+            emit(f"a = read(0x{pointer:04X})")
+            emit(f"a |= read(0x{pointer + 1:04X}) << 8")
+        elif mode == "IZX":
+            emit(f"p = (0x{operand:02X} + X) & 0xFF")
+            emit("a = read(p)")
+            emit("a |= read(p + 1) << 8")
+        elif mode == "IZY":
+            emit(f"a = read(0x{operand:02X})")
+            emit(f"hi = read(0x{operand + 1:03X})")
+            emit("a = (((hi << 8) | a) + Y) & 0xFFFF")
+            cross = "(a >> 8) != hi"
+
+        if cross is not None and operation in PAGE_PENALTY:
+            emit(f"if {cross}:")
+            emit("c += 1", 1)
+            worst += 1
+
+        # Operand in m
+        if operation in FETCHING:
+            if mode == "IMP":
+                emit("m = A")
+            elif mode == "IMM":
+                emit(f"m = 0x{operand & 0xFF:02X}")
+            else:
+                emit(f"m = read({address})")
+
+        def store(value: str) -> None:
+            # Shifts and rotates write back to the accumulator in implied mode
+            if mode == "IMP":
+                emit(f"A = {value}")
+            else:
+                write(address, value)
+
+        def flags_nz(value: str) -> None:
+            emit(f"Z = {value} == 0x00")
+            emit(f"N = bool({value} & 0x80)")
+
+        if operation == "ADC":
+            emit("t = A + m + C")
+            emit("C = t > 0xFF")
+            emit("Z = (t & 0xFF) == 0")
+            emit("N = bool(t & 0x80)")
+            emit("V = bool(~(A ^ m) & (A ^ t) & 0x80)")
+            emit("A = t & 0xFF")
+        elif operation == "SBC":
+            emit("v = m ^ 0xFF")
+            emit("t = A + v + C")
+            emit("C = t > 0xFF")
+            emit("Z = (t & 0xFF) == 0")
+            emit("N = bool(t & 0x80)")
+            emit("V = bool((A ^ t) & (v ^ t) & 0x80)")
+            emit("A = t & 0xFF")
+        elif operation in ("AND", "EOR", "ORA"):
+            symbol = {"AND": "&", "EOR": "^", "ORA": "|"}[operation]
+            emit(f"A = A {symbol} m")
+            flags_nz("A")
+        elif operation == "ASL":
+            emit("t = m << 1")
+            emit("C = (t & 0xFF00) > 0")
+            flags_nz("(t & 0xFF)")
+            store("t & 0xFF")
+        elif operation == "LSR":
+            emit("C = bool(m & 0x01)")
+            emit("t = m >> 1")
+            flags_nz("(t & 0xFF)")
+            store("t & 0xFF")
+        elif operation == "ROL":
+            emit("t = (m << 1) | C")
+            emit("C = bool(t & 0xFF00)")
+            flags_nz("(t & 0xFF)")
+            store("t & 0xFF")
+        elif operation == "ROR":
+            emit("t = (m >> 1) | (C << 7)")
+            emit("C = bool(m & 0x01)")
+            flags_nz("(t & 0xFF)")
+            store("t & 0xFF")
+        elif operation in BRANCHES:
+            target = (next_pc + (operand | 0xFF00 if operand & 0x80 else operand)) & 0xFFFF
+            penalty = 1 + ((target & 0xFF00) != (next_pc & 0xFF00))
+            worst += penalty
+
+            emit(f"if {BRANCHES[operation]}:")
+
+            if target == start:
+                emit(f"{LOOP}|0x{target:04X}|{penalty}", 1)
+            else:
+                emit(f"c += {penalty}", 1)
+                leave(f"0x{target:04X}", 1)
+
+            leave(f"0x{next_pc & 0xFFFF:04X}")
+        elif operation == "BIT":
+            emit("Z = (A & m) == 0x00")
+            emit("N = bool(m & 0x80)")
+            emit("V = bool(m & 0x40)")
+        elif operation in ("CLC", "CLD", "CLI", "CLV", "SEC", "SED", "SEI"):
+            emit(f"{operation[2]} = {operation[0] == 'S'}")
+        elif operation in ("CMP", "CPX", "CPY"):
+            register = {"CMP": "A", "CPX": "X", "CPY": "Y"}[operation]
+            emit(f"t = {register} - m")
+            emit(f"C = {register} >= m")
+            emit("Z = (t & 0xFF) == 0")
+            emit("N = bool(t & 0x80)")
+        elif operation in ("DEC", "INC"):
+            emit(f"t = m {'-' if operation == 'DEC' else '+'} 1")
+            write(address, "t & 0xFF")
+            emit("Z = (t & 0xFF) == 0")
+            emit("N = bool(t & 0x80)")
+        elif operation in ("DEX", "DEY", "INX", "INY"):
+            register = operation[2]
+            emit(f"{register} = ({register} {'-' if operation[0] == 'D' else '+'} 1) & 0xFF")
+            flags_nz(register)
+        elif operation in ("LDA", "LDX", "LDY"):
+            emit(f"{operation[2]} = m")
+            flags_nz(operation[2])
+        elif operation in ("STA", "STX", "STY"):
+            write(address, operation[2])
+        elif operation in ("TAX", "TAY", "TSX", "TXA", "TYA"):
+            source = "SP" if operation == "TSX" else operation[1]
+            emit(f"{operation[2]} = {source}")
+            flags_nz(operation[2])
+        elif operation == "TXS":
+            emit("SP = X")
+        elif operation == "PHA":
+            write("0x0100 + SP", "A")
+            emit("SP = (SP - 1) & 0xFF")
+        elif operation == "PHP":
+            emit("B = True")
+            emit("U = True")
+            write("0x0100 + SP", STATUS)
+            emit("B = False")
+            emit("U = False")
+            emit("SP = (SP - 1) & 0xFF")
+        elif operation == "PLA":
+            emit("SP = (SP + 1) & 0xFF")
+            emit("A = read(0x0100 + SP)")
+            flags_nz("A")
+        elif operation == "PLP":
+            emit("SP = (SP + 1) & 0xFF")
+            emit("t = read(0x0100 + SP)")
+            for line in SET_STATUS:
+                emit(line)
+            emit("U = True")
+        elif operation == "JMP":
+            leave(address)
+        elif operation == "JSR":
+            back = (next_pc - 1) & 0xFFFF
+            write("0x0100 + SP", f"0x{back >> 8:02X}")
+            emit("SP = (SP - 1) & 0xFF")
+            write("0x0100 + SP", f"0x{back & 0xFF:02X}")
+            emit("SP = (SP - 1) & 0xFF")
+            leave(address)
+        elif operation == "RTS":
+            emit("SP = (SP + 1) & 0xFF")
+            emit("a = read(0x0100 + SP)")
+            emit("SP = (SP + 1) & 0xFF")
+            emit("a |= read(0x0100 + SP) << 8")
+            leave("(a + 1) & 0xFFFF")
+        elif operation == "RTI":
+            emit("SP = (SP + 1) & 0xFF")
+            emit("t = read(0x0100 + SP)")
+            for line in SET_STATUS:
+                emit(line)
+            emit("B = False")
+            emit("U = False")
+            emit("SP = (SP + 1) & 0xFF")
+            emit("a = read(0x0100 + SP)")
+            emit("SP = (SP + 1) & 0xFF")
+            emit("a |= read(0x0100 + SP) << 8")
+            leave("a")
+        elif operation in ("NOP", "XXX"):
+            pass
+        else:
+            raise KeyError(f"{operation} has no compiled form")
+
+        # The writes may have replaced code, including this very block,
+        # or reached a device raising an interrupt or stopping the run
+        if writes and operation not in TERMINATORS:
+            emit("if jit.epoch != epoch or jit.cpu._slice_end != slice_end:")
+            leave(f"0x{next_pc & 0xFFFF:04X}", 1)
+
+        return worst
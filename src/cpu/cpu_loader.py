@@ -0,0 +1,303 @@
+"""
+Loads program images from disk into a cpu
+
+Supported formats are raw binaries placed at a load address, C64 PRG files, Intel HEX
+and iNES cartridges. Files are memory-mapped rather than read: flat formats are copied
+from the mapping straight into the bus backing store, iNES PRG-ROM stays mapped and is
+shown through a bank mapper.
+
+The entry point comes from format metadata when there is some (the start record of
+Intel HEX, the SYS line of a C64 BASIC stub), from the reset vector when the image sets
+it, and from the load address otherwise.
+"""
+from .interfaces.abstract_cpu import AbstractCpu
+
+from .cpu import RESET_VECTOR
+from .cpu_mapper import CpuMapper, UxRomMapper
+
+from enum import Enum
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import mmap
+import os
+
+INES_MAGIC = b"NES\x1a"
+INES_HEADER_SIZE = 16
+INES_TRAINER_SIZE = 512
+INES_PRG_BANK_SIZE = 0x4000
+
+# Address of C64 BASIC programs and the token of the SYS statement
+PRG_BASIC_START = 0x0801
+PRG_SYS_TOKEN = 0x9E
+
+# Intel HEX record types
+HEX_DATA, HEX_EOF, HEX_SEGMENT, HEX_START_SEGMENT, HEX_LINEAR, HEX_START_LINEAR = range(6)
+
+# Payload bytes of the address and start records
+HEX_PAYLOAD_SIZES = {HEX_SEGMENT: 2, HEX_LINEAR: 2, HEX_START_SEGMENT: 4, HEX_START_LINEAR: 4}
+
+
+class ImageFormat(str, Enum):
+    RAW = "raw"   # Bytes placed at a load address
+    PRG = "prg"   # Little-endian load address followed by the bytes
+    HEX = "hex"   # Intel HEX records
+    INES = "ines" # NES cartridge, PRG-ROM behind a mapper
+
+
+class LoadedImage(NamedTuple):
+    format: ImageFormat
+    entry: int
+    segments: Tuple[Tuple[int, int], ...]  # (address, length) of every block loaded
+    mapper: Optional[CpuMapper] = None      # Holds the mapped file of iNES images
+
+    def close(self) -> None:
+        """
+        Detaches the mapper of iNES images and unmaps their file
+        """
+        if self.mapper is not None:
+            self.mapper.close()
+
+
+def detect_format(path: str, header: bytes = b"") -> ImageFormat:
+    """
+    Guesses the format of an image from its first bytes and its extension
+    PRG files carry no magic, they are only recognised by extension
+    """
+    if header.startswith(INES_MAGIC):
+        return ImageFormat.INES
+
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension in (".hex", ".ihx") or header.startswith(b":"):
+        return ImageFormat.HEX
+
+    if extension == ".prg":
+        return ImageFormat.PRG
+
+    return ImageFormat.RAW
+
+
+def load_image(
+    cpu: AbstractCpu,
+    path: str,
+    format: Optional[ImageFormat] = None,
+    address: int = 0x0000,
+    start: Optional[int] = None,
+) -> LoadedImage:
+    """
+    Loads an image into cpu and points the program counter at its entry, like Cpu.load
+    The format is detected unless given, address only applies to raw images
+    and start overrides the entry point
+    """
+    if os.path.getsize(path) == 0:
+        raise ValueError(f"{path} is empty")
+
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        if format is None:
+            format = detect_format(path, data[:len(INES_MAGIC)])
+
+        image = LOADERS[ImageFormat(format)](cpu, data, address)
+    except BaseException:
+        data.close()
+        raise
+
+    # Mappers keep views of the file, which stays mapped until they are closed
+    if image.mapper is None:
+        data.close()
+
+    entry = image.entry if start is None else start
+    cpu.start_at(entry)
+
+    return image._replace(entry=entry)
+
+
+def _reset_vector(cpu: AbstractCpu, segments: Tuple[Tuple[int, int], ...], default: int) -> int:
+    """
+    Entry through the reset vector when the segments cover it, default otherwise
+    """
+    covered = all(
+        any(address <= target < address + length for address, length in segments)
+        for target in (RESET_VECTOR, RESET_VECTOR + 1)
+    )
+
+    if not covered:
+        return default
+
+    return cpu.bus.read(RESET_VECTOR) | (cpu.bus.read(RESET_VECTOR + 1) << 8)
+
+
+def _load_raw(cpu: AbstractCpu, data: mmap.mmap, address: int) -> LoadedImage:
+    with memoryview(data) as view:
+        cpu.bus.write_block(address, view)
+
+    segments = ((address, len(data)),)
+
+    return LoadedImage(ImageFormat.RAW, _reset_vector(cpu, segments, address), segments)
+
+
+def _load_prg(cpu: AbstractCpu, data: mmap.mmap, _: int) -> LoadedImage:
+    if len(data) < 2:
+        raise ValueError(f"PRG image of {len(data)} bytes has no load address")
+
+    address = data[0] | (data[1] << 8)
+
+    with memoryview(data) as view:
+        cpu.bus.write_block(address, view[2:])
+
+    segments = ((address, len(data) - 2),)
+    entry = _basic_sys(data[2:2 + 0x100]) if address == PRG_BASIC_START else None
+
+    return LoadedImage(ImageFormat.PRG, _reset_vector(cpu, segments, address) if entry is None else entry, segments)
+
+
+def _basic_sys(program: bytes) -> Optional[int]:
+    """
+    Address of the SYS statement in the first line of a BASIC stub, the usual way
+    C64 machine code programs start
+    """
+    # Link to the next line and line number, then the tokenized line ending in a zero
+    end = program.find(0, 4)
+
+    if end < 0:
+        return None
+
+    line = program[4:end]
+    token = line.find(PRG_SYS_TOKEN)
+
+    if token < 0:
+        return None
+
+    digits = bytes(line[token + 1:]).lstrip(b" (")
+    number = digits[:len(digits) - len(digits.lstrip(b"0123456789"))]
+
+    return int(number) if number and int(number) <= 0xFFFF else None
+
+
+def _load_hex(cpu: AbstractCpu, data: mmap.mmap, _: int) -> LoadedImage:
+    segments: List[Tuple[int, int]] = []
+    base = 0
+    entry = None
+
+    for number, line in enumerate(iter(data.readline, b""), 1):
+        line = line.strip()
+
+        if not line:
+            continue
+
+        if not line.startswith(b":"):
+            raise ValueError(f"Line {number} is not an Intel HEX record")
+
+        try:
+            record = bytes.fromhex(line[1:].decode("ascii"))
+        except ValueError:
+            raise ValueError(f"Line {number} has invalid hex digits") from None
+
+        if len(record) < 5 or len(record) != record[0] + 5:
+            raise ValueError(f"Line {number} has a bad record length")
+
+        if sum(record) & 0xFF:
+            raise ValueError(f"Line {number} has a bad checksum")
+
+        kind = record[3]
+        payload = record[4:-1]
+
+        if kind > HEX_START_LINEAR:
+            raise ValueError(f"Line {number} has unknown record type {kind:#04x}")
+
+        if kind == HEX_DATA:
+            address = base + (record[1] << 8 | record[2])
+
+            if address + len(payload) > 0x10000:
+                raise ValueError(f"Line {number} writes past 0xFFFF")
+
+            cpu.bus.write_block(address, payload)
+            segments.append((address, len(payload)))
+        elif kind == HEX_EOF:
+            break
+        elif len(payload) != HEX_PAYLOAD_SIZES[kind]:
+            raise ValueError(f"Line {number} has a record of type {kind:#04x} with {len(payload)} bytes instead of {HEX_PAYLOAD_SIZES[kind]}")
+        elif kind == HEX_SEGMENT:
+            base = int.from_bytes(payload, "big") << 4
+        elif kind == HEX_LINEAR:
+            base = int.from_bytes(payload, "big") << 16
+        elif kind == HEX_START_SEGMENT:
+            entry = ((payload[0] << 8 | payload[1]) << 4) + (payload[2] << 8 | payload[3])
+        else:
+            entry = int.from_bytes(payload, "big")
+
+    if not segments:
+        raise ValueError("Intel HEX image has no data records")
+
+    if entry is None:
+        entry = _reset_vector(cpu, tuple(segments), min(address for address, _ in segments))
+
+    return LoadedImage(ImageFormat.HEX, entry & 0xFFFF, tuple(segments))
+
+
+def _load_ines(cpu: AbstractCpu, data: mmap.mmap, _: int) -> LoadedImage:
+    if len(data) < INES_HEADER_SIZE or data[:4] != INES_MAGIC:
+        raise ValueError("Not an iNES image")
+
+    banks = data[4]
+    mapper_number = (data[6] >> 4) | (data[7] & 0xF0)
+
+    offset = INES_HEADER_SIZE + (INES_TRAINER_SIZE if data[6] & 0x04 else 0)
+    size = banks * INES_PRG_BANK_SIZE
+
+    if not banks or offset + size > len(data):
+        raise ValueError(f"iNES image is too short for {banks} PRG-ROM banks")
+
+    if mapper_number not in INES_MAPPERS:
+        raise ValueError(f"Unsupported iNES mapper {mapper_number}")
+
+    with memoryview(data) as view:
+        prg = view[offset:offset + size]
+
+    # Released on failure, load_image cannot unmap the file while views of it exist
+    try:
+        mapper = INES_MAPPERS[mapper_number](cpu, prg)
+    except BaseException:
+        prg.release()
+        raise
+
+    entry = cpu.bus.read(RESET_VECTOR) | (cpu.bus.read(RESET_VECTOR + 1) << 8)
+
+    return LoadedImage(ImageFormat.INES, entry, ((0x8000, 0x8000),), mapper)
+
+
+def _nrom(cpu: AbstractCpu, prg: memoryview) -> CpuMapper:
+    """
+    Mapper 0, one 16 KiB bank mirrored at 0x8000 and 0xC000 or two banks side by side
+    """
+    banks = len(prg) // INES_PRG_BANK_SIZE
+
+    if banks not in (1, 2):
+        raise ValueError(f"NROM images have 1 or 2 PRG-ROM banks, not {banks}")
+
+    mapper = CpuMapper(cpu.bus, prg, INES_PRG_BANK_SIZE)
+
+    mapper.add_window(0x8000, 0, writable=False)
+    mapper.add_window(0xC000, len(mapper) - 1, writable=False)
+
+    return mapper
+
+
+def _uxrom(cpu: AbstractCpu, prg: memoryview) -> CpuMapper:
+    return UxRomMapper(cpu.bus, prg)
+
+
+# iNES mapper numbers to the functions putting PRG-ROM on the bus
+INES_MAPPERS: Dict[int, Callable[[AbstractCpu, memoryview], CpuMapper]] = {
+    0: _nrom,
+    2: _uxrom,
+}
+
+LOADERS: Dict[ImageFormat, Callable[[AbstractCpu, mmap.mmap, int], LoadedImage]] = {
+    ImageFormat.RAW: _load_raw,
+    ImageFormat.PRG: _load_prg,
+    ImageFormat.HEX: _load_hex,
+    ImageFormat.INES: _load_ines,
+}
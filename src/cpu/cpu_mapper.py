@@ -0,0 +1,173 @@
+"""
+Bank switched memory for images larger than the 64 KiB address space
+
+A mapper cuts one large buffer (bytes, bytearray or an mmap of the image file) into banks
+of equal size, each a memoryview slice of the buffer, so nothing is ever copied.
+Windows are ranges of the address space mapped on the bus that show one bank at a time,
+switching a bank only points a window at another view, whatever the bank size.
+
+Banked pages are devices to the bus: block access, snapshots and the JIT see the
+backing store underneath, code running from banks goes through the interpreter.
+"""
+from .interfaces.abstract_bus_device import AbstractBusDevice
+from .interfaces.abstract_cpu_bus import AbstractCpuBus
+
+from .cpu_bus import PAGE_SIZE
+
+from typing import List, Optional
+
+import mmap
+
+
+class BankWindow(AbstractBusDevice):
+    """
+    A range of the address space showing one bank of a mapper
+    Writes go to the bank when the window is writable, to the mapper control hook otherwise
+    """
+    __slots__ = ("mapper", "start", "size", "bank", "view", "writable")
+
+    def __init__(self, mapper: "CpuMapper", start: int, bank: int, writable: bool):
+        self.mapper = mapper
+        self.start = start
+        self.size = mapper.bank_size
+        self.bank = bank
+        self.view = mapper.banks[bank]
+        self.writable = writable
+
+    @property
+    def end(self) -> int:
+        return self.start + self.size - 1
+
+    def read(self, address: int) -> int:
+        return self.view[address - self.start]
+
+    def write(self, address: int, value: int) -> None:
+        if self.writable:
+            self.view[address - self.start] = value
+        else:
+            self.mapper.control(address, value)
+
+
+class CpuMapper:
+    """
+    Banks of one buffer shown through windows of the address space
+    Subclasses implement bank registers by overriding control, which sees writes to read-only windows
+    """
+    def __init__(self, bus: AbstractCpuBus, data, bank_size: int):
+        if bank_size <= 0 or bank_size % PAGE_SIZE:
+            raise ValueError(f"Bank size has to be a multiple of {PAGE_SIZE} bytes, got {bank_size}")
+
+        buffer = memoryview(data).cast("B")
+
+        if not len(buffer) or len(buffer) % bank_size:
+            raise ValueError(f"{len(buffer)} bytes do not split into banks of {bank_size} bytes")
+
+        self.bus = bus
+        self.data = data
+        self.bank_size = bank_size
+
+        # Zero-copy views, one per bank
+        self.banks: List[memoryview] = [buffer[offset:offset + bank_size] for offset in range(0, len(buffer), bank_size)]
+        self.windows: List[BankWindow] = []
+
+        self._readonly = buffer.readonly
+
+    @classmethod
+    def from_file(cls, bus: AbstractCpuBus, path: str, writable: bool = False, **kwargs) -> "CpuMapper":
+        """
+        Memory-maps an image file as the banks, writes stay in memory when writable
+        kwargs go to the constructor, bank_size included
+        """
+        with open(path, "rb") as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY if writable else mmap.ACCESS_READ)
+
+        return cls(bus, data, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.banks)
+
+    def add_window(self, start: int, bank: int = 0, writable: Optional[bool] = None) -> int:
+        """
+        Maps a window of one bank size at start showing bank, returns the window index
+        Windows are writable when the buffer is, unless writable says otherwise
+        """
+        self._check_bank(bank)
+
+        if writable is None:
+            writable = not self._readonly
+        elif writable and self._readonly:
+            raise ValueError("Writable window over a read-only buffer")
+
+        window = BankWindow(self, start, bank, writable)
+
+        self.bus.map_device(start, window.end, window)
+        self.windows.append(window)
+
+        return len(self.windows) - 1
+
+    def switch(self, window: int, bank: int) -> None:
+        """
+        Shows bank in a window
+        """
+        self._check_bank(bank)
+
+        target = self.windows[window]
+        target.view = self.banks[bank]
+        target.bank = bank
+
+    def control(self, address: int, value: int) -> None:
+        """
+        Called for writes to read-only windows, ignored unless a subclass decodes them
+        """
+
+    def detach(self) -> None:
+        """
+        Maps the windows back to plain RAM
+        """
+        for window in self.windows:
+            self.bus.map_ram(window.start, window.end)
+
+        self.windows.clear()
+
+    def close(self) -> None:
+        """
+        Detaches the windows and releases the banks, closing the buffer when it is an mmap
+        or a view of one
+        """
+        self.detach()
+
+        for bank in self.banks:
+            bank.release()
+
+        self.banks.clear()
+
+        data = self.data
+
+        if isinstance(data, memoryview):
+            owner = data.obj
+            data.release()
+            data = owner
+
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+    def _check_bank(self, bank: int) -> None:
+        if not 0 <= bank < len(self.banks):
+            raise IndexError(f"Bank {bank} out of range, the mapper has {len(self.banks)}")
+
+
+class UxRomMapper(CpuMapper):
+    """
+    16 KiB banks with a switchable window at 0x8000 and the last bank fixed at 0xC000
+    Writing to ROM selects the bank of the first window, like mapper 2 of iNES images
+    """
+    BANK_SIZE = 0x4000
+
+    def __init__(self, bus: AbstractCpuBus, data):
+        super().__init__(bus, data, self.BANK_SIZE)
+
+        self.add_window(0x8000, 0, writable=False)
+        self.add_window(0xC000, len(self.banks) - 1, writable=False)
+
+    def control(self, address: int, value: int) -> None:
+        self.switch(0, value % len(self.banks))
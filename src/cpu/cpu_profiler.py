@@ -0,0 +1,135 @@
+from .cpu_instruction_set import OPCODES
+
+from array import array
+from typing import Dict, List
+
+import json
+
+class CpuProfiler:
+    """
+    Execution counts collected by Cpu.run while assigned to cpu.profiler
+    All counters are preallocated arrays indexed by opcode or by address,
+    a profiled run only increments them
+    """
+    def __init__(self):
+        self.opcode_counts = array("Q", bytes(8 * 0x100))   # Executions by opcode
+        self.opcode_cycles = array("Q", bytes(8 * 0x100))   # Cycles by opcode, penalties included
+        self.pc_counts = array("Q", bytes(8 * 0x10000))     # Executions by instruction address
+        self.pc_cycles = array("Q", bytes(8 * 0x10000))     # Cycles by instruction address
+
+    def reset(self) -> None:
+        for counters in (self.opcode_counts, self.opcode_cycles, self.pc_counts, self.pc_cycles):
+            counters[:] = array("Q", bytes(8 * len(counters)))
+
+    def record(self, pc: int, opcode: int, cycles: int) -> None:
+        """
+        Counts one instruction, Cpu.step uses it, Cpu.run updates the arrays inline
+        """
+        self.opcode_counts[opcode] += 1
+        self.opcode_cycles[opcode] += cycles
+        self.pc_counts[pc] += 1
+        self.pc_cycles[pc] += cycles
+
+    @property
+    def instructions(self) -> int:
+        return sum(self.opcode_counts)
+
+    @property
+    def cycles(self) -> int:
+        return sum(self.opcode_cycles)
+
+    def mode_totals(self) -> Dict[str, Dict[str, int]]:
+        """
+        Instructions and cycles by addressing mode
+        """
+        totals: Dict[str, Dict[str, int]] = {}
+
+        for entry in OPCODES:
+            if not self.opcode_counts[entry.opcode]:
+                continue
+
+            total = totals.setdefault(entry.addressing_mode, {"instructions": 0, "cycles": 0})
+            total["instructions"] += self.opcode_counts[entry.opcode]
+            total["cycles"] += self.opcode_cycles[entry.opcode]
+
+        return totals
+
+    def hot_pcs(self, top: int = 20) -> List[Dict[str, int]]:
+        """
+        Addresses that took the most cycles, hottest first
+        """
+        addresses = sorted(
+            (pc for pc in range(0x10000) if self.pc_counts[pc]),
+            key=lambda pc: self.pc_cycles[pc],
+            reverse=True,
+        )
+
+        return [
+            {"pc": pc, "instructions": self.pc_counts[pc], "cycles": self.pc_cycles[pc]}
+            for pc in addresses[:top]
+        ]
+
+    def dump(self) -> Dict:
+        """
+        Machine readable summary, only opcodes and addresses that executed are listed
+        """
+        return {
+            "instructions": self.instructions,
+            "cycles": self.cycles,
+            "opcodes": {
+                f"{opcode:02X}": {
+                    "instruction": OPCODES[opcode].instruction,
+                    "addressing_mode": OPCODES[opcode].addressing_mode,
+                    "count": self.opcode_counts[opcode],
+                    "cycles": self.opcode_cycles[opcode],
+                }
+                for opcode in range(0x100)
+                if self.opcode_counts[opcode]
+            },
+            "pcs": {
+                f"{pc:04X}": {"count": self.pc_counts[pc], "cycles": self.pc_cycles[pc]}
+                for pc in range(0x10000)
+                if self.pc_counts[pc]
+            },
+            "addressing_modes": self.mode_totals(),
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.dump(), f, indent=2)
+
+    def report(self, top: int = 20) -> str:
+        """
+        Text report: hottest addresses, opcodes and addressing modes, by cycles
+        """
+        cycles = self.cycles or 1
+        lines = [f"{self.instructions} instructions, {self.cycles} cycles", ""]
+
+        lines.append(f"{'pc':6} {'count':>10} {'cycles':>12} {'%':>6}")
+
+        for entry in self.hot_pcs(top):
+            lines.append(
+                f"{entry['pc']:04X}   {entry['instructions']:10} {entry['cycles']:12} {100 * entry['cycles'] / cycles:6.2f}"
+            )
+
+        lines += ["", f"{'opcode':6} {'instr':5} {'mode':4} {'count':>10} {'cycles':>12} {'%':>6}"]
+
+        opcodes = sorted(
+            (opcode for opcode in range(0x100) if self.opcode_counts[opcode]),
+            key=lambda opcode: self.opcode_cycles[opcode],
+            reverse=True,
+        )
+
+        for opcode in opcodes[:top]:
+            entry = OPCODES[opcode]
+            lines.append(
+                f"{opcode:02X}     {entry.instruction:5} {entry.addressing_mode:4} {self.opcode_counts[opcode]:10} "
+                f"{self.opcode_cycles[opcode]:12} {100 * self.opcode_cycles[opcode] / cycles:6.2f}"
+            )
+
+        lines += ["", f"{'mode':6} {'count':>10} {'cycles':>12} {'%':>6}"]
+
+        for mode, total in sorted(self.mode_totals().items(), key=lambda item: item[1]["cycles"], reverse=True):
+            lines.append(f"{mode:6} {total['instructions']:10} {total['cycles']:12} {100 * total['cycles'] / cycles:6.2f}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,97 @@
+from .interfaces.abstract_cpu import AbstractCpu
+
+from itertools import count
+from typing import Callable, List, Optional, Tuple
+
+import heapq
+
+class ScheduledEvent:
+    """
+    Handle returned by CpuScheduler.schedule, only needed to cancel the event
+    """
+    __slots__ = ("cycle", "callback", "cancelled")
+
+    def __init__(self, cycle: int, callback: Callable[[int], None]):
+        self.cycle = cycle
+        self.callback = callback
+        self.cancelled = False
+
+
+class CpuScheduler:
+    """
+    Callbacks keyed by the cycle count they are due at, kept in a binary heap
+    Cpu.run executes straight-line code up to the earliest deadline and fires due
+    events between instructions, so scheduling or firing an event costs O(log n)
+    whatever the number of timers, and nothing is polled per instruction
+    Events due at the same cycle fire in the order they were scheduled
+    """
+    def __init__(self, cpu: Optional[AbstractCpu] = None):
+        self._heap: List[Tuple[int, int, ScheduledEvent]] = []
+        self._sequence = count()
+
+        # Cpu whose running slice is cut short by events scheduled during it
+        self.cpu = cpu
+
+        # Cycle of the earliest pending event, read by the run loop
+        self.deadline: float = float("inf")
+
+    def __len__(self) -> int:
+        return sum(not event.cancelled for _, _, event in self._heap)
+
+    def schedule(self, cycle: int, callback: Callable[[int], None]) -> ScheduledEvent:
+        """
+        Calls callback(cycle) once the cpu has executed up to cycle
+        It runs between instructions, on the first boundary at or after cycle
+        Scheduled from a read observer, the jit only sees it at the end of the compiled block
+        """
+        event = ScheduledEvent(cycle, callback)
+        heapq.heappush(self._heap, (cycle, next(self._sequence), event))
+
+        if cycle < self.deadline:
+            self.deadline = cycle
+
+            # The slice run() is executing may end after the new deadline
+            if self.cpu is not None and cycle < self.cpu._slice_end:
+                self.cpu._slice_end = cycle
+
+        return event
+
+    def cancel(self, event: ScheduledEvent) -> None:
+        """
+        Cancelled events stay in the heap and are skipped when they come up
+        """
+        event.cancelled = True
+        self._discard_cancelled()
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self.deadline = float("inf")
+
+    def run_due(self, cycle: int) -> int:
+        """
+        Fires every event due at or before cycle, including the ones scheduled by callbacks
+        Returns how many fired
+        """
+        heap = self._heap
+        fired = 0
+
+        while heap and heap[0][0] <= cycle:
+            _, _, event = heapq.heappop(heap)
+
+            if event.cancelled:
+                continue
+
+            event.callback(event.cycle)
+            fired += 1
+
+        self._discard_cancelled()
+
+        return fired
+
+    def _discard_cancelled(self) -> None:
+        heap = self._heap
+
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+
+        self.deadline = heap[0][0] if heap else float("inf")
@@ -0,0 +1,99 @@
+from .interfaces.abstract_cpu import AbstractCpu
+
+import struct
+import zlib
+
+# Snapshot layout, all fields little-endian:
+#   header    magic "6502", layout version, flags
+#   registers A, X, Y, SP, SR, PC
+#   helpers   addr_abs, addr_rel, fetched, opcode, cycles
+#   memory    64 KiB backing store of the bus
+# With FLAG_COMPRESSED set, everything after the header is zlib compressed
+SNAPSHOT_MAGIC = b"6502"
+SNAPSHOT_VERSION = 1
+
+FLAG_COMPRESSED = 1 << 0
+
+HEADER = struct.Struct("<4sBB")
+STATE = struct.Struct("<BBBBBHHHHBQ")
+MEMORY_SIZE = 0x10000
+
+SNAPSHOT_SIZE = HEADER.size + STATE.size + MEMORY_SIZE
+
+def pack_state(cpu: AbstractCpu) -> bytes:
+    """
+    Serializes registers, helpers and cycle count of a cpu, without memory
+    """
+    state = cpu.state
+
+    return STATE.pack(
+        state.register_A,
+        state.register_X,
+        state.register_Y,
+        state.register_SP,
+        state.register_SR,
+        state.register_PC,
+        state.addr_abs,
+        state.addr_rel,
+        state.fetched,
+        state.opcode,
+        state.cycles,
+    )
+
+def unpack_state(cpu: AbstractCpu, data: bytes) -> None:
+    """
+    Loads registers, helpers and cycle count serialized by pack_state
+    """
+    state = cpu.state
+
+    (
+        state.register_A,
+        state.register_X,
+        state.register_Y,
+        state.register_SP,
+        state.register_SR,
+        state.register_PC,
+        state.addr_abs,
+        state.addr_rel,
+        state.fetched,
+        state.opcode,
+        state.cycles,
+    ) = STATE.unpack_from(data)
+
+def take_snapshot(cpu: AbstractCpu, compressed: bool = False) -> bytes:
+    """
+    Serializes registers, helpers, cycle count and memory of a cpu
+    """
+    body = pack_state(cpu) + cpu.bus.ram
+
+    if compressed:
+        return HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, FLAG_COMPRESSED) + zlib.compress(body)
+
+    return HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0) + body
+
+def restore_snapshot(cpu: AbstractCpu, snapshot: bytes) -> None:
+    """
+    Loads a snapshot taken by take_snapshot, compressed or not, into a cpu
+    """
+    if len(snapshot) < HEADER.size:
+        raise ValueError(f"Snapshot too short: {len(snapshot)} bytes")
+
+    magic, version, flags = HEADER.unpack_from(snapshot)
+
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"{magic!r} is not a snapshot magic")
+
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}, expected {SNAPSHOT_VERSION}")
+
+    body = memoryview(snapshot)[HEADER.size:]
+
+    if flags & FLAG_COMPRESSED:
+        body = memoryview(zlib.decompress(body))
+
+    if len(body) != STATE.size + MEMORY_SIZE:
+        raise ValueError(f"Snapshot body is {len(body)} bytes, expected {STATE.size + MEMORY_SIZE}")
+
+    unpack_state(cpu, body)
+
+    cpu.bus.write_block(0x0000, body[STATE.size:])
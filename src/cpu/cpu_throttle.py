@@ -0,0 +1,120 @@
+from .interfaces.abstract_cpu import AbstractCpu
+
+from .cpu import ExitReason
+
+from time import perf_counter_ns, sleep
+from typing import NamedTuple, Optional
+
+# Common clock rates, in Hz
+ONE_MHZ = 1_000_000
+NTSC_NES = 1_789_773
+
+class ThrottleReport(NamedTuple):
+    cycles: int        # Cycles executed
+    elapsed_ns: int    # Wall time the run took
+    frequency: int     # Target clock rate, in Hz
+    slices: int        # Slices executed, pacing happens once per slice
+    max_lag_ns: int    # Furthest the emulation fell behind the wall clock
+    dropped_ns: int    # Lag beyond the tolerance that was given up instead of caught up
+
+    @property
+    def achieved_mhz(self) -> float:
+        return self.cycles * 1e3 / self.elapsed_ns if self.elapsed_ns else 0.0
+
+    @property
+    def target_mhz(self) -> float:
+        return self.frequency / 1e6
+
+
+class CpuThrottle:
+    """
+    Runs a cpu at a real clock rate instead of as fast as possible
+
+    Execution is cut into slices of slice_cycles, after each one the cycles done are
+    compared with the wall clock: when ahead the throttle sleeps until shortly before
+    the deadline and spins for the rest, which keeps jitter below the timer resolution
+    of sleep. When behind by more than tolerance_ns, the excess is dropped so that a
+    slow host or a paused process does not cause a burst of catch-up execution.
+    """
+    def __init__(
+        self,
+        cpu: AbstractCpu,
+        frequency: int = ONE_MHZ,
+        slice_cycles: Optional[int] = None,
+        tolerance_ns: int = 20_000_000,
+        spin_ns: int = 500_000,
+    ):
+        if frequency <= 0:
+            raise ValueError(f"Frequency has to be positive, got {frequency}")
+
+        self.cpu = cpu
+        self.frequency = frequency
+
+        # A millisecond of emulated time by default
+        self.slice_cycles = slice_cycles or max(1, frequency // 1000)
+
+        self.tolerance_ns = tolerance_ns
+        self.spin_ns = spin_ns
+
+    def run(self, max_cycles: Optional[int] = None) -> ThrottleReport:
+        """
+        Executes instructions at the target frequency until a BRK, a breakpoint,
+        a watchpoint or until max_cycles are used up
+        The reason the run stopped is kept in cpu.exit_reason
+        """
+        cpu = self.cpu
+        state = cpu.state
+
+        start_cycles = state.cycles
+        cycle_limit = start_cycles + max_cycles if max_cycles is not None else None
+
+        # Wall time at which cycle start_cycles is due, moved forward when lag is dropped
+        origin = perf_counter_ns()
+        start = origin
+
+        slices = 0
+        max_lag = 0
+        dropped = 0
+
+        while True:
+            budget = self.slice_cycles
+
+            if cycle_limit is not None:
+                budget = min(budget, cycle_limit - state.cycles)
+
+            # The cycle budget of a slice ends it, other exit reasons end the throttled run
+            cpu.run(max_cycles=budget)
+            slices += 1
+
+            finished = cpu.exit_reason != ExitReason.MAX_CYCLES or (
+                cycle_limit is not None and state.cycles >= cycle_limit
+            )
+
+            due = origin + (state.cycles - start_cycles) * 1_000_000_000 // self.frequency
+            now = perf_counter_ns()
+
+            if now < due:
+                if due - now > self.spin_ns:
+                    sleep((due - now - self.spin_ns) / 1e9)
+
+                while perf_counter_ns() < due:
+                    pass
+            else:
+                lag = now - due
+                max_lag = max(max_lag, lag)
+
+                if lag > self.tolerance_ns:
+                    dropped += lag - self.tolerance_ns
+                    origin += lag - self.tolerance_ns
+
+            if finished:
+                break
+
+        return ThrottleReport(
+            cycles=state.cycles - start_cycles,
+            elapsed_ns=perf_counter_ns() - start,
+            frequency=self.frequency,
+            slices=slices,
+            max_lag_ns=max_lag,
+            dropped_ns=dropped,
+        )
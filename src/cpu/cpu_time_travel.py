@@ -0,0 +1,249 @@
+from .interfaces.abstract_cpu import AbstractCpu
+
+from .cpu import ExitReason
+from .cpu_snapshot import pack_state, unpack_state
+
+from collections import deque
+from typing import Deque, List, NamedTuple, Optional, Tuple
+
+class Checkpoint(NamedTuple):
+    cycles: int     # Cycle count when it was taken
+    position: int   # Instructions recorded before it
+    snapshot: bytes # Full machine state, see cpu_snapshot
+
+
+class JournalEntry(NamedTuple):
+    registers: bytes                              # Registers before the instruction, see pack_state
+    writes: Optional[Tuple[Tuple[int, int], ...]] # Addresses written and their previous values
+
+
+class CpuTimeTravel:
+    """
+    Records execution so it can be stepped backwards
+
+    A full snapshot is taken every interval cycles and only the last window of them is kept.
+    Between snapshots every instruction journals the registers it started from and the old
+    value of every byte it wrote, so stepping back one instruction is an undo from the journal
+    and seeking to any recorded cycle is one snapshot restore plus a replay shorter than interval.
+    The journal starts at the oldest kept snapshot, which bounds memory to about
+    window snapshots plus interval * window cycles of instructions.
+
+    Replays assume execution is deterministic, devices with their own state are not rewound.
+    Journaled values come from the bus backing store, writes that devices absorb undo to no-ops.
+    While attached, a write observer covers the whole address space.
+    """
+    def __init__(self, cpu: AbstractCpu, interval: int = 100_000, window: int = 16, compressed: bool = False):
+        if interval <= 0 or window <= 0:
+            raise ValueError("interval and window have to be positive")
+
+        self.cpu = cpu
+        self.interval = interval
+        self.window = window
+        self.compressed = compressed
+
+        self.checkpoints: Deque[Checkpoint] = deque()
+        self.journal: Deque[JournalEntry] = deque()
+
+        # Writes of the instruction being recorded, None while not recording
+        self._writes: Optional[List[Tuple[int, int]]] = None
+        self._next_checkpoint = 0
+
+    @property
+    def position(self) -> int:
+        """
+        Instructions recorded since attach(), minus the ones stepped back
+        """
+        return self.checkpoints[0].position + len(self.journal)
+
+    @property
+    def oldest_cycle(self) -> int:
+        """
+        Earliest cycle that can still be reached
+        """
+        return self.checkpoints[0].cycles
+
+    def attach(self) -> None:
+        """
+        Starts recording from the current state
+        """
+        self.checkpoints.clear()
+        self.journal.clear()
+
+        self.cpu.bus.add_write_observer(0x0000, 0xFFFF, self._on_write)
+        self._checkpoint(0)
+
+    def detach(self) -> None:
+        self.cpu.bus.remove_write_observer(0x0000, 0xFFFF, self._on_write)
+
+        self.checkpoints.clear()
+        self.journal.clear()
+
+    def step(self) -> int:
+        """
+        Executes and records a single instruction, see Cpu.step
+        """
+        cpu = self.cpu
+        registers = pack_state(cpu)
+
+        self._writes = []
+
+        try:
+            cycles = cpu.step()
+        finally:
+            writes = self._writes
+            self._writes = None
+
+        self.journal.append(JournalEntry(registers, tuple(writes) if writes else None))
+
+        if cpu.state.cycles >= self._next_checkpoint:
+            self._checkpoint(self.position)
+
+        return cycles
+
+    def run(self, max_cycles: Optional[int] = None, max_instructions: Optional[int] = None) -> int:
+        """
+        Executes and records instructions with the stop conditions of Cpu.run,
+        breakpoints and watchpoints included
+        Returns the cycles consumed
+        """
+        cpu = self.cpu
+        state = cpu.state
+
+        start = state.cycles
+        cycle_limit = start + max_cycles if max_cycles is not None else float("inf")
+        executed = 0
+
+        while True:
+            if max_instructions is not None and executed >= max_instructions:
+                cpu.exit_reason = ExitReason.MAX_INSTRUCTIONS
+                break
+
+            self.step()
+            executed += 1
+
+            if cpu.exit_reason is not None:
+                break
+
+            if state.register_PC in cpu.breakpoints:
+                cpu.exit_reason = ExitReason.BREAKPOINT
+                break
+
+            if state.cycles >= cycle_limit:
+                cpu.exit_reason = ExitReason.MAX_CYCLES
+                break
+
+        return state.cycles - start
+
+    def reverse_step(self) -> bool:
+        """
+        Undoes the last recorded instruction
+        Returns False when the oldest kept state is reached
+        """
+        if not self.journal:
+            return False
+
+        self._undo(self.journal.pop())
+        self._drop_future()
+
+        return True
+
+    def reverse_continue(self) -> Optional[ExitReason]:
+        """
+        Steps back until the program counter reaches a breakpoint,
+        or until an undone instruction wrote to a watched address
+        Returns the matching ExitReason, or None when the oldest kept state is reached
+        """
+        cpu = self.cpu
+        watched = [(watchpoint.start, watchpoint.end) for watchpoint in cpu.watchpoints if watchpoint.write]
+
+        while self.journal:
+            entry = self.journal.pop()
+            self._undo(entry)
+
+            if cpu.state.register_PC in cpu.breakpoints:
+                reason = ExitReason.BREAKPOINT
+                break
+
+            if entry.writes and any(start <= address <= end for address, _ in entry.writes for start, end in watched):
+                reason = ExitReason.WATCHPOINT
+                break
+        else:
+            reason = None
+
+        self._drop_future()
+        cpu.exit_reason = reason
+
+        return reason
+
+    def seek(self, cycle: int) -> int:
+        """
+        Moves to the first instruction boundary at or after cycle
+        Going back restores the closest earlier snapshot and replays from there
+        Returns the cycle count reached
+        """
+        state = self.cpu.state
+
+        if cycle < self.oldest_cycle:
+            raise ValueError(f"Cycle {cycle} is before the oldest kept snapshot at {self.oldest_cycle}")
+
+        if cycle < state.cycles:
+            while len(self.checkpoints) > 1 and self.checkpoints[-1].cycles > cycle:
+                self.checkpoints.pop()
+
+            checkpoint = self.checkpoints[-1]
+
+            while self.position > checkpoint.position:
+                self.journal.pop()
+
+            # The observer would be told about all 64 KiB of the restore
+            self.cpu.bus.remove_write_observer(0x0000, 0xFFFF, self._on_write)
+            self.cpu.restore(checkpoint.snapshot)
+            self.cpu.bus.add_write_observer(0x0000, 0xFFFF, self._on_write)
+
+            self._next_checkpoint = checkpoint.cycles + self.interval
+
+        while state.cycles < cycle:
+            self.step()
+
+            if self.cpu.exit_reason == ExitReason.BRK:
+                break
+
+        return state.cycles
+
+    def _on_write(self, address: int, data: int) -> None:
+        writes = self._writes
+
+        if writes is not None:
+            writes.append((address, self.cpu.bus.ram[address]))
+
+    def _undo(self, entry: JournalEntry) -> None:
+        bus = self.cpu.bus
+
+        if entry.writes:
+            for address, value in reversed(entry.writes):
+                # Block writes skip devices and tell the other observers, the jit included
+                bus.write_block(address, bytes((value,)))
+
+        unpack_state(self.cpu, entry.registers)
+
+    def _drop_future(self) -> None:
+        """
+        Forgets snapshots taken after the current position
+        """
+        while len(self.checkpoints) > 1 and self.checkpoints[-1].position > self.position:
+            self.checkpoints.pop()
+
+        self._next_checkpoint = self.checkpoints[-1].cycles + self.interval
+
+    def _checkpoint(self, position: int) -> None:
+        cycles = self.cpu.state.cycles
+
+        self.checkpoints.append(Checkpoint(cycles, position, self.cpu.snapshot(self.compressed)))
+        self._next_checkpoint = cycles + self.interval
+
+        # Evicting the oldest snapshot also forgets the journal leading to the next one
+        while len(self.checkpoints) > self.window:
+            evicted = self.checkpoints.popleft()
+
+            for _ in range(self.checkpoints[0].position - evicted.position):
+                self.journal.popleft()
@@ -0,0 +1,87 @@
+from .interfaces.abstract_trace_sink import AbstractTraceSink
+from .cpu_instruction_set import OPCODES
+
+from abc import abstractmethod
+from enum import IntEnum
+from typing import List, TextIO
+
+class TraceLevel(IntEnum):
+    OFF = 0  # No output, the cpu runs headless
+    PC = 1   # Address of every executed instruction
+    FULL = 2 # Instruction, registers and flags after every instruction
+
+
+class TraceSink(AbstractTraceSink):
+    """
+    Formats records as text lines, subclasses decide where the lines go
+    """
+    def __init__(self, level: TraceLevel = TraceLevel.FULL):
+        self.level = TraceLevel(level)
+
+    def record(self, cpu, pc: int) -> None:
+        """
+        Formats the instruction executed at pc and hands it to the sink
+        """
+        if self.level == TraceLevel.PC:
+            self._emit(f"{pc:04X}\n")
+            return
+
+        state = cpu.state
+        entry = OPCODES[state.opcode]
+
+        self._emit(
+            f"{pc:04X}  {state.opcode:02X}  {entry.operation} {entry.addressing_mode}  "
+            f"A:{state.register_A:02X} X:{state.register_X:02X} Y:{state.register_Y:02X} "
+            f"SP:{state.register_SP:02X} SR:{state.register_SR:08b}\n"
+        )
+
+    @abstractmethod
+    def _emit(self, line: str) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+
+class StreamTraceSink(TraceSink):
+    """
+    Writes every record straight to a text stream, such as sys.stdout
+    """
+    def __init__(self, stream: TextIO, level: TraceLevel = TraceLevel.FULL):
+        super().__init__(level)
+        self.stream = stream
+
+    def _emit(self, line: str) -> None:
+        self.stream.write(line)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class BufferedFileTraceSink(TraceSink):
+    """
+    Collects records in memory and writes them to a file in bulk
+    """
+    def __init__(self, path: str, level: TraceLevel = TraceLevel.FULL, buffer_size: int = 8192):
+        super().__init__(level)
+        self.buffer_size = buffer_size
+        self._buffer: List[str] = []
+        self._file = open(path, "w")
+
+    def _emit(self, line: str) -> None:
+        self._buffer.append(line)
+
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self._file.write("".join(self._buffer))
+        self._buffer.clear()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
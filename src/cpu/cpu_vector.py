@@ -0,0 +1,568 @@
+"""
+Lockstep execution of many cpus with NumPy, for fuzzing and search workloads
+
+Every register is an array with one entry per lane and memory is a lanes x 64 KiB array.
+A step executes one instruction on every running lane: lanes are grouped by opcode and
+each group runs its addressing mode and operation as array operations, so lanes that
+diverge only split into more groups. Semantics are those of CpuInstructions lane by lane,
+ALU results come from the same tables.
+
+Memory is plain RAM, there are no devices, observers, interrupts or scheduled events.
+numpy is optional, CpuVector raises RuntimeError without it.
+"""
+from .cpu import Cpu, ExitReason
+from .cpu_alu_tables import load_tables
+from .cpu_instruction_set import IMPLIED_OPCODES, OPCODES
+from .cpu_snapshot import HEADER, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, STATE
+
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Operations that take an extra cycle when their addressing mode crosses a page
+PAGE_PENALTY_OPERATIONS = frozenset({"ADC", "AND", "CMP", "EOR", "LDA", "LDX", "LDY", "ORA", "SBC"})
+
+# Read-modify-write opcodes working on the accumulator
+ACCUMULATOR_OPCODES = frozenset({0x0A, 0x2A, 0x4A, 0x6A})
+
+# Branches by the flag they test and the value that takes them
+BRANCHES = {
+    "BCC": ("c", 0), "BCS": ("c", 1), "BNE": ("z", 0), "BEQ": ("z", 1),
+    "BPL": ("n", 0), "BMI": ("n", 1), "BVC": ("v", 0), "BVS": ("v", 1),
+}
+
+# Flags in status register bit order
+FLAGS = ("c", "z", "i", "d", "b", "u", "v", "n")
+
+# Per lane exit codes, 0 while running
+EXIT_REASONS = (None, ExitReason.BRK, ExitReason.MAX_CYCLES, ExitReason.MAX_INSTRUCTIONS)
+EXIT_BRK, EXIT_MAX_CYCLES, EXIT_MAX_INSTRUCTIONS = 1, 2, 3
+
+
+@lru_cache(maxsize=None)
+def _tables() -> Dict[str, "numpy.ndarray"]:
+    """
+    The ALU tables of cpu_alu_tables as integer arrays, one column per tuple field
+    """
+    return {name: numpy.array(table, dtype=numpy.int64) for name, table in load_tables().items()}
+
+
+class CpuVector:
+    """
+    Runs lanes independent cpus in lockstep, see the module docstring
+    Registers, flags and helper fields are int64 arrays named after the scalar state
+    (a, x, y, sp, pc, c, z... addr_abs, fetched), ram is a uint8 array of lanes x 64 KiB
+    """
+    def __init__(self, lanes: int):
+        if numpy is None:
+            raise RuntimeError("CpuVector needs numpy")
+
+        if lanes <= 0:
+            raise ValueError(f"Lane count has to be positive, got {lanes}")
+
+        self.lanes = lanes
+        self.ram = numpy.zeros((lanes, 0x10000), dtype=numpy.uint8)
+
+        for name in ("a", "x", "y", "sp", "pc", "addr_abs", "addr_rel", "fetched", "opcode", "cycles") + FLAGS:
+            setattr(self, name, numpy.zeros(lanes, dtype=numpy.int64))
+
+        self.exit_codes = numpy.zeros(lanes, dtype=numpy.uint8)
+
+        self._tables = _tables()
+        self._dispatch = self._build_dispatch()
+
+    def _build_dispatch(self) -> Tuple[Tuple[Callable, Callable, int, bool], ...]:
+        """
+        Binds every opcode to (addressing_mode, operation, base_cycles, page_penalty)
+        """
+        return tuple(
+            (
+                getattr(self, f"_mode_{entry.addressing_mode}"),
+                getattr(self, f"_op_{entry.operation}"),
+                entry.cycles,
+                entry.operation in PAGE_PENALTY_OPERATIONS,
+            )
+            for entry in OPCODES
+        )
+
+    @property
+    def sr(self) -> "numpy.ndarray":
+        """
+        Status register of every lane
+        """
+        return self._sr(slice(None))
+
+    def load(self, program: bytes, address: int = 0x0000, start: Optional[int] = None) -> None:
+        """
+        Places the same program in every lane, like Cpu.load
+        """
+        if address < 0 or address + len(program) > 0x10000:
+            raise IndexError(f'Block out of range: {address:#06x} + {len(program)} > 0x10000')
+
+        self.ram[:, address:address + len(program)] = numpy.frombuffer(bytes(program), dtype=numpy.uint8)
+
+        self.pc[:] = address if start is None else start
+        self.z[:] = 1
+        self.i[:] = 1
+
+    def set_lane(self, lane: int, cpu: Cpu) -> None:
+        """
+        Copies the registers, helpers, cycle count and memory of a scalar cpu into a lane
+        """
+        self._unpack(lane, cpu.snapshot())
+
+    def lane_cpu(self, lane: int, **kwargs) -> Cpu:
+        """
+        Returns a scalar Cpu in the state of a lane, kwargs go to the Cpu constructor
+        """
+        cpu = Cpu(**kwargs)
+        cpu.restore(self.lane_snapshot(lane))
+
+        return cpu
+
+    def lane_snapshot(self, lane: int) -> bytes:
+        """
+        State of a lane in the format of Cpu.snapshot
+        """
+        return HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0) + STATE.pack(
+            int(self.a[lane]), int(self.x[lane]), int(self.y[lane]), int(self.sp[lane]),
+            int(self._sr(lane)), int(self.pc[lane]),
+            int(self.addr_abs[lane]), int(self.addr_rel[lane]), int(self.fetched[lane]),
+            int(self.opcode[lane]), int(self.cycles[lane]),
+        ) + self.ram[lane].tobytes()
+
+    def exit_reason(self, lane: int) -> Optional[ExitReason]:
+        return EXIT_REASONS[self.exit_codes[lane]]
+
+    def step(self, lanes: Optional["numpy.ndarray"] = None) -> None:
+        """
+        Executes one instruction on the given lane indices, all lanes by default
+        """
+        idx = numpy.arange(self.lanes) if lanes is None else numpy.asarray(lanes, dtype=numpy.int64)
+
+        if not len(idx):
+            return
+
+        pc = self.pc[idx]
+        opcodes = self.ram[idx, pc].astype(numpy.int64)
+
+        self.opcode[idx] = opcodes
+        self.pc[idx] = (pc + 1) & 0xFFFF
+
+        first = opcodes[0]
+
+        # Lanes running the same code usually share the opcode
+        if (opcodes == first).all():
+            self._execute(int(first), idx)
+            return
+
+        order = numpy.argsort(opcodes, kind="stable")
+        idx = idx[order]
+        opcodes = opcodes[order]
+
+        starts = numpy.flatnonzero(numpy.diff(opcodes)) + 1
+
+        for group in numpy.split(numpy.arange(len(idx)), starts):
+            self._execute(int(opcodes[group[0]]), idx[group])
+
+    def run(self, max_cycles: Optional[int] = None, max_instructions: Optional[int] = None) -> "numpy.ndarray":
+        """
+        Steps every lane until it executes a BRK or uses up its budget, like Cpu.run on each lane
+        Stopped lanes are masked out while the others carry on, exit reasons are kept per lane
+        Returns the cycles consumed by every lane
+        """
+        start = self.cycles.copy()
+        limit = start + max_cycles if max_cycles is not None else None
+
+        self.exit_codes[:] = 0
+        running = numpy.arange(self.lanes)
+        executed = 0
+
+        while len(running):
+            if max_instructions is not None and executed >= max_instructions:
+                self.exit_codes[running] = EXIT_MAX_INSTRUCTIONS
+                break
+
+            self.step(running)
+            executed += 1
+
+            brk = self.opcode[running] == 0x00
+            self.exit_codes[running[brk]] = EXIT_BRK
+
+            done = brk
+
+            if limit is not None:
+                spent = ~brk & (self.cycles[running] >= limit[running])
+                self.exit_codes[running[spent]] = EXIT_MAX_CYCLES
+                done = brk | spent
+
+            if done.any():
+                running = running[~done]
+
+        return self.cycles - start
+
+    def _execute(self, opcode: int, idx: "numpy.ndarray") -> None:
+        addressing_mode, operation, cycles, page_penalty = self._dispatch[opcode]
+
+        crossed = addressing_mode(idx)
+        operation(opcode, idx)
+
+        # Branch penalties were added by the operation
+        if page_penalty and crossed is not None:
+            self.cycles[idx] += cycles + crossed
+        else:
+            self.cycles[idx] += cycles
+
+    # Memory and status register
+
+    def _read(self, idx: "numpy.ndarray", address: "numpy.ndarray") -> "numpy.ndarray":
+        return self.ram[idx, address & 0xFFFF].astype(numpy.int64)
+
+    def _write(self, idx: "numpy.ndarray", address: "numpy.ndarray", value: "numpy.ndarray") -> None:
+        self.ram[idx, address & 0xFFFF] = value
+
+    def _read_operand(self, idx: "numpy.ndarray") -> "numpy.ndarray":
+        pc = self.pc[idx]
+        self.pc[idx] = (pc + 1) & 0xFFFF
+
+        return self._read(idx, pc)
+
+    def _sr(self, idx) -> "numpy.ndarray":
+        value = 0
+
+        for bit, flag in enumerate(FLAGS):
+            value = value | getattr(self, flag)[idx] << bit
+
+        return value
+
+    def _set_sr(self, idx: "numpy.ndarray", value: "numpy.ndarray") -> None:
+        for bit, flag in enumerate(FLAGS):
+            getattr(self, flag)[idx] = value >> bit & 1
+
+    def _push(self, idx: "numpy.ndarray", value: "numpy.ndarray") -> None:
+        sp = self.sp[idx]
+        self._write(idx, 0x0100 + sp, value)
+        self.sp[idx] = (sp - 1) & 0xFF
+
+    def _pull(self, idx: "numpy.ndarray") -> "numpy.ndarray":
+        sp = (self.sp[idx] + 1) & 0xFF
+        self.sp[idx] = sp
+
+        return self._read(idx, 0x0100 + sp)
+
+    def _fetch(self, opcode: int, idx: "numpy.ndarray") -> "numpy.ndarray":
+        if opcode not in IMPLIED_OPCODES:
+            self.fetched[idx] = self._read(idx, self.addr_abs[idx])
+
+        return self.fetched[idx]
+
+    def _set_nz(self, idx: "numpy.ndarray", value: "numpy.ndarray") -> None:
+        nz = self._tables["NZ"][value]
+        self.z[idx] = nz[:, 0]
+        self.n[idx] = nz[:, 1]
+
+    # Addressing modes, return the lanes that crossed a page or None
+
+    def _mode_IMP(self, idx):
+        self.fetched[idx] = self.a[idx]
+
+    def _mode_IMM(self, idx):
+        pc = self.pc[idx]
+        self.addr_abs[idx] = pc
+        self.pc[idx] = (pc + 1) & 0xFFFF
+
+    def _mode_ZP0(self, idx):
+        self.addr_abs[idx] = self._read_operand(idx) & 0xFF
+
+    def _mode_ZPX(self, idx):
+        self.addr_abs[idx] = (self._read_operand(idx) + self.x[idx]) & 0xFF
+
+    def _mode_ZPY(self, idx):
+        self.addr_abs[idx] = (self._read_operand(idx) + self.y[idx]) & 0xFF
+
+    def _mode_REL(self, idx):
+        offset = self._read_operand(idx)
+        self.addr_rel[idx] = numpy.where(offset & 0x80, offset | 0xFF00, offset)
+
+    def _mode_ABS(self, idx):
+        low = self._read_operand(idx)
+        high = self._read_operand(idx)
+        self.addr_abs[idx] = high << 8 | low
+
+    def _indexed(self, idx, index):
+        low = self._read_operand(idx)
+        high = self._read_operand(idx)
+
+        address = ((high << 8 | low) + index) & 0xFFFF
+        self.addr_abs[idx] = address
+
+        return (address >> 8) != high
+
+    def _mode_ABX(self, idx):
+        return self._indexed(idx, self.x[idx])
+
+    def _mode_ABY(self, idx):
+        return self._indexed(idx, self.y[idx])
+
+    def _mode_IND(self, idx):
+        low = self._read_operand(idx)
+        high = self._read_operand(idx)
+
+        # Same page boundary handling as CpuAddressingModes.IND
+        wraps = low == 0xFF
+        pointer = numpy.where(wraps, (high + 1) << 8, high << 8 | low)
+
+        self.addr_abs[idx] = self._read(idx, pointer + 1) << 8 | self._read(idx, pointer)
+
+    def _mode_IZX(self, idx):
+        pointer = (self._read_operand(idx) + self.x[idx]) & 0xFF
+        self.addr_abs[idx] = self._read(idx, pointer + 1) << 8 | self._read(idx, pointer)
+
+    def _mode_IZY(self, idx):
+        pointer = self._read_operand(idx) & 0xFF
+
+        high = self._read(idx, pointer + 1)
+        address = ((high << 8 | self._read(idx, pointer)) + self.y[idx]) & 0xFFFF
+        self.addr_abs[idx] = address
+
+        return (address >> 8) != high
+
+    # Operations
+
+    def _add(self, idx, operand):
+        index = self.c[idx] << 16 | self.a[idx] << 8 | operand
+        result = self._tables["ADC"][index]
+
+        self.a[idx] = result[:, 0]
+        self.c[idx] = result[:, 1]
+        self.z[idx] = result[:, 2]
+        self.n[idx] = result[:, 3]
+        self.v[idx] = result[:, 4]
+
+    def _op_ADC(self, opcode, idx):
+        self._add(idx, self._fetch(opcode, idx))
+
+    def _op_SBC(self, opcode, idx):
+        self._add(idx, self._fetch(opcode, idx) ^ 0xFF)
+
+    def _op_AND(self, opcode, idx):
+        self.a[idx] &= self._fetch(opcode, idx)
+        self._set_nz(idx, self.a[idx])
+
+    def _op_EOR(self, opcode, idx):
+        self.a[idx] ^= self._fetch(opcode, idx)
+        self._set_nz(idx, self.a[idx])
+
+    def _op_ORA(self, opcode, idx):
+        self.a[idx] |= self._fetch(opcode, idx)
+        self._set_nz(idx, self.a[idx])
+
+    def _shift(self, table, opcode, idx, index):
+        result = self._tables[table][index]
+
+        self.c[idx] = result[:, 1]
+        self.z[idx] = result[:, 2]
+        self.n[idx] = result[:, 3]
+
+        if opcode in ACCUMULATOR_OPCODES:
+            self.a[idx] = result[:, 0]
+        else:
+            self._write(idx, self.addr_abs[idx], result[:, 0])
+
+    def _op_ASL(self, opcode, idx):
+        self._shift("ASL", opcode, idx, self._fetch(opcode, idx))
+
+    def _op_LSR(self, opcode, idx):
+        self._shift("LSR", opcode, idx, self._fetch(opcode, idx))
+
+    def _op_ROL(self, opcode, idx):
+        self._shift("ROL", opcode, idx, self.c[idx] << 8 | self._fetch(opcode, idx))
+
+    def _op_ROR(self, opcode, idx):
+        self._shift("ROR", opcode, idx, self.c[idx] << 8 | self._fetch(opcode, idx))
+
+    def _branch(self, opcode, idx):
+        flag, value = BRANCHES[OPCODES[opcode].operation]
+        taken = idx[getattr(self, flag)[idx] == value]
+
+        if not len(taken):
+            return
+
+        pc = self.pc[taken]
+        target = (pc + self.addr_rel[taken]) & 0xFFFF
+
+        self.addr_abs[taken] = target
+        self.cycles[taken] += 1 + ((target & 0xFF00) != (pc & 0xFF00))
+        self.pc[taken] = target
+
+    _op_BCC = _op_BCS = _op_BEQ = _op_BMI = _op_BNE = _op_BPL = _op_BVC = _op_BVS = _branch
+
+    def _op_BIT(self, opcode, idx):
+        fetched = self._fetch(opcode, idx)
+
+        self.z[idx] = (self.a[idx] & fetched) == 0
+        self.n[idx] = fetched >> 7 & 1
+        self.v[idx] = fetched >> 6 & 1
+
+    def _op_BRK(self, opcode, idx):
+        pc = (self.pc[idx] + 1) & 0xFFFF
+
+        self.i[idx] = 1
+
+        self._push(idx, pc >> 8)
+        self._push(idx, pc & 0xFF)
+
+        self.b[idx] = 1
+        self._push(idx, self._sr(idx))
+        self.b[idx] = 0
+
+        self.pc[idx] = self._read(idx, numpy.full(len(idx), 0xFFFF)) << 8 | self._read(idx, numpy.full(len(idx), 0xFFFE))
+
+    def _clear(flag: str):
+        def operation(self, opcode, idx):
+            getattr(self, flag)[idx] = 0
+
+        return operation
+
+    def _set(flag: str):
+        def operation(self, opcode, idx):
+            getattr(self, flag)[idx] = 1
+
+        return operation
+
+    _op_CLC, _op_CLD, _op_CLI, _op_CLV = _clear("c"), _clear("d"), _clear("i"), _clear("v")
+    _op_SEC, _op_SED, _op_SEI = _set("c"), _set("d"), _set("i")
+
+    def _compare(self, idx, register, operand):
+        result = self._tables["COMPARE"][register << 8 | operand]
+
+        self.c[idx] = result[:, 0]
+        self.z[idx] = result[:, 1]
+        self.n[idx] = result[:, 2]
+
+    def _op_CMP(self, opcode, idx):
+        self._compare(idx, self.a[idx], self._fetch(opcode, idx))
+
+    def _op_CPX(self, opcode, idx):
+        self._compare(idx, self.x[idx], self._fetch(opcode, idx))
+
+    def _op_CPY(self, opcode, idx):
+        self._compare(idx, self.y[idx], self._fetch(opcode, idx))
+
+    def _op_DEC(self, opcode, idx):
+        value = (self._fetch(opcode, idx) - 1) & 0xFF
+        self._write(idx, self.addr_abs[idx], value)
+        self._set_nz(idx, value)
+
+    def _op_INC(self, opcode, idx):
+        value = (self._fetch(opcode, idx) + 1) & 0xFF
+        self._write(idx, self.addr_abs[idx], value)
+        self._set_nz(idx, value)
+
+    def _step_register(register: str, delta: int):
+        def operation(self, opcode, idx):
+            values = getattr(self, register)
+            values[idx] = (values[idx] + delta) & 0xFF
+            self._set_nz(idx, values[idx])
+
+        return operation
+
+    _op_DEX, _op_DEY = _step_register("x", -1), _step_register("y", -1)
+    _op_INX, _op_INY = _step_register("x", 1), _step_register("y", 1)
+
+    def _op_JMP(self, opcode, idx):
+        self.pc[idx] = self.addr_abs[idx]
+
+    def _op_JSR(self, opcode, idx):
+        pc = (self.pc[idx] - 1) & 0xFFFF
+
+        self._push(idx, pc >> 8)
+        self._push(idx, pc & 0xFF)
+
+        self.pc[idx] = self.addr_abs[idx]
+
+    def _load(register: str):
+        def operation(self, opcode, idx):
+            fetched = self._fetch(opcode, idx)
+            getattr(self, register)[idx] = fetched
+            self._set_nz(idx, fetched)
+
+        return operation
+
+    _op_LDA, _op_LDX, _op_LDY = _load("a"), _load("x"), _load("y")
+
+    def _store(register: str):
+        def operation(self, opcode, idx):
+            self._write(idx, self.addr_abs[idx], getattr(self, register)[idx])
+
+        return operation
+
+    _op_STA, _op_STX, _op_STY = _store("a"), _store("x"), _store("y")
+
+    def _transfer(source: str, target: str, flags: bool = True):
+        def operation(self, opcode, idx):
+            values = getattr(self, source)[idx]
+            getattr(self, target)[idx] = values
+
+            if flags:
+                self._set_nz(idx, values)
+
+        return operation
+
+    _op_TAX, _op_TAY, _op_TSX = _transfer("a", "x"), _transfer("a", "y"), _transfer("sp", "x")
+    _op_TXA, _op_TYA, _op_TXS = _transfer("x", "a"), _transfer("y", "a"), _transfer("x", "sp", flags=False)
+
+    def _op_NOP(self, opcode, idx):
+        pass
+
+    _op_XXX = _op_NOP
+
+    def _op_PHA(self, opcode, idx):
+        self._push(idx, self.a[idx])
+
+    def _op_PHP(self, opcode, idx):
+        # Pushed with B and U set, both are clear afterwards, like CpuInstructions.PHP
+        self.b[idx] = 1
+        self.u[idx] = 1
+        self._push(idx, self._sr(idx))
+        self.b[idx] = 0
+        self.u[idx] = 0
+
+    def _op_PLA(self, opcode, idx):
+        self.a[idx] = self._pull(idx)
+        self._set_nz(idx, self.a[idx])
+
+    def _op_PLP(self, opcode, idx):
+        self._set_sr(idx, self._pull(idx))
+        self.u[idx] = 1
+
+    def _op_RTI(self, opcode, idx):
+        self._set_sr(idx, self._pull(idx))
+        self.b[idx] = 0
+        self.u[idx] = 0
+
+        low = self._pull(idx)
+        self.pc[idx] = self._pull(idx) << 8 | low
+
+    def _op_RTS(self, opcode, idx):
+        low = self._pull(idx)
+        self.pc[idx] = ((self._pull(idx) << 8 | low) + 1) & 0xFFFF
+
+    del _clear, _set, _step_register, _load, _store, _transfer
+
+    def _unpack(self, lane: int, snapshot: bytes) -> None:
+        body = memoryview(snapshot)[HEADER.size:]
+
+        (
+            self.a[lane], self.x[lane], self.y[lane], self.sp[lane], sr, self.pc[lane],
+            self.addr_abs[lane], self.addr_rel[lane], self.fetched[lane], self.opcode[lane], self.cycles[lane],
+        ) = STATE.unpack_from(body)
+
+        for bit, flag in enumerate(FLAGS):
+            getattr(self, flag)[lane] = sr >> bit & 1
+
+        self.ram[lane] = numpy.frombuffer(body[STATE.size:], dtype=numpy.uint8)
@@ -0,0 +1,50 @@
+from .interfaces.abstract_cpu import AbstractCpu
+
+from typing import NamedTuple, Optional
+
+class WatchHit(NamedTuple):
+    access: str  # "read" or "write"
+    address: int
+    value: int   # Value read, or value about to be written
+
+
+class Watchpoint:
+    """
+    Reports accesses to the addresses from start to end (inclusive) to its cpu
+    It is attached to the bus as a read and/or write observer, so only the pages
+    it covers pay for the address check
+    """
+    def __init__(self, cpu: AbstractCpu, start: int, end: Optional[int] = None, read: bool = False, write: bool = True):
+        if not (read or write):
+            raise ValueError("A watchpoint has to watch reads, writes or both")
+
+        self.cpu = cpu
+        self.start = start
+        self.end = start if end is None else end
+        self.read = read
+        self.write = write
+
+        if not 0 <= self.start <= self.end <= 0xFFFF:
+            raise ValueError(f"Range {self.start:#06x}-{self.end:#06x} is not inside the address space")
+
+    def attach(self) -> None:
+        if self.read:
+            self.cpu.bus.add_read_observer(self.start, self.end, self.on_read)
+
+        if self.write:
+            self.cpu.bus.add_write_observer(self.start, self.end, self.on_write)
+
+    def detach(self) -> None:
+        if self.read:
+            self.cpu.bus.remove_read_observer(self.start, self.end, self.on_read)
+
+        if self.write:
+            self.cpu.bus.remove_write_observer(self.start, self.end, self.on_write)
+
+    def on_read(self, address: int, value: int) -> None:
+        if self.start <= address <= self.end:
+            self.cpu.watch_hit = WatchHit("read", address, value)
+
+    def on_write(self, address: int, value: int) -> None:
+        if self.start <= address <= self.end:
+            self.cpu.watch_hit = WatchHit("write", address, value)
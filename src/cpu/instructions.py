@@ -1,23 +1,17 @@
-import json
-
-with open("data/instruction_set.json", "r") as file:
-    instruction_set = json.load(file)
+from .cpu_instruction_set import MNEMONICS, OPCODES
 
 class Instructions:
-    lookup = instruction_set
+    lookup = OPCODES
 
     def _fetch(self):
-        instruction = list(filter(
-            lambda x: x["instruction"] == self.opcode,
-            self.lookup
-        ))
+        opcodes = MNEMONICS.get(self.opcode)
 
-        if len(instruction) == 0:
+        if not opcodes:
             raise KeyError(f"{self.opcode} is a invalid Opcode")
 
         self.fetched = 0
 
-        if not instruction[0]["addressing_mode"] == "IMP":
+        if not self.lookup[opcodes[0]].addressing_mode == "IMP":
             self.fetched = self.read(self.addr_abs)
 
         return self.fetched
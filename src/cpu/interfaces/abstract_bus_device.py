@@ -0,0 +1,10 @@
+from abc import ABC, abstractmethod
+
+class AbstractBusDevice(ABC):
+    @abstractmethod
+    def read(self, address: int) -> int:
+        pass
+
+    @abstractmethod
+    def write(self, address: int, value: int) -> None:
+        pass
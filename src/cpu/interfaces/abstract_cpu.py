@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
 from .abstract_cpu_addressing_modes import AbstractCpuAddressingModes
 from .abstract_cpu_bus import AbstractCpuBus
@@ -13,7 +14,11 @@ class AbstractCpu(ABC):
         self.state: AbstractCpuStateHandler
 
     @abstractmethod
-    def run(self) -> None:
+    def step(self) -> int:
+        pass
+
+    @abstractmethod
+    def run(self, max_cycles: Optional[int] = None, max_instructions: Optional[int] = None) -> int:
         pass
 
     @abstractmethod
@@ -22,4 +27,8 @@ class AbstractCpu(ABC):
 
     @abstractmethod
     def reset(self) -> None:
+        pass
+
+    @abstractmethod
+    def start_at(self, address: int) -> None:
         pass
\ No newline at end of file
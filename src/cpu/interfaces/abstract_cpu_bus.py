@@ -10,5 +10,13 @@ class AbstractCpuBus(ABC):
         pass
 
     @abstractmethod
-    def load(self, program: bytearray) -> None:
-        pass
\ No newline at end of file
+    def load(self, program: bytes, address: int = 0x0000) -> None:
+        pass
+
+    @abstractmethod
+    def read_block(self, address: int, length: int) -> memoryview:
+        pass
+
+    @abstractmethod
+    def write_block(self, address: int, data: bytes) -> None:
+        pass
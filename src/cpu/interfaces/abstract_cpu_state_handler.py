@@ -2,6 +2,9 @@ from abc import ABC, abstractmethod
 from typing import Dict
 
 class AbstractCpuStateHandler(ABC):
+    # Lets implementations be fully slotted
+    __slots__ = ()
+
     def __init__(self):
         self._helpers: Dict[str, int]
         self._flags: Dict[str, int]
@@ -0,0 +1,23 @@
+from abc import ABC, abstractmethod
+
+class AbstractTraceSink(ABC):
+    def __init__(self):
+        self.level: int
+
+    @abstractmethod
+    def record(self, cpu, pc: int) -> None:
+        pass
+
+    @abstractmethod
+    def flush(self) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,429 @@
+"""
+Long-running job server over a Unix domain socket or localhost TCP, with a pool of warm Cpus
+
+    python -m src.server serve --unix /tmp/6502.sock --pool 4
+    python -m src.server serve --port 6502
+    python -m src.server run program.bin --connect /tmp/6502.sock --address 0x0400 --trace pc
+    python -m src.server stats --connect 127.0.0.1:6502
+
+The protocol is JSON lines. A request is one JSON object on a line, a "run" request
+is followed by "size" raw bytes of program image:
+    {"op": "run", "size": 12, "name": "...", "address": 1024, "start": 1024, "max_cycles": 100000, "trace": "pc"}
+    {"op": "stats"}
+A run is answered by an "accepted" message, "trace" messages while it executes when
+a trace level was asked for, then a "result" message shaped like the results of src.batch.
+Malformed requests and fields of the wrong type or out of range get an "error" message.
+"""
+from argparse import ArgumentParser
+from collections import deque
+from time import perf_counter_ns
+from typing import Deque, Dict, Iterator, List, NamedTuple, Optional
+
+import asyncio
+import json
+import os
+import socket
+import sys
+
+from .batch import job_result
+from .cpu.cpu import Cpu, ExitReason
+from .cpu.cpu_trace import TraceLevel, TraceSink
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 6502
+
+MAX_IMAGE_SIZE = 0x10000
+
+# Exit reasons that only end a quantum of a job
+QUANTUM_EXIT_REASONS = (ExitReason.MAX_CYCLES, ExitReason.STOPPED)
+
+
+class ServerJob(NamedTuple):
+    id: int
+    name: str
+    program: bytes
+    address: int
+    start: Optional[int]
+    max_cycles: int
+    trace: TraceLevel
+    messages: "asyncio.Queue[Optional[Dict]]"  # Sent to the client in order, None ends the job
+    queued_ns: int
+
+
+class _CollectingTraceSink(TraceSink):
+    """
+    Keeps trace lines until the server sends them with the next quantum
+    """
+    def __init__(self, level: TraceLevel):
+        super().__init__(level)
+        self.lines: List[str] = []
+
+    def _emit(self, line: str) -> None:
+        self.lines.append(line)
+
+    def take(self) -> str:
+        text = "".join(self.lines)
+        self.lines.clear()
+
+        return text
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of values, None when there are none
+    """
+    if not values:
+        return None
+
+    ordered = sorted(values)
+
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+class EmulatorServer:
+    """
+    Runs jobs on a fixed pool of Cpus created once, restored to their power-on state between jobs
+    Jobs wait in a queue for a free Cpu and execute in quanta, so one event loop serves every
+    client, sends traces as they are produced and answers stats while jobs run
+    """
+    def __init__(self, pool_size: int = 4, quantum: int = 20_000, max_cycles: int = 10_000_000, history: int = 1000):
+        if pool_size <= 0:
+            raise ValueError(f"Pool size has to be positive, got {pool_size}")
+
+        self.pool_size = pool_size
+        self.quantum = quantum
+        self.max_cycles = max_cycles
+
+        self._pool = [Cpu() for _ in range(pool_size)]
+        self._power_on = self._pool[0].snapshot()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._next_id = 0
+        self._busy = 0
+
+        self._completed = 0
+        self._failed = 0
+        self._latencies_ms: Deque[float] = deque(maxlen=history)
+        self._started_ns = perf_counter_ns()
+
+    async def start_tcp(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        self._start_workers()
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        self._start_workers()
+        return await asyncio.start_unix_server(self._handle, path)
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+
+        self._workers.clear()
+
+    def stats(self) -> Dict:
+        latencies = list(self._latencies_ms)
+
+        return {
+            "pool_size": self.pool_size,
+            "busy": self._busy,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "completed": self._completed,
+            "failed": self._failed,
+            "uptime_s": (perf_counter_ns() - self._started_ns) / 1e9,
+            "latency_ms": {
+                "samples": len(latencies),
+                "p50": percentile(latencies, 0.50),
+                "p90": percentile(latencies, 0.90),
+                "p99": percentile(latencies, 0.99),
+                "max": max(latencies) if latencies else None,
+            },
+        }
+
+    def submit(self, name: str, program: bytes, address: int = 0x0000, start: Optional[int] = None,
+               max_cycles: Optional[int] = None, trace: TraceLevel = TraceLevel.OFF) -> ServerJob:
+        """
+        Queues a job, its messages arrive on job.messages
+        """
+        self._next_id += 1
+
+        job = ServerJob(
+            self._next_id, name, program, address, start,
+            min(max_cycles, self.max_cycles) if max_cycles is not None else self.max_cycles,
+            trace, asyncio.Queue(), perf_counter_ns(),
+        )
+
+        self._queue.put_nowait(job)
+
+        return job
+
+    def _start_workers(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+
+        if not self._workers:
+            self._workers = [asyncio.ensure_future(self._worker(cpu)) for cpu in self._pool]
+
+    async def _worker(self, cpu: Cpu) -> None:
+        while True:
+            job = await self._queue.get()
+            self._busy += 1
+
+            try:
+                result = await self._run(cpu, job)
+            except Exception as error:
+                result = {"name": job.name, "exit_reason": "error", "error": f"{type(error).__name__}: {error}"}
+            finally:
+                self._busy -= 1
+
+            latency = (perf_counter_ns() - job.queued_ns) / 1e6
+            self._latencies_ms.append(latency)
+
+            if result["exit_reason"] == "error":
+                self._failed += 1
+            else:
+                self._completed += 1
+
+            job.messages.put_nowait({"type": "result", "id": job.id, "latency_ms": latency, **result})
+            job.messages.put_nowait(None)
+
+    async def _run(self, cpu: Cpu, job: ServerJob) -> Dict:
+        self._reset(cpu)
+
+        sink = _CollectingTraceSink(job.trace) if job.trace else None
+        cpu.trace = sink
+
+        cpu.load(job.program, job.address, job.start)
+
+        cycles = 0
+
+        while True:
+            cycles += cpu.run(max_cycles=min(self.quantum, job.max_cycles - cycles))
+
+            if sink is not None and sink.lines:
+                job.messages.put_nowait({"type": "trace", "id": job.id, "text": sink.take()})
+
+            if cpu.exit_reason not in QUANTUM_EXIT_REASONS or cycles >= job.max_cycles:
+                break
+
+            # Lets other jobs, clients and stats requests in between quanta
+            await asyncio.sleep(0)
+
+        if cpu.exit_reason == ExitReason.STOPPED:
+            cpu.exit_reason = ExitReason.MAX_CYCLES
+
+        return job_result(job.name, cpu, cycles)
+
+    def _reset(self, cpu: Cpu) -> None:
+        """
+        Puts a pooled cpu back to its power-on state, memory included
+        """
+        cpu.restore(self._power_on)
+
+        cpu.trace = None
+        cpu.scheduler.clear()
+        cpu.irq_pending = False
+        cpu.nmi_pending = False
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+
+                if not line:
+                    break
+
+                try:
+                    request = json.loads(line)
+                    op = request["op"]
+                except (ValueError, KeyError, TypeError):
+                    await self._send(writer, {"type": "error", "error": "Requests are JSON objects with an op"})
+                    break
+
+                if op == "stats":
+                    await self._send(writer, {"type": "stats", **self.stats()})
+                elif op == "run":
+                    if not await self._handle_run(request, reader, writer):
+                        break
+                else:
+                    await self._send(writer, {"type": "error", "error": f"Unknown op {op!r}"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_run(self, request: Dict, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """
+        Reads the image of a run request, queues the job and relays its messages
+        Returns whether the connection can take further requests
+        """
+        size = request.get("size")
+
+        if not isinstance(size, int) or not 0 < size <= MAX_IMAGE_SIZE:
+            await self._send(writer, {"type": "error", "error": f"size has to be from 1 to {MAX_IMAGE_SIZE} bytes"})
+            return False
+
+        program = await reader.readexactly(size)
+
+        try:
+            trace = TraceLevel[request.get("trace", "off").upper()]
+        except (KeyError, AttributeError):
+            await self._send(writer, {"type": "error", "error": f"Unknown trace level {request.get('trace')!r}"})
+            return True
+
+        error = _check_run_request(request)
+
+        if error is not None:
+            await self._send(writer, {"type": "error", "error": error})
+            return True
+
+        job = self.submit(
+            request.get("name", "job"), program, request.get("address", 0x0000), request.get("start"),
+            request.get("max_cycles"), trace,
+        )
+
+        await self._send(writer, {"type": "accepted", "id": job.id, "queue_depth": self._queue.qsize()})
+
+        while True:
+            message = await job.messages.get()
+
+            if message is None:
+                return True
+
+            await self._send(writer, message)
+
+    async def _send(self, writer: asyncio.StreamWriter, message: Dict) -> None:
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_run_request(request: Dict) -> Optional[str]:
+    """
+    Returns what is wrong with the optional fields of a run request, None when they are valid
+    """
+    name = request.get("name", "job")
+    address = request.get("address", 0x0000)
+    start = request.get("start")
+    max_cycles = request.get("max_cycles")
+
+    if not isinstance(name, str):
+        return "name has to be a string"
+
+    if not _is_int(address) or not 0x0000 <= address <= 0xFFFF:
+        return "address has to be from 0x0000 to 0xFFFF"
+
+    if start is not None and (not _is_int(start) or not 0x0000 <= start <= 0xFFFF):
+        return "start has to be from 0x0000 to 0xFFFF"
+
+    if max_cycles is not None and (not _is_int(max_cycles) or max_cycles <= 0):
+        return "max_cycles has to be a positive integer"
+
+    return None
+
+
+def _connect(address: str) -> socket.socket:
+    """
+    Opens a connection to host:port, or to the Unix socket at any other address
+    """
+    host, _, port = address.rpartition(":")
+
+    if host and port.isdigit():
+        return socket.create_connection((host, int(port)))
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(address)
+
+    return client
+
+
+def request(address: str, message: Dict, payload: bytes = b"") -> Iterator[Dict]:
+    """
+    Sends one request and yields the server's messages until it is answered
+    """
+    if payload:
+        message = {**message, "size": len(payload)}
+
+    with _connect(address) as client, client.makefile("rb") as responses:
+        client.sendall(json.dumps(message).encode() + b"\n" + payload)
+
+        for line in responses:
+            response = json.loads(line)
+            yield response
+
+            if response["type"] in ("result", "stats", "error"):
+                break
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = ArgumentParser(prog="python -m src.server", description="Run 6502 jobs on a warm pool of Cpus")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="start the server")
+    serve.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--pool", type=int, default=os.cpu_count() or 1, help="Cpus kept ready")
+    serve.add_argument("--quantum", type=int, default=20_000, help="cycles a job runs before others get a turn")
+    serve.add_argument("--max-cycles", type=int, default=10_000_000, help="largest cycle budget a job may use")
+
+    default_address = f"{DEFAULT_HOST}:{DEFAULT_PORT}"
+
+    run = commands.add_parser("run", help="submit a program and print its messages")
+    run.add_argument("program", help="binary image")
+    run.add_argument("--connect", default=default_address, help="host:port or Unix socket path")
+    run.add_argument("--address", type=lambda value: int(value, 0), default=0x0000, help="load address")
+    run.add_argument("--start", type=lambda value: int(value, 0), help="first instruction, defaults to the load address")
+    run.add_argument("--max-cycles", type=int, help="cycle budget")
+    run.add_argument("--trace", choices=[level.name.lower() for level in TraceLevel], default="off")
+
+    stats = commands.add_parser("stats", help="print the server's stats")
+    stats.add_argument("--connect", default=default_address, help="host:port or Unix socket path")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        return asyncio.run(_serve(args))
+
+    if args.command == "stats":
+        for message in request(args.connect, {"op": "stats"}):
+            print(json.dumps(message))
+
+        return 0
+
+    with open(args.program, "rb") as f:
+        program = f.read()
+
+    message = {"op": "run", "name": args.program, "address": args.address, "start": args.start,
+               "max_cycles": args.max_cycles, "trace": args.trace}
+
+    for response in request(args.connect, message, program):
+        if response["type"] == "trace":
+            sys.stdout.write(response["text"])
+        else:
+            print(json.dumps(response))
+
+    return 0
+
+
+async def _serve(args) -> int:
+    server = EmulatorServer(args.pool, args.quantum, args.max_cycles)
+
+    if args.unix:
+        listener = await server.start_unix(args.unix)
+    else:
+        listener = await server.start_tcp(args.host, args.port)
+
+    print(f"serving on {args.unix or f'{args.host}:{args.port}'} with {args.pool} cpus", file=sys.stderr)
+
+    async with listener:
+        await listener.serve_forever()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
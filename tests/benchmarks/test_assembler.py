@@ -0,0 +1,82 @@
+import unittest
+
+from benchmarks.assembler import AssemblerError, assemble
+
+class TestAssembler(unittest.TestCase):
+    def test_addressing_modes(self):
+        code, _ = assemble("""
+PTR = $10
+        LDA #$01
+        LDA PTR
+        LDA PTR+1,X
+        LDX PTR,Y
+        LDA $1234
+        LDA $1234,X
+        LDA $1234,Y
+        LDA (PTR,X)
+        LDA (PTR),Y
+        JMP ($1234)
+        ASL A
+        ASL
+""")
+
+        self.assertEqual(code, bytes([
+            0xA9, 0x01,
+            0xA5, 0x10,
+            0xB5, 0x11,
+            0xB6, 0x10,
+            0xAD, 0x34, 0x12,
+            0xBD, 0x34, 0x12,
+            0xB9, 0x34, 0x12,
+            0xA1, 0x10,
+            0xB1, 0x10,
+            0x6C, 0x34, 0x12,
+            0x0A,
+            0x0A,
+        ]))
+
+    def test_labels(self):
+        code, symbols = assemble("""
+start:  LDX #<data
+        LDY #>data
+back:   DEX
+        BNE back
+        BEQ forward
+forward: JMP start
+        NOP
+        BRK
+data:   .byte 1, $02, %11
+""", 0x0400)
+
+        self.assertEqual(symbols["start"], 0x0400)
+        self.assertEqual(symbols["data"], 0x040F)
+        self.assertEqual(code, bytes([
+            0xA2, 0x0F,
+            0xA0, 0x04,
+            0xCA,
+            0xD0, 0xFD,
+            0xF0, 0x00,
+            0x4C, 0x00, 0x04,
+            0xEA,
+            0x00, 0x00,
+            0x01, 0x02, 0x03,
+        ]))
+
+    def test_zero_page_fallback(self):
+        # LDA has no zero page,Y form
+        code, _ = assemble("LDA $10,Y")
+
+        self.assertEqual(code, bytes([0xB9, 0x10, 0x00]))
+
+    def test_errors(self):
+        with self.assertRaises(AssemblerError):
+            assemble("FOO #$01")
+
+        with self.assertRaises(AssemblerError):
+            assemble("JMP nowhere")
+
+        with self.assertRaises(AssemblerError):
+            assemble("LDA ($1234)")
+
+if __name__ == '__main__':
+    unittest.main()
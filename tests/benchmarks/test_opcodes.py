@@ -0,0 +1,45 @@
+import unittest
+
+from benchmarks.opcodes import DOCUMENTED, diff, measure, run_all
+
+class TestOpcodes(unittest.TestCase):
+    def test_documented_opcodes(self):
+        # The 151 NMOS opcodes, without $DA and $FA listed as NOP by the table
+        self.assertEqual(len(DOCUMENTED), 151)
+        self.assertIn(0x69, DOCUMENTED)
+        self.assertIn(0xEA, DOCUMENTED)
+        self.assertNotIn(0x02, DOCUMENTED)
+        self.assertNotIn(0xDA, DOCUMENTED)
+        self.assertNotIn(0xFA, DOCUMENTED)
+
+    def test_measure_every_opcode(self):
+        # Control flow opcodes repeat too, nothing runs away or raises
+        document = run_all(count=2, repeat=1)
+
+        self.assertEqual(len(document["results"]), len(DOCUMENTED))
+        self.assertTrue(all(result["ns"] > 0 for result in document["results"].values()))
+
+    def test_measure(self):
+        self.assertGreater(measure(0xEA, count=100, repeat=1), 0)
+
+    def test_diff(self):
+        baseline = {"results": {
+            "69": {"instruction": "ADC", "addressing_mode": "IMM", "ns": 100.0},
+            "EA": {"instruction": "NOP", "addressing_mode": "IMP", "ns": 100.0},
+            "E8": {"instruction": "INX", "addressing_mode": "IMP", "ns": 100.0},
+        }}
+        current = {"results": {
+            "69": {"instruction": "ADC", "addressing_mode": "IMM", "ns": 150.0},
+            "EA": {"instruction": "NOP", "addressing_mode": "IMP", "ns": 105.0},
+            "E8": {"instruction": "INX", "addressing_mode": "IMP", "ns": 50.0},
+        }}
+
+        changes = diff(current, baseline, threshold=0.15)
+
+        self.assertEqual([change["opcode"] for change in changes], ["69", "EA", "E8"])
+        self.assertTrue(changes[0]["slower"])
+        self.assertFalse(changes[1]["slower"] or changes[1]["faster"])
+        self.assertTrue(changes[2]["faster"])
+
+if __name__ == '__main__':
+    unittest.main()
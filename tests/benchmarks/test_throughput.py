@@ -0,0 +1,41 @@
+import unittest
+
+from benchmarks.throughput import compare, count_instructions, measure, run_suite
+from benchmarks.workloads import WORKLOADS
+from src.cpu.cpu import Cpu
+
+class TestWorkloads(unittest.TestCase):
+    def test_workloads_compute_their_result(self):
+        for workload in WORKLOADS.values():
+            with self.subTest(workload=workload.name):
+                cpu = Cpu(backend="jit")
+                workload.load(cpu)
+                cpu.run()
+
+                self.assertTrue(workload.check(cpu))
+
+class TestThroughput(unittest.TestCase):
+    def test_measure(self):
+        result = measure(WORKLOADS["memcpy"], "jit", "fast", repeat=1)
+
+        self.assertEqual(result["workload"], "memcpy")
+        self.assertEqual(result["instructions"], count_instructions(WORKLOADS["memcpy"]))
+        self.assertGreater(result["cycles"], result["instructions"])
+        self.assertAlmostEqual(result["mhz"], result["cycles_per_second"] / 1e6)
+
+    def test_compare(self):
+        document = run_suite(["memcpy"], ["jit"], ["fast"], repeat=1)
+
+        baseline = {"results": [dict(document["results"][0])]}
+        baseline["results"][0]["instructions_per_second"] *= 2
+
+        changes = compare(document, baseline, threshold=0.1)
+
+        self.assertEqual(len(changes), 1)
+        self.assertAlmostEqual(changes[0]["ratio"], 0.5)
+        self.assertTrue(changes[0]["regression"])
+
+        self.assertFalse(compare(document, document)[0]["regression"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+from src.cpu.cpu import Cpu, ExitReason
+
+class TestCpu(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case by creating a new Cpu object.
+        """
+        self.cpu = Cpu()
+
+    def test_dispatch_table(self):
+        # Every opcode is bound to its addressing mode, operation and base cycles
+        self.assertEqual(len(self.cpu.dispatch), 256)
+
+        addressing_mode, operation, cycles = self.cpu.dispatch[0xA9]
+
+        self.assertEqual(addressing_mode, self.cpu.addr_modes.IMM)
+        self.assertEqual(operation, self.cpu.instructions.LDA)
+        self.assertEqual(cycles, 2)
+
+        addressing_mode, operation, cycles = self.cpu.dispatch[0x6D]
+
+        self.assertEqual(addressing_mode, self.cpu.addr_modes.ABS)
+        self.assertEqual(operation, self.cpu.instructions.ADC)
+        self.assertEqual(cycles, 4)
+
+    def test_fetch_implied(self):
+        # ASL A operates on the accumulator and leaves memory untouched
+        self.cpu.bus.write(0x0000, 0x0A)
+        self.cpu.state.register_A = 0x41
+        self.cpu.state.opcode = 0x0A
+
+        self.cpu.addr_modes.IMP()
+        self.cpu.instructions.ASL()
+
+        self.assertEqual(self.cpu.state.register_A, 0x82)
+        self.assertEqual(self.cpu.bus.read(0x0000), 0x0A)
+
+    def test_step_base_cycles(self):
+        # LDA #$01
+        self.cpu.load(bytes([0xA9, 0x01]), 0x0400)
+
+        self.assertEqual(self.cpu.step(), 2)
+        self.assertEqual(self.cpu.state.cycles, 2)
+        self.assertEqual(self.cpu.state.register_PC, 0x0402)
+
+    def test_step_page_cross_penalty(self):
+        # LDX #$01; LDA $04FF,X; STA $04FF,X
+        self.cpu.load(bytes([0xA2, 0x01, 0xBD, 0xFF, 0x04, 0x9D, 0xFF, 0x04]), 0x0400)
+
+        self.cpu.step()
+
+        # Both the addressing mode and LDA report the crossing
+        self.assertEqual(self.cpu.step(), 5)
+
+        # STA always takes its base cycles
+        self.assertEqual(self.cpu.step(), 5)
+
+    def test_step_branch_penalties(self):
+        # BNE +2 not taken, taken within the page, then taken across a page
+        self.cpu.load(bytes([0xD0, 0x02]), 0x0400)
+        self.assertEqual(self.cpu.step(), 2)
+
+        self.cpu.load(bytes([0xD0, 0x02]), 0x0400)
+        self.cpu.state.flag_Z = False
+        self.assertEqual(self.cpu.step(), 3)
+
+        self.cpu.load(bytes([0xD0, 0x7F]), 0x04F0)
+        self.cpu.state.flag_Z = False
+        self.assertEqual(self.cpu.step(), 4)
+        self.assertEqual(self.cpu.state.register_PC, 0x0571)
+
+    def test_run_budgets(self):
+        # loop: INX; JMP loop
+        self.cpu.load(bytes([0xE8, 0x4C, 0x00, 0x04]), 0x0400)
+
+        self.assertEqual(self.cpu.run(max_instructions=4), 2 + 3 + 2 + 3)
+        self.assertEqual(self.cpu.exit_reason, ExitReason.MAX_INSTRUCTIONS)
+
+        self.assertEqual(self.cpu.run(max_cycles=6), 2 + 3 + 2)
+        self.assertEqual(self.cpu.exit_reason, ExitReason.MAX_CYCLES)
+
+        self.assertEqual(self.cpu.state.cycles, 17)
+        self.assertEqual(self.cpu.state.register_X, 0x04)
+
+    def test_run_until_brk(self):
+        # LDA #$01; BRK
+        self.cpu.load(bytes([0xA9, 0x01, 0x00]), 0x0400)
+
+        self.assertEqual(self.cpu.run(), 2 + 7)
+        self.assertEqual(self.cpu.exit_reason, ExitReason.BRK)
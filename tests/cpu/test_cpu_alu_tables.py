@@ -0,0 +1,132 @@
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.cpu import cpu_alu_tables
+from src.cpu.cpu import Cpu
+from src.cpu.cpu_alu_tables import ADC, ASL, COMPARE, LSR, NZ, ROL, ROR
+
+class TestCpuAluTables(unittest.TestCase):
+    def test_nz(self):
+        for value in range(0x100):
+            self.assertEqual(NZ[value], (value == 0x00, bool(value & 0x80)))
+
+    def test_adc(self):
+        # Reference is the arithmetic the ADC handler used before the tables
+        for carry in range(2):
+            for a in range(0x100):
+                for operand in range(0x100):
+                    temp = a + operand + carry
+
+                    expected = (
+                        temp & 0x00FF,
+                        bool(temp > 255),
+                        bool((temp & 0x00FF) == 0),
+                        bool(temp & 0x80),
+                        bool((~(a ^ operand) & (a ^ temp)) & 0x0080),
+                    )
+
+                    self.assertEqual(ADC[carry << 16 | a << 8 | operand], expected)
+
+    def test_sbc(self):
+        # SBC looks up the inverted operand, its own overflow formula must agree
+        for carry in range(2):
+            for a in range(0x100):
+                for operand in range(0x100):
+                    value = operand ^ 0x00FF
+                    temp = a + value + carry
+
+                    result, flag_C, flag_Z, flag_N, flag_V = ADC[carry << 16 | a << 8 | value]
+
+                    self.assertEqual(result, temp & 0x00FF)
+                    self.assertEqual(flag_C, bool(temp > 0xFF))
+                    self.assertEqual(flag_V, bool((a ^ temp) & (value ^ temp) & 0x0080))
+
+    def test_compare(self):
+        for register in range(0x100):
+            for operand in range(0x100):
+                temp = register - operand
+
+                expected = (bool(register >= operand), bool((temp & 0x00FF) == 0x0000), bool(temp & 0x0080))
+
+                self.assertEqual(COMPARE[register << 8 | operand], expected)
+
+    def test_shifts(self):
+        for carry in range(2):
+            for value in range(0x100):
+                index = carry << 8 | value
+
+                temp = value << 1
+                self.assertEqual(ASL[index], (temp & 0xFF, bool(temp & 0xFF00), (temp & 0xFF) == 0, bool(temp & 0x80)))
+
+                temp = value >> 1
+                self.assertEqual(LSR[index], (temp, bool(value & 1), temp == 0, False))
+
+                temp = (value << 1) | carry
+                self.assertEqual(ROL[index], (temp & 0xFF, bool(temp & 0xFF00), (temp & 0xFF) == 0, bool(temp & 0x80)))
+
+                temp = (value >> 1) | (carry << 7)
+                self.assertEqual(ROR[index], (temp, bool(value & 1), temp == 0, bool(carry)))
+
+    def test_tables_share_entries(self):
+        # Memory stays bounded, the large tables reference a few distinct tuples
+        self.assertLessEqual(len(set(map(id, ADC))), 0x100 * 4)
+        self.assertLessEqual(len(set(map(id, COMPARE))), 8)
+
+    def test_sbc_handler(self):
+        cpu = Cpu()
+
+        # SEC; LDA #$50; SBC #$B0; BRK, 0x50 - 0xB0 overflows into negative
+        cpu.load(bytes([0x38, 0xA9, 0x50, 0xE9, 0xB0, 0x00]), 0x0400)
+        cpu.run()
+
+        self.assertEqual(cpu.state.register_A, 0xA0)
+        self.assertFalse(cpu.state.flag_C)
+        self.assertTrue(cpu.state.flag_V)
+        self.assertTrue(cpu.state.flag_N)
+        self.assertFalse(cpu.state.flag_Z)
+
+class TestCpuAluTablesCache(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case by pointing the tables at an empty cache directory.
+        """
+        self.directory = Path(tempfile.mkdtemp())
+        self.cache_path = self.directory / "alu_tables.pickle"
+
+        patcher = mock.patch.multiple(cpu_alu_tables, CACHE_PATH=self.cache_path, _tables={})
+        patcher.start()
+
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_cache_written_and_used(self):
+        tables = dict(cpu_alu_tables.load_tables())
+
+        self.assertTrue(self.cache_path.exists())
+        self.assertEqual(tables["ADC"], ADC)
+
+        cpu_alu_tables._tables.clear()
+
+        with mock.patch.object(cpu_alu_tables, "_build") as build:
+            self.assertEqual(cpu_alu_tables.load_tables()["ROR"], ROR)
+
+        build.assert_not_called()
+
+    def test_import_is_lazy(self):
+        # Importing the cpu builds no table and leaves the jit alone
+        code = (
+            "import sys; import src.cpu.cpu; from src.cpu import cpu_alu_tables; "
+            "print(len(cpu_alu_tables._tables), 'src.cpu.cpu_jit' in sys.modules, 'src.cpu.cpu_profiler' in sys.modules)"
+        )
+
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(output.split(), ["0", "False", "False"])
+
+if __name__ == '__main__':
+    unittest.main()
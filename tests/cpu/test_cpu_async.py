@@ -0,0 +1,164 @@
+import asyncio
+import unittest
+
+from src.cpu.cpu import BACKENDS, Cpu, ExitReason
+from src.cpu.cpu_async import FairScheduler, run_async, wait_for_cycle, wait_for_write
+
+# loop: JMP loop
+SPIN = bytes([0x4C, 0x00, 0x04])
+
+def spinning_cpu(**kwargs) -> Cpu:
+    cpu = Cpu(**kwargs)
+    cpu.load(SPIN, 0x0400)
+
+    return cpu
+
+class TestCpuAsync(unittest.TestCase):
+    def test_run_async_yields(self):
+        cpu = spinning_cpu()
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(cpu.state.cycles)
+                await asyncio.sleep(0)
+
+        async def main():
+            task = asyncio.ensure_future(ticker())
+            cycles = await run_async(cpu, quantum=1_000, max_cycles=50_000)
+            task.cancel()
+
+            return cycles
+
+        self.assertEqual(asyncio.run(main()), 50_001)
+        self.assertEqual(cpu.exit_reason, ExitReason.MAX_CYCLES)
+
+        # The other coroutine ran between every quantum
+        self.assertGreaterEqual(len(ticks), 49)
+
+    def test_wait_for_write(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                # LDA #$2A; STA $D012; LDA $D013; BRK
+                cpu = Cpu(backend=backend)
+                cpu.load(bytes([0xA9, 0x2A, 0x8D, 0x12, 0xD0, 0xAD, 0x13, 0xD0, 0x00]), 0x0400)
+
+                async def device():
+                    hit = await wait_for_write(cpu, 0xD012)
+
+                    # Answers before the cpu executes the next instruction
+                    cpu.bus.write(0xD013, hit.value + 1)
+
+                    return hit
+
+                async def main():
+                    task = asyncio.ensure_future(device())
+                    await asyncio.sleep(0)
+
+                    await run_async(cpu, quantum=1_000_000)
+
+                    return await task
+
+                hit = asyncio.run(main())
+
+                self.assertEqual((hit.access, hit.address, hit.value), ("write", 0xD012, 0x2A))
+                self.assertEqual(cpu.exit_reason, ExitReason.BRK)
+                self.assertEqual(cpu.state.register_A, 0x2B)
+
+                # The observer is gone once the wait is over
+                self.assertEqual(cpu.bus._write_observers[0xD0], ())
+
+    def test_wait_for_cycle(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                cpu = spinning_cpu(backend=backend)
+
+                async def device():
+                    reached = await wait_for_cycle(cpu, 12_345)
+
+                    # Resumes before the cpu executes the next instruction
+                    return reached, cpu.state.cycles
+
+                async def main():
+                    task = asyncio.ensure_future(device())
+                    await asyncio.sleep(0)
+
+                    runner = asyncio.ensure_future(run_async(cpu, quantum=1_000_000))
+                    result = await task
+                    runner.cancel()
+
+                    return result
+
+                reached, resumed_at = asyncio.run(main())
+
+                self.assertGreaterEqual(reached, 12_345)
+                self.assertLess(reached, 12_345 + 3)
+                self.assertEqual(resumed_at, reached)
+
+    def test_stop_from_observer(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                # loop: STA $D000; JMP loop, an unbudgeted run only ends through stop()
+                cpu = Cpu(backend=backend)
+                cpu.load(bytes([0x8D, 0x00, 0xD0, 0x4C, 0x00, 0x04]), 0x0400)
+                cpu.bus.add_write_observer(0xD000, 0xD000, lambda address, value: cpu.stop())
+
+                cycles = cpu.run()
+
+                self.assertEqual(cpu.exit_reason, ExitReason.STOPPED)
+                self.assertEqual(cycles, 4)
+                self.assertEqual(cpu.state.register_PC, 0x0403)
+
+    def test_fair_scheduler(self):
+        scheduler = FairScheduler(slice_ns=200_000)
+
+        heavy = spinning_cpu()
+        light = spinning_cpu()
+
+        # Checked state handling is several times slower per cycle
+        slow = spinning_cpu(state_handler="checked")
+
+        progress = {}
+
+        async def main():
+            done = scheduler.add(heavy, max_cycles=600_000, weight=2)
+            scheduler.add(light, max_cycles=10_000_000)
+            scheduler.add(slow, max_cycles=10_000_000)
+
+            done.add_done_callback(lambda _: progress.update(scheduler.usage()))
+
+            task = asyncio.ensure_future(scheduler.run())
+            await done
+            task.cancel()
+
+        asyncio.run(main())
+
+        # light and slow got the same host time, heavy about twice as much
+        self.assertAlmostEqual(progress[light] / progress[slow], 1.0, delta=0.35)
+        self.assertGreater(light.state.cycles, slow.state.cycles)
+
+    def test_fair_scheduler_results(self):
+        scheduler = FairScheduler()
+
+        async def main():
+            counters = []
+
+            for count in (1, 5, 9):
+                cpu = Cpu()
+                cpu.load(bytes([0xEA] * count + [0x00]), 0x0400)
+                counters.append(scheduler.add(cpu))
+
+            budget = scheduler.add(spinning_cpu(), max_cycles=3_000)
+
+            await scheduler.run()
+
+            return [counter.result() for counter in counters], budget.result()
+
+        results, budget = asyncio.run(main())
+
+        self.assertEqual(results, [2 + 7, 5 * 2 + 7, 9 * 2 + 7])
+        self.assertEqual(budget, 3_000)
+        self.assertEqual(len(scheduler), 0)
+
+if __name__ == '__main__':
+    unittest.main()
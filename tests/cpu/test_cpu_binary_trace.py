@@ -0,0 +1,125 @@
+from contextlib import redirect_stdout
+
+import gc
+import os
+import tempfile
+import unittest
+import warnings
+
+from src.cpu.cpu import Cpu
+from src.cpu.cpu_binary_trace import (
+    BinaryTraceSink, TraceRecord, first_difference, main, numpy, read_trace, read_trace_array, zstandard,
+)
+
+# LDX #$00; loop: INX; CPX #$10; BNE loop; BRK
+COUNTER = bytes([0xA2, 0x00, 0xE8, 0xE0, 0x10, 0xD0, 0xFB, 0x00])
+
+class TestCpuBinaryTrace(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case with a temporary directory for trace files.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _trace(self, name: str, program: bytes = COUNTER, compression=None, buffer_records: int = 4, max_instructions=None) -> str:
+        path = os.path.join(self.directory.name, name)
+
+        cpu = Cpu()
+        cpu.load(program, 0x0400)
+
+        with BinaryTraceSink(path, compression, buffer_records) as sink:
+            cpu.trace = sink
+            cpu.run(max_instructions=max_instructions)
+
+        return path
+
+    def test_records(self):
+        records = list(read_trace(self._trace("counter.trace")))
+
+        self.assertEqual(len(records), 1 + 16 * 3 + 1)
+        self.assertEqual(records[0], TraceRecord(0x0400, 0xA2, 0x00, 0x00, 0x00, 0x00, 0b00000110, 2))
+        self.assertEqual(records[1].pc, 0x0402)
+        self.assertEqual(records[1].x, 0x01)
+        self.assertEqual(records[-1].opcode, 0x00)
+
+    def test_compression(self):
+        expected = list(read_trace(self._trace("plain.trace")))
+
+        compressions = ["gzip"] + (["zstd"] if zstandard is not None else [])
+
+        for compression in compressions:
+            with self.subTest(compression=compression):
+                path = self._trace(f"{compression}.trace", compression=compression)
+
+                self.assertEqual(list(read_trace(path)), expected)
+
+    def test_invalid_compression(self):
+        with self.assertRaises(ValueError):
+            BinaryTraceSink(os.path.join(self.directory.name, "x.trace"), "lz4")
+
+    def test_not_a_trace(self):
+        path = os.path.join(self.directory.name, "text.trace")
+
+        with open(path, "wb") as f:
+            f.write(b"0400  A2  LDX IMM\n")
+
+        with self.assertRaises(ValueError):
+            list(read_trace(path))
+
+    @unittest.skipUnless(numpy is not None, "numpy is not installed")
+    def test_read_trace_array(self):
+        path = self._trace("counter.trace", compression="gzip")
+        array = read_trace_array(path)
+
+        self.assertEqual(len(array), 50)
+        self.assertEqual(int(array["x"].max()), 0x10)
+        self.assertEqual(int(array["cycles"][-1]), list(read_trace(path))[-1].cycles)
+
+    def test_first_difference(self):
+        same = self._trace("a.trace")
+        self.assertIsNone(first_difference(same, self._trace("b.trace", buffer_records=7)))
+
+        # CPX #$0F: the loop ends one pass earlier
+        other = self._trace("c.trace", COUNTER[:4] + bytes([0x0F]) + COUNTER[5:])
+        index, expected, actual = first_difference(same, other)
+
+        self.assertEqual(index, 1 + 14 * 3 + 1)
+        self.assertEqual(expected.sr & 0x02, 0)
+        self.assertEqual(actual.sr & 0x02, 0x02)
+
+    def test_first_difference_length(self):
+        whole = self._trace("whole.trace")
+        prefix = self._trace("prefix.trace", max_instructions=10)
+
+        index, expected, actual = first_difference(prefix, whole)
+
+        self.assertEqual(index, 10)
+        self.assertIsNone(expected)
+        self.assertEqual(actual, list(read_trace(whole))[10])
+
+    def test_files_closed(self):
+        whole = self._trace("whole.trace", compression="gzip")
+        prefix = self._trace("prefix.trace", compression="gzip", max_instructions=10)
+
+        # Unclosed files warn when collected, the diff stops before the end of both traces
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", ResourceWarning)
+
+            list(read_trace(whole))
+            first_difference(prefix, whole)
+            gc.collect()
+
+        self.assertEqual([w for w in caught if issubclass(w.category, ResourceWarning)], [])
+
+    def test_diff_command(self):
+        path = self._trace("a.trace")
+
+        with open(os.devnull, "w") as devnull:
+            with redirect_stdout(devnull):
+                self.assertEqual(main(["diff", path, path]), 0)
+                self.assertEqual(main(["diff", path, self._trace("b.trace", bytes([0x00]))]), 1)
+                self.assertEqual(main(["dump", path, "--limit", "2"]), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+
+from src.cpu.cpu import Cpu, ExitReason
+from src.cpu.cpu_watchpoint import WatchHit
+
+# LDX #$00; loop: INX; STX $10; LDA $20; CPX #$10; BNE loop; BRK
+PROGRAM = bytes([0xA2, 0x00, 0xE8, 0x86, 0x10, 0xA5, 0x20, 0xE0, 0x10, 0xD0, 0xF7, 0x00])
+
+class TestCpuBreakpoints(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case by creating a new Cpu object with PROGRAM loaded.
+        """
+        self.cpu = Cpu()
+        self.cpu.load(PROGRAM, 0x0400)
+
+    def test_breakpoint(self):
+        self.cpu.add_breakpoint(0x0405)
+        self.cpu.run()
+
+        self.assertEqual(self.cpu.exit_reason, ExitReason.BREAKPOINT)
+        self.assertEqual(self.cpu.state.register_PC, 0x0405)
+        self.assertEqual(self.cpu.state.register_X, 0x01)
+
+        # Continuing from the breakpoint executes it and stops on the next pass
+        self.cpu.run()
+
+        self.assertEqual(self.cpu.exit_reason, ExitReason.BREAKPOINT)
+        self.assertEqual(self.cpu.state.register_X, 0x02)
+
+        self.cpu.remove_breakpoint(0x0405)
+        self.cpu.run()
+
+        self.assertEqual(self.cpu.exit_reason, ExitReason.BRK)
+        self.assertEqual(self.cpu.state.register_X, 0x10)
+
+    def test_breakpoint_with_jit(self):
+        cpu = Cpu(backend="jit")
+        cpu.load(PROGRAM, 0x0400)
+        cpu.add_breakpoint(0x040B)
+        cpu.run()
+
+        self.assertEqual(cpu.exit_reason, ExitReason.BREAKPOINT)
+        self.assertEqual(cpu.state.register_X, 0x10)
+
+    def test_write_watchpoint(self):
+        self.cpu.add_watchpoint(0x0010)
+        self.cpu.run()
+
+        self.assertEqual(self.cpu.exit_reason, ExitReason.WATCHPOINT)
+        self.assertEqual(self.cpu.watch_hit, WatchHit("write", 0x0010, 0x01))
+
+        # Stops after the instruction that wrote
+        self.assertEqual(self.cpu.state.register_PC, 0x0405)
+        self.assertEqual(self.cpu.bus.read(0x0010), 0x01)
+
+    def test_read_watchpoint(self):
+        self.cpu.bus.write(0x0020, 0x77)
+        self.cpu.add_watchpoint(0x0020, read=True, write=False)
+        self.cpu.run()
+
+        self.assertEqual(self.cpu.exit_reason, ExitReason.WATCHPOINT)
+        self.assertEqual(self.cpu.watch_hit, WatchHit("read", 0x0020, 0x77))
+        self.assertEqual(self.cpu.state.register_PC, 0x0407)
+
+    def test_unwatched_address_on_watched_page(self):
+        watchpoint = self.cpu.add_watchpoint(0x0030, 0x003F)
+        self.cpu.run()
+
+        self.assertEqual(self.cpu.exit_reason, ExitReason.BRK)
+        self.assertIsNone(self.cpu.watch_hit)
+
+        self.cpu.remove_watchpoint(watchpoint)
+
+        self.assertEqual(self.cpu.watchpoints, [])
+        self.assertEqual(self.cpu.bus.write, self.cpu.bus._write_ram)
+
+    def test_step_reports_watchpoint(self):
+        self.cpu.add_watchpoint(0x0010)
+
+        self.cpu.step()
+        self.cpu.step()
+        self.assertIsNone(self.cpu.exit_reason)
+
+        self.cpu.step()
+        self.assertEqual(self.cpu.exit_reason, ExitReason.WATCHPOINT)
+
+    def test_invalid_watchpoint(self):
+        with self.assertRaises(ValueError):
+            self.cpu.add_watchpoint(0x0010, read=False, write=False)
+
+        with self.assertRaises(ValueError):
+            self.cpu.add_watchpoint(0x0020, 0x0010)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+from unittest.mock import Mock
+
+from src.cpu.cpu_bus import CpuBus
+
+class TestCpuBus(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case by creating a new CpuBus object.
+        """
+        self.bus = CpuBus(Mock())
+
+    def test_read_write(self):
+        self.bus.write(0x1234, 0xAB)
+
+        self.assertEqual(self.bus.read(0x1234), 0xAB)
+        self.assertEqual(self.bus.ram[0x1234], 0xAB)
+
+    def test_write_with_invalid_value(self):
+        with self.assertRaises(IndexError):
+            self.bus.write(0x10000, 0x00)
+
+        with self.assertRaises(ValueError):
+            self.bus.write(0x0000, 0x100)
+
+    def test_load(self):
+        # The program is copied at the given base address
+        self.bus.load(bytes([0xA9, 0x01, 0x00]), 0x0400)
+
+        self.assertEqual(self.bus.read(0x03FF), 0x00)
+        self.assertEqual(self.bus.read(0x0400), 0xA9)
+        self.assertEqual(self.bus.read(0x0401), 0x01)
+
+        with self.assertRaises(IndexError):
+            self.bus.load(bytes(2), 0xFFFF)
+
+    def test_read_block(self):
+        # Blocks are views, later writes show through them
+        block = self.bus.read_block(0x0200, 4)
+        self.bus.write(0x0201, 0x7F)
+
+        self.assertIsInstance(block, memoryview)
+        self.assertEqual(bytes(block), bytes([0x00, 0x7F, 0x00, 0x00]))
+
+    def test_write_block(self):
+        self.bus.write_block(0xFFFC, bytes([0x00, 0x04, 0x00, 0x00]))
+
+        self.assertEqual(bytes(self.bus.read_block(0xFFFC, 2)), bytes([0x00, 0x04]))
+
+        with self.assertRaises(IndexError):
+            self.bus.write_block(0xFFFE, bytes(3))
+
+    def test_fast_path(self):
+        # With only RAM mapped, accesses skip the page table
+        self.assertEqual(self.bus.read, self.bus._read_ram)
+        self.assertEqual(self.bus.write, self.bus._write_ram)
+
+    def test_map_rom(self):
+        self.bus.map_rom(0xF000, bytes([0xEA]) * 0x1000)
+        self.bus.write(0xF000, 0x00)
+
+        self.assertEqual(self.bus.read(0xF000), 0xEA)
+
+        # Reads of ROM stay on the fast path, writes go through the page table
+        self.assertEqual(self.bus.read, self.bus._read_ram)
+        self.assertNotEqual(self.bus.write, self.bus._write_ram)
+
+        # Neighbouring pages are untouched
+        self.bus.write(0xEFFF, 0x01)
+        self.assertEqual(self.bus.read(0xEFFF), 0x01)
+
+    def test_map_device(self):
+        device = Mock()
+        device.read.return_value = 0x42
+
+        self.bus.map_device(0xD000, 0xD0FF, device)
+
+        self.assertEqual(self.bus.read(0xD012), 0x42)
+        device.read.assert_called_with(0xD012)
+
+        self.bus.write(0xD020, 0x0E)
+        device.write.assert_called_with(0xD020, 0x0E)
+
+        # RAM outside the device range is not affected
+        self.bus.write(0xD100, 0x07)
+        self.assertEqual(self.bus.read(0xD100), 0x07)
+
+        # Mapping the range back to RAM restores the fast path
+        self.bus.map_ram(0xD000, 0xD0FF)
+        self.assertEqual(self.bus.read, self.bus._read_ram)
+
+    def test_map_with_unaligned_range(self):
+        with self.assertRaises(ValueError):
+            self.bus.map_device(0xD001, 0xD0FF, Mock())
+
+        with self.assertRaises(ValueError):
+            self.bus.map_ram(0xD000, 0xD0FE)
+
+    def test_observers(self):
+        observer = Mock()
+
+        self.bus.write(0x1234, 0x99)
+        self.bus.add_read_observer(0x1200, 0x12FF, observer.read)
+        self.bus.add_write_observer(0x1200, 0x12FF, observer.write)
+
+        self.assertEqual(self.bus.read(0x1234), 0x99)
+        observer.read.assert_called_once_with(0x1234, 0x99)
+
+        self.bus.write(0x1235, 0x01)
+        observer.write.assert_called_once_with(0x1235, 0x01)
+
+        # Other pages stay on the fast handlers
+        self.bus.read(0x1300)
+        self.bus.write(0x1300, 0x02)
+        self.assertEqual(observer.read.call_count, 1)
+        self.assertEqual(observer.write.call_count, 1)
+
+        self.bus.remove_read_observer(0x1200, 0x12FF, observer.read)
+        self.bus.remove_write_observer(0x1200, 0x12FF, observer.write)
+
+        self.assertEqual(self.bus.read, self.bus._read_ram)
+        self.assertEqual(self.bus.write, self.bus._write_ram)
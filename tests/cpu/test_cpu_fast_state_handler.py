@@ -0,0 +1,86 @@
+import unittest
+
+from src.cpu.cpu import Cpu
+from src.cpu.cpu_fast_state_handler import CpuFastStateHandler
+
+class TestCpuFastStateHandler(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case by creating a new CpuFastStateHandler object.
+        """
+        self.state_handler = CpuFastStateHandler()
+
+    def test_slots(self):
+        # Every attribute lives in a slot
+        self.assertFalse(hasattr(self.state_handler, "__dict__"))
+
+        with self.assertRaises(AttributeError):
+            self.state_handler.register_Z = 0x00
+
+    def test_initial_values(self):
+        self.assertEqual(self.state_handler.register_A, 0x00)
+        self.assertEqual(self.state_handler.register_SR, 0x00)
+        self.assertEqual(self.state_handler.register_PC, 0x0000)
+        self.assertEqual(self.state_handler.cycles, 0)
+
+    def test_status_register_from_flags(self):
+        self.state_handler.flag_C = True
+        self.state_handler.flag_N = True
+
+        self.assertEqual(self.state_handler.register_SR, 0x81)
+
+        self.state_handler.flag_C = False
+
+        self.assertEqual(self.state_handler.register_SR, 0x80)
+
+    def test_flags_from_status_register(self):
+        self.state_handler.register_SR = 0x42
+
+        self.assertTrue(self.state_handler.flag_Z)
+        self.assertTrue(self.state_handler.flag_V)
+        self.assertFalse(self.state_handler.flag_C)
+        self.assertFalse(self.state_handler.flag_N)
+
+    def test_matches_checked_handler(self):
+        # LDX #$00; loop: TXA; ADC #$37; PHA; PLA; STA $20,X; DEX; BNE loop; BRK
+        program = bytes([0xA2, 0x00, 0x8A, 0x69, 0x37, 0x48, 0x68, 0x95, 0x20, 0xCA, 0xD0, 0xF6, 0x00])
+        fast = Cpu(state_handler="fast")
+        checked = Cpu(state_handler="checked")
+
+        for cpu in (fast, checked):
+            cpu.load(program, 0x0400)
+            cpu.run()
+
+        for register in ("A", "X", "Y", "SP", "SR", "PC"):
+            self.assertEqual(
+                getattr(fast.state, f"register_{register}"),
+                getattr(checked.state, f"register_{register}"),
+            )
+
+        self.assertEqual(bytes(fast.bus.ram), bytes(checked.bus.ram))
+
+    def test_indexed_addresses_wrap_with_checked_handler(self):
+        programs = {
+            # LDX #$10; LDA $FFF8,X
+            "ABX": bytes([0xA2, 0x10, 0xBD, 0xF8, 0xFF, 0x00]),
+            # LDY #$10; LDA $FFF8,Y
+            "ABY": bytes([0xA0, 0x10, 0xB9, 0xF8, 0xFF, 0x00]),
+            # LDY #$20; LDA ($40),Y with $FFF0 at $40
+            "IZY": bytes([0xA0, 0x20, 0xB1, 0x40, 0x00]),
+        }
+
+        for mode, program in programs.items():
+            with self.subTest(mode=mode):
+                cpu = Cpu(state_handler="checked")
+                cpu.bus.load(bytes([0xF0, 0xFF]), 0x0040)
+                cpu.bus.write(0x0008, 0x5A)
+                cpu.bus.write(0x0010, 0x5A)
+                cpu.load(program, 0x0400)
+
+                cpu.run()
+
+                self.assertEqual(cpu.state.register_A, 0x5A)
+
+    def test_unknown_state_handler(self):
+        with self.assertRaises(ValueError):
+            Cpu(state_handler="unknown")
@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.cpu import cpu_instruction_set
+from src.cpu.cpu_instruction_set import IMPLIED_OPCODES, MNEMONICS, OPCODES, find_opcode
+
+class TestCpuInstructionSet(unittest.TestCase):
+    def test_opcodes(self):
+        self.assertEqual(len(OPCODES), 256)
+
+        entry = OPCODES[0x6D]
+
+        self.assertEqual(entry.opcode, 0x6D)
+        self.assertEqual(entry.instruction, "ADC")
+        self.assertEqual(entry.operation, "ADC")
+        self.assertEqual(entry.addressing_mode, "ABS")
+        self.assertEqual(entry.cycles, 4)
+
+    def test_mnemonics(self):
+        self.assertEqual(MNEMONICS["LDX"], (0xA2, 0xA6, 0xAE, 0xB6, 0xBE))
+        self.assertEqual(sum(len(opcodes) for opcodes in MNEMONICS.values()), 256)
+
+    def test_find_opcode(self):
+        self.assertEqual(find_opcode("LDA", "IMM"), 0xA9)
+        self.assertEqual(find_opcode("JMP", "IND"), 0x6C)
+
+        with self.assertRaises(KeyError):
+            find_opcode("LDA", "IND")
+
+    def test_implied_opcodes(self):
+        self.assertIn(0x0A, IMPLIED_OPCODES)
+        self.assertIn(0xE8, IMPLIED_OPCODES)
+        self.assertNotIn(0xA9, IMPLIED_OPCODES)
+
+class TestCpuInstructionSetCache(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case by pointing the registry at a copy of the JSON table.
+        """
+        self.directory = Path(tempfile.mkdtemp())
+        self.json_path = self.directory / "instruction_set.json"
+        self.cache_path = self.directory / "instruction_set.pickle"
+
+        shutil.copy(cpu_instruction_set.JSON_PATH, self.json_path)
+
+        patcher = mock.patch.multiple(cpu_instruction_set, JSON_PATH=self.json_path, CACHE_PATH=self.cache_path)
+        patcher.start()
+
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_cache_written(self):
+        table = cpu_instruction_set._load()
+
+        self.assertTrue(self.cache_path.exists())
+        self.assertEqual(tuple(OPCODES), tuple(cpu_instruction_set.Opcode(*entry) for entry in table))
+
+    def test_cache_used(self):
+        cpu_instruction_set._load()
+
+        with mock.patch.object(cpu_instruction_set, "_parse") as parse:
+            cpu_instruction_set._load()
+
+        parse.assert_not_called()
+
+    def test_cache_rebuilt_when_json_changes(self):
+        cpu_instruction_set._load()
+
+        with open(self.json_path, "r") as f:
+            entries = json.load(f)
+
+        entries[0xEA]["cycles"] = 3
+
+        with open(self.json_path, "w") as f:
+            json.dump(entries, f)
+
+        # Make sure the modification time moves even on coarse clocks
+        stat = os.stat(self.json_path)
+        os.utime(self.json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertEqual(cpu_instruction_set._load()[0xEA][4], 3)
+
+    def test_corrupt_cache(self):
+        self.cache_path.write_bytes(b"not a pickle")
+
+        self.assertEqual(len(cpu_instruction_set._load()), 256)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import unittest
+
+from src.cpu.cpu import BACKENDS, Cpu, ExitReason, INTERRUPT_CYCLES
+
+# Main program at $0400: CLI; loop: JMP loop
+MAIN = bytes([0x58, 0x4C, 0x01, 0x04])
+
+# IRQ handler at $0500: INC $10; RTI
+IRQ_HANDLER = bytes([0xE6, 0x10, 0x40])
+
+# NMI handler at $0600: INC $11; RTI
+NMI_HANDLER = bytes([0xE6, 0x11, 0x40])
+
+class TestCpuInterrupts(unittest.TestCase):
+    def _make_cpu(self, backend: str = "interpreter") -> Cpu:
+        cpu = Cpu(backend=backend)
+
+        cpu.bus.load(MAIN, 0x0400)
+        cpu.bus.load(IRQ_HANDLER, 0x0500)
+        cpu.bus.load(NMI_HANDLER, 0x0600)
+        cpu.bus.load(bytes([0x00, 0x06, 0x00, 0x04, 0x00, 0x05]), 0xFFFA)
+
+        cpu.reset()
+
+        return cpu
+
+    def test_reset(self):
+        cpu = self._make_cpu()
+
+        self.assertEqual(cpu.state.register_PC, 0x0400)
+        self.assertEqual(cpu.state.register_SP, 0xFD)
+        self.assertEqual(cpu.state.register_SR, 0b00100100)
+        self.assertEqual(cpu.state.cycles, INTERRUPT_CYCLES)
+
+    def test_irq(self):
+        cpu = self._make_cpu()
+        cpu.run(max_instructions=2)
+
+        cpu.irq()
+        cpu.step()
+
+        # Entered the handler with PC and SR (B clear) pushed, then ran INC
+        self.assertEqual(cpu.state.register_PC, 0x0502)
+        self.assertTrue(cpu.state.flag_I)
+        self.assertEqual(cpu.bus.read(0x01FD), 0x04)
+        self.assertEqual(cpu.bus.read(0x01FC), 0x01)
+        self.assertEqual(cpu.bus.read(0x01FB) & 0x30, 0x20)
+
+        cpu.step()
+
+        # RTI returns to the loop with interrupts enabled again
+        self.assertEqual(cpu.state.register_PC, 0x0401)
+        self.assertFalse(cpu.state.flag_I)
+        self.assertEqual(cpu.state.register_SP, 0xFD)
+        self.assertEqual(cpu.bus.read(0x0010), 1)
+
+    def test_masked_irq_waits_for_cli(self):
+        cpu = self._make_cpu()
+
+        # Raised before CLI executes, taken right after it
+        cpu.irq()
+        cpu.run(max_instructions=1)
+
+        self.assertTrue(cpu.irq_pending)
+        self.assertEqual(cpu.bus.read(0x0010), 0)
+
+        cpu.run(max_instructions=1)
+
+        self.assertFalse(cpu.irq_pending)
+        self.assertEqual(cpu.bus.read(0x0010), 1)
+
+    def test_nmi_ignores_i_flag(self):
+        cpu = self._make_cpu()
+
+        cpu.nmi()
+        cpu.run(max_instructions=1)
+
+        self.assertEqual(cpu.bus.read(0x0011), 1)
+
+    def test_timer(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                cpu = self._make_cpu(backend)
+                fired = []
+
+                # Periodic timer raising an IRQ every 1000 cycles
+                def tick(cycle: int) -> None:
+                    fired.append(cpu.state.cycles - cycle)
+                    cpu.irq()
+                    cpu.scheduler.schedule(cycle + 1000, tick)
+
+                cpu.scheduler.schedule(1000, tick)
+                cpu.run(max_cycles=10_500)
+
+                self.assertEqual(cpu.exit_reason, ExitReason.MAX_CYCLES)
+                self.assertEqual(cpu.bus.read(0x0010), 10)
+
+                # Events fire on the first instruction boundary after they are due
+                self.assertTrue(all(0 <= late < 7 for late in fired))
+
+    def test_interrupt_from_device_write(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                cpu = self._make_cpu(backend)
+
+                # STA $D000 at the start of the loop raises an NMI through a write observer
+                cpu.bus.load(bytes([0x58, 0x8D, 0x00, 0xD0, 0x4C, 0x01, 0x04]), 0x0400)
+                cpu.bus.add_write_observer(0xD000, 0xD000, lambda address, value: cpu.nmi())
+
+                cpu.run(max_instructions=3)
+
+                self.assertEqual(cpu.bus.read(0x0011), 1)
+                self.assertEqual(cpu.state.register_PC, 0x0602)
+
+                # The NMI is taken right after the store, not at the end of the budget
+                cpu.bus.load(bytes([0x00]), 0x0600)
+                cpu.state.register_PC = 0x0401
+
+                cycles = cpu.run(max_cycles=200_000)
+
+                self.assertEqual(cpu.exit_reason, ExitReason.BRK)
+                self.assertLess(cycles, 20)
+
+    def test_event_from_device_write(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                cpu = self._make_cpu(backend)
+                fired = []
+
+                def due(cycle: int) -> None:
+                    fired.append((cycle, cpu.state.cycles))
+                    cpu.stop()
+
+                # STA $D000; loop: NOP; JMP loop, the store schedules an event 10 cycles later
+                cpu.bus.load(bytes([0x8D, 0x00, 0xD0, 0xEA, 0x4C, 0x03, 0x04]), 0x0400)
+                cpu.bus.add_write_observer(0xD000, 0xD000, lambda address, value: cpu.scheduler.schedule(cpu.state.cycles + 10, due))
+
+                start = cpu.state.cycles
+                cpu.run(max_cycles=100_000)
+
+                # Boundaries fall at 4, 6, 9 and 11 cycles into the run
+                self.assertEqual(fired, [(start + 10, start + 11)])
+                self.assertEqual(cpu.exit_reason, ExitReason.STOPPED)
+
+    def test_breakpoint_on_handler(self):
+        cpu = self._make_cpu()
+        cpu.add_breakpoint(0x0500)
+
+        cpu.scheduler.schedule(100, lambda cycle: cpu.irq())
+        cpu.run(max_cycles=1000)
+
+        self.assertEqual(cpu.exit_reason, ExitReason.BREAKPOINT)
+        self.assertEqual(cpu.state.register_PC, 0x0500)
+
+if __name__ == '__main__':
+    unittest.main()
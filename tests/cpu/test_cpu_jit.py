@@ -0,0 +1,182 @@
+import io
+import random
+import unittest
+
+from src.cpu.cpu import Cpu, ExitReason
+from src.cpu.cpu_trace import StreamTraceSink, TraceLevel
+
+# LDX #$00; loop: INX; STX $10; CPX #$20; BNE loop; BRK
+LOOP = bytes([0xA2, 0x00, 0xE8, 0x86, 0x10, 0xE0, 0x20, 0xD0, 0xF9, 0x00])
+
+def machine(backend: str, image: bytes, pc: int, registers: list) -> Cpu:
+    cpu = Cpu(backend=backend)
+    cpu.bus.write_block(0x0000, image)
+
+    cpu.state.register_PC = pc
+    cpu.state.register_A, cpu.state.register_X, cpu.state.register_Y, cpu.state.register_SP, cpu.state.register_SR = registers
+
+    return cpu
+
+def interrupting(cpu: Cpu, events: list, period: int = 97) -> Cpu:
+    """
+    Raises an NMI and an IRQ in turn every period cycles, logging when each event was due and fired
+    """
+    def due(cycle: int) -> None:
+        events.append((cycle, cpu.state.cycles))
+        (cpu.nmi if len(events) % 2 else cpu.irq)()
+        cpu.scheduler.schedule(cycle + period, due)
+
+    cpu.scheduler.schedule(cpu.state.cycles + period, due)
+
+    return cpu
+
+def outcome(cpu: Cpu, **budget) -> tuple:
+    try:
+        cycles = cpu.run(**budget)
+        error = None
+    except Exception as e:
+        cycles = None
+        error = type(e).__name__
+
+    state = cpu.state
+
+    return (
+        error, cycles, cpu.exit_reason if error is None else None,
+        state.register_A, state.register_X, state.register_Y, state.register_SP, state.register_SR,
+        state.register_PC, state.cycles, bytes(cpu.bus.ram),
+    )
+
+class TestCpuJit(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case by creating a new Cpu object with the JIT backend.
+        """
+        self.cpu = Cpu(backend="jit")
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            Cpu(backend="llvm")
+
+    def test_loop_matches_interpreter(self):
+        interpreter = Cpu()
+        interpreter.load(LOOP, 0x0400)
+        interpreter.run()
+
+        self.cpu.load(LOOP, 0x0400)
+        cycles = self.cpu.run()
+
+        self.assertEqual(self.cpu.exit_reason, ExitReason.BRK)
+        self.assertEqual(self.cpu.state.register_X, 0x20)
+        self.assertEqual(self.cpu.bus.read(0x0010), 0x20)
+        self.assertEqual(cycles, interpreter.state.cycles)
+        self.assertEqual(self.cpu.state.register_PC, interpreter.state.register_PC)
+        self.assertEqual(self.cpu.state.register_SR, interpreter.state.register_SR)
+
+    def test_blocks_are_reused(self):
+        self.cpu.load(LOOP, 0x0400)
+        self.cpu.run()
+
+        self.assertIn(0x0402, self.cpu.jit.blocks)
+
+        block = self.cpu.jit.blocks[0x0402]
+
+        # Running again without touching memory keeps the compiled block
+        self.cpu.state.register_PC = 0x0400
+        self.cpu.run()
+
+        self.assertIs(self.cpu.jit.blocks[0x0402], block)
+
+    def test_budgets_are_exact(self):
+        for budget in range(1, 40):
+            interpreter = Cpu()
+            interpreter.load(LOOP, 0x0400)
+            self.cpu = Cpu(backend="jit")
+            self.cpu.load(LOOP, 0x0400)
+
+            self.assertEqual(
+                outcome(self.cpu, max_instructions=budget),
+                outcome(interpreter, max_instructions=budget),
+            )
+
+            interpreter = Cpu()
+            interpreter.load(LOOP, 0x0400)
+            self.cpu = Cpu(backend="jit")
+            self.cpu.load(LOOP, 0x0400)
+
+            self.assertEqual(
+                outcome(self.cpu, max_cycles=budget * 3),
+                outcome(interpreter, max_cycles=budget * 3),
+            )
+
+    def test_self_modifying_code(self):
+        # LDA #$01; STA $0406; LDX #$00; BRK, the store rewrites the LDX operand
+        program = bytes([0xA9, 0x07, 0x8D, 0x06, 0x04, 0xA2, 0x00, 0x00])
+
+        self.cpu.load(program, 0x0400)
+        self.cpu.run()
+
+        self.assertEqual(self.cpu.state.register_X, 0x07)
+
+    def test_write_invalidates_block(self):
+        self.cpu.load(LOOP, 0x0400)
+        self.cpu.run()
+
+        # Change CPX #$20 to CPX #$08 from outside the CPU
+        self.cpu.bus.write(0x0406, 0x08)
+
+        self.assertNotIn(0x0402, self.cpu.jit.blocks)
+
+        self.cpu.load(LOOP[:4] + bytes([0x10, 0xE0, 0x08]) + LOOP[7:], 0x0400)
+        self.cpu.run()
+
+        self.assertEqual(self.cpu.state.register_X, 0x08)
+
+    def test_trace_uses_interpreter(self):
+        # Traced runs record every instruction, so nothing is compiled
+        stream = io.StringIO()
+
+        self.cpu.load(LOOP, 0x0400)
+        self.cpu.trace = StreamTraceSink(stream, TraceLevel.PC)
+        self.cpu.run()
+
+        self.assertEqual(self.cpu.state.register_X, 0x20)
+        self.assertEqual(len(stream.getvalue().split()), 1 + 0x20 * 4 + 1)
+        self.assertEqual(self.cpu.jit.blocks, {})
+
+    def test_random_images(self):
+        # Random memory exercises every opcode, including the undocumented ones
+        for seed in range(40):
+            rng = random.Random(seed)
+
+            image = bytes(rng.getrandbits(8) for _ in range(0x10000))
+            pc = rng.randrange(0x10000)
+            registers = [rng.getrandbits(8) for _ in range(5)]
+            budget = {"max_instructions": rng.randrange(1, 400)} if seed % 2 else {"max_cycles": rng.randrange(1, 1500)}
+
+            with self.subTest(seed=seed):
+                self.assertEqual(
+                    outcome(machine("jit", image, pc, registers), **budget),
+                    outcome(machine("interpreter", image, pc, registers), **budget),
+                )
+
+    def test_random_images_with_interrupts(self):
+        # Events and interrupts land on the same instruction boundaries on both backends
+        for seed in range(40):
+            rng = random.Random(seed)
+
+            image = bytes(rng.getrandbits(8) for _ in range(0x10000))
+            pc = rng.randrange(0x10000)
+            registers = [rng.getrandbits(8) for _ in range(5)]
+            budget = {"max_instructions": rng.randrange(1, 800)} if seed % 2 else {"max_cycles": rng.randrange(1, 3000)}
+
+            jit_events, interpreter_events = [], []
+
+            with self.subTest(seed=seed):
+                self.assertEqual(
+                    outcome(interrupting(machine("jit", image, pc, registers), jit_events), **budget),
+                    outcome(interrupting(machine("interpreter", image, pc, registers), interpreter_events), **budget),
+                )
+                self.assertEqual(jit_events, interpreter_events)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import os
+import tempfile
+import unittest
+
+from src.cpu.cpu import Cpu, ExitReason
+from src.cpu.cpu_loader import ImageFormat, detect_format, load_image
+
+# LDA #$01; STA $10; BRK
+PROGRAM = bytes([0xA9, 0x01, 0x85, 0x10, 0x00])
+
+def hex_record(kind: int, address: int, payload: bytes) -> str:
+    record = bytes([len(payload), address >> 8, address & 0xFF, kind]) + payload
+    return ":" + (record + bytes([-sum(record) & 0xFF])).hex().upper() + "\n"
+
+def ines(banks: int, mapper: int = 0) -> bytearray:
+    """
+    iNES image whose PRG-ROM banks are filled with their index, the reset vector points at $8000
+    """
+    header = b"NES\x1a" + bytes([banks, 0, (mapper & 0x0F) << 4, mapper & 0xF0]) + bytes(8)
+    rom = bytearray(bank for bank in range(banks) for _ in range(0x4000))
+    rom[-4:-2] = bytes([0x00, 0x80])
+
+    return bytearray(header) + rom
+
+class TestCpuLoader(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case by creating a new Cpu object and a scratch directory.
+        """
+        self.cpu = Cpu()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def image(self, name: str, data) -> str:
+        path = os.path.join(self.directory.name, name)
+
+        with open(path, "wb" if isinstance(data, (bytes, bytearray)) else "w") as file:
+            file.write(data)
+
+        return path
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format("game.nes", b"NES\x1a"), ImageFormat.INES)
+        self.assertEqual(detect_format("rom.ihx"), ImageFormat.HEX)
+        self.assertEqual(detect_format("rom.bin", b":10"), ImageFormat.HEX)
+        self.assertEqual(detect_format("demo.PRG"), ImageFormat.PRG)
+        self.assertEqual(detect_format("test.bin", b"\xa9\x01"), ImageFormat.RAW)
+
+    def test_raw(self):
+        image = load_image(self.cpu, self.image("test.bin", PROGRAM), address=0x0400)
+
+        self.assertEqual(image.format, ImageFormat.RAW)
+        self.assertEqual(image.entry, 0x0400)
+        self.assertEqual(image.segments, ((0x0400, len(PROGRAM)),))
+
+        self.cpu.run()
+
+        self.assertEqual(self.cpu.exit_reason, ExitReason.BRK)
+        self.assertEqual(self.cpu.bus.read(0x10), 0x01)
+
+    def test_raw_reset_vector(self):
+        # A full memory image starts where its reset vector points
+        memory = bytearray(0x10000)
+        memory[0x0400:0x0400 + len(PROGRAM)] = PROGRAM
+        memory[0xFFFC:0xFFFE] = bytes([0x00, 0x04])
+
+        image = load_image(self.cpu, self.image("memory.bin", memory))
+
+        self.assertEqual(image.entry, 0x0400)
+        self.assertEqual(self.cpu.state.register_PC, 0x0400)
+
+        # An explicit start wins
+        self.assertEqual(load_image(self.cpu, self.image("memory.bin", memory), start=0x1234).entry, 0x1234)
+
+    def test_empty_file(self):
+        with self.assertRaises(ValueError):
+            load_image(self.cpu, self.image("empty.bin", b""))
+
+    def test_prg(self):
+        image = load_image(self.cpu, self.image("demo.prg", bytes([0x00, 0xC0]) + PROGRAM))
+
+        self.assertEqual(image.format, ImageFormat.PRG)
+        self.assertEqual(image.entry, 0xC000)
+        self.assertEqual(bytes(self.cpu.bus.read_block(0xC000, len(PROGRAM))), PROGRAM)
+
+    def test_prg_basic_stub(self):
+        # 10 SYS 2062, then the machine code right after the end of the BASIC program
+        stub = bytes([0x0C, 0x08, 0x0A, 0x00, 0x9E]) + b" 2062" + bytes([0x00, 0x00, 0x00])
+        data = bytes([0x01, 0x08]) + stub + PROGRAM
+
+        image = load_image(self.cpu, self.image("demo.prg", data))
+
+        self.assertEqual(image.entry, 2062)
+        self.assertEqual(self.cpu.bus.read(2062), PROGRAM[0])
+
+        self.cpu.run()
+        self.assertEqual(self.cpu.bus.read(0x10), 0x01)
+
+    def test_hex(self):
+        text = (
+            hex_record(0x00, 0x0400, PROGRAM)
+            + hex_record(0x00, 0xFFFC, bytes([0x00, 0x04]))
+            + hex_record(0x01, 0x0000, b"")
+        )
+
+        image = load_image(self.cpu, self.image("program.hex", text))
+
+        self.assertEqual(image.format, ImageFormat.HEX)
+        self.assertEqual(image.entry, 0x0400)
+        self.assertEqual(image.segments, ((0x0400, len(PROGRAM)), (0xFFFC, 2)))
+
+        self.cpu.run()
+        self.assertEqual(self.cpu.bus.read(0x10), 0x01)
+
+    def test_hex_start_record(self):
+        text = (
+            hex_record(0x00, 0x0400, PROGRAM)
+            + hex_record(0x05, 0x0000, bytes([0x00, 0x00, 0x04, 0x02]))
+            + hex_record(0x01, 0x0000, b"")
+        )
+
+        self.assertEqual(load_image(self.cpu, self.image("program.hex", text)).entry, 0x0402)
+
+    def test_hex_errors(self):
+        record = hex_record(0x00, 0x0400, PROGRAM)
+
+        for name, text in (
+            ("checksum", record[:-3] + "00\n"),
+            ("digits", ":XY\n"),
+            ("length", ":05040000A901\n"),
+            ("overflow", hex_record(0x00, 0xFFFE, PROGRAM)),
+            ("empty", hex_record(0x01, 0x0000, b"")),
+        ):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                load_image(self.cpu, self.image("bad.hex", text))
+
+    def test_hex_record_sizes(self):
+        # Address records carry 2 bytes, start records 4
+        for kind, size in ((0x02, 3), (0x04, 1), (0x03, 2), (0x05, 5)):
+            text = hex_record(0x00, 0x0400, PROGRAM) + hex_record(kind, 0x0000, bytes(size))
+
+            with self.subTest(kind=kind), self.assertRaisesRegex(ValueError, "^Line 2 "):
+                load_image(self.cpu, self.image("bad.hex", text))
+
+    def test_ines_nrom(self):
+        # A single 16 KiB bank is mirrored at $C000
+        image = load_image(self.cpu, self.image("game.nes", ines(1)))
+
+        self.assertEqual(image.format, ImageFormat.INES)
+        self.assertEqual(image.entry, 0x8000)
+        self.assertEqual(self.cpu.bus.read(0xBFFC), self.cpu.bus.read(0xFFFC))
+
+        # PRG-ROM ignores writes
+        self.cpu.bus.write(0x8000, 0xFF)
+        self.assertEqual(self.cpu.bus.read(0x8000), 0x00)
+
+        image.close()
+
+        self.assertEqual(self.cpu.bus.read, self.cpu.bus._read_ram)
+
+    def test_ines_uxrom(self):
+        data = ines(4, mapper=2)
+        data[16 + 0x4000 * 3 + 0x3FFC:16 + 0x4000 * 3 + 0x3FFE] = bytes([0x00, 0xC0])
+
+        image = load_image(self.cpu, self.image("game.nes", data))
+
+        self.assertEqual(image.entry, 0xC000)
+        self.assertEqual(self.cpu.bus.read(0x8000), 0)
+        self.assertEqual(self.cpu.bus.read(0xC000), 3)
+
+        self.cpu.bus.write(0x8000, 2)
+        self.assertEqual(self.cpu.bus.read(0x8000), 2)
+
+        image.close()
+
+    def test_ines_errors(self):
+        for name, data in (
+            ("mapper", ines(1, mapper=4)),
+            ("short", ines(2)[:-1]),
+            ("banks", ines(1)[:16]),
+            ("nrom", ines(3)),
+        ):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                load_image(self.cpu, self.image("bad.nes", data))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+
+from src.cpu.cpu import Cpu, ExitReason
+from src.cpu.cpu_mapper import CpuMapper, UxRomMapper
+
+def banks(count: int, size: int) -> bytearray:
+    """
+    Banks filled with their own index
+    """
+    return bytearray(bank for bank in range(count) for _ in range(size))
+
+class TestCpuMapper(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case by creating a new Cpu object.
+        """
+        self.cpu = Cpu()
+        self.bus = self.cpu.bus
+
+    def test_invalid_bank_size(self):
+        with self.assertRaises(ValueError):
+            CpuMapper(self.bus, bytearray(0x1000), 0x80)
+
+        with self.assertRaises(ValueError):
+            CpuMapper(self.bus, bytearray(0x1100), 0x1000)
+
+    def test_switch(self):
+        mapper = CpuMapper(self.bus, banks(8, 0x2000), 0x2000)
+        window = mapper.add_window(0xA000, 3)
+
+        self.assertEqual(self.bus.read(0xA000), 3)
+        self.assertEqual(self.bus.read(0xBFFF), 3)
+        self.assertEqual(self.bus.read(0xC000), 0)
+
+        mapper.switch(window, 6)
+
+        self.assertEqual(self.bus.read(0xA123), 6)
+
+        with self.assertRaises(IndexError):
+            mapper.switch(window, 8)
+
+    def test_banks_share_the_buffer(self):
+        data = banks(4, 0x1000)
+        mapper = CpuMapper(self.bus, data, 0x1000)
+        mapper.add_window(0x4000, 2)
+
+        # Writes land in the buffer itself, nothing was copied
+        self.bus.write(0x4010, 0xAB)
+
+        self.assertEqual(data[0x2010], 0xAB)
+        self.assertIs(mapper.banks[2].obj, mapper.banks[0].obj)
+
+    def test_read_only_buffer(self):
+        mapper = CpuMapper(self.bus, bytes(banks(2, 0x1000)), 0x1000)
+        mapper.add_window(0x8000, 1)
+
+        self.bus.write(0x8000, 0xFF)
+        self.assertEqual(self.bus.read(0x8000), 1)
+
+        with self.assertRaises(ValueError):
+            mapper.add_window(0x9000, 0, writable=True)
+
+    def test_detach(self):
+        mapper = CpuMapper(self.bus, banks(2, 0x1000), 0x1000)
+        mapper.add_window(0x8000, 1)
+        mapper.detach()
+
+        self.assertEqual(self.bus.read(0x8000), 0)
+        self.assertEqual(self.bus.read, self.bus._read_ram)
+
+    def test_uxrom_program(self):
+        # Bank 0: LDA #$01; STA $8000 switches to bank 1, which continues with JMP $C000
+        # The fixed bank 2 at $C000: LDA $8000; BRK, whose vector is filler bytes of bank 2
+        rom = banks(3, 0x4000)
+        rom[0x0000:0x0008] = bytes([0xA9, 0x01, 0x8D, 0x00, 0x80, 0x4C, 0x00, 0xC0])
+        rom[0x4000:0x4008] = bytes([0x42, 0x00, 0x00, 0x00, 0x00, 0x4C, 0x00, 0xC0])
+        rom[0x8000:0x8004] = bytes([0xAD, 0x00, 0x80, 0x00])
+        rom[0xBFFC:0xBFFE] = bytes([0x00, 0x80])
+
+        mapper = UxRomMapper(self.bus, bytes(rom))
+
+        self.assertEqual(self.bus.read(0xC000), 0xAD)
+
+        self.cpu.reset()
+        self.cpu.run()
+
+        self.assertEqual(self.cpu.exit_reason, ExitReason.BRK)
+        self.assertEqual(mapper.windows[0].bank, 1)
+        self.assertEqual(self.cpu.state.register_A, 0x42)
+        self.assertEqual(self.cpu.state.register_PC, 0x0202)
+
+    def test_from_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "banks.bin")
+
+            with open(path, "wb") as file:
+                file.write(banks(4, 0x4000))
+
+            mapper = CpuMapper.from_file(self.bus, path, bank_size=0x4000)
+            window = mapper.add_window(0x4000, 3)
+
+            self.assertEqual(len(mapper), 4)
+            self.assertEqual(self.bus.read(0x4000), 3)
+
+            mapper.switch(window, 1)
+            self.assertEqual(self.bus.read(0x7FFF), 1)
+
+            mapper.close()
+
+            self.assertTrue(mapper.data.closed)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.cpu.cpu import Cpu
+from src.cpu.cpu_profiler import CpuProfiler
+
+# LDX #$00; loop: INX; CPX #$10; BNE loop; BRK
+COUNTER = bytes([0xA2, 0x00, 0xE8, 0xE0, 0x10, 0xD0, 0xFB, 0x00])
+
+class TestCpuProfiler(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case by creating a new Cpu object with a profiler.
+        """
+        self.cpu = Cpu()
+        self.cpu.profiler = CpuProfiler()
+        self.cpu.load(COUNTER, 0x0400)
+
+    def test_counts(self):
+        cycles = self.cpu.run()
+        profiler = self.cpu.profiler
+
+        self.assertEqual(profiler.cycles, cycles)
+        self.assertEqual(profiler.instructions, 1 + 16 * 3 + 1)
+
+        self.assertEqual(profiler.opcode_counts[0xE8], 16)
+        self.assertEqual(profiler.pc_counts[0x0402], 16)
+        self.assertEqual(profiler.pc_counts[0x0407], 1)
+
+        # BNE: 15 taken branches on the same page, one not taken
+        self.assertEqual(profiler.pc_cycles[0x0405], 15 * 3 + 2)
+
+    def test_mode_totals(self):
+        self.cpu.run()
+
+        totals = self.cpu.profiler.mode_totals()
+
+        self.assertEqual(totals["IMM"]["instructions"], 1 + 16 + 1)
+        self.assertEqual(totals["IMP"]["instructions"], 16)
+        self.assertEqual(totals["REL"]["instructions"], 16)
+
+    def test_step_matches_run(self):
+        self.cpu.run()
+
+        stepped = Cpu()
+        stepped.profiler = CpuProfiler()
+        stepped.load(COUNTER, 0x0400)
+
+        while stepped.exit_reason is None:
+            stepped.step()
+
+        self.assertEqual(stepped.profiler.dump(), self.cpu.profiler.dump())
+
+    def test_budget(self):
+        self.cpu.run(max_instructions=5)
+
+        self.assertEqual(self.cpu.profiler.instructions, 5)
+
+    def test_report_and_dump(self):
+        self.cpu.run()
+
+        report = self.cpu.profiler.report(top=3)
+        dump = self.cpu.profiler.dump()
+
+        self.assertIn("0402", report)
+        self.assertEqual(dump["opcodes"]["E8"]["count"], 16)
+        self.assertEqual(dump["pcs"]["0405"]["cycles"], 15 * 3 + 2)
+        self.assertEqual(self.cpu.profiler.hot_pcs(1)[0]["pc"], 0x0405)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.json")
+            self.cpu.profiler.save(path)
+
+            with open(path) as f:
+                self.assertEqual(json.load(f), dump)
+
+    def test_reset(self):
+        self.cpu.run()
+        self.cpu.profiler.reset()
+
+        self.assertEqual(self.cpu.profiler.instructions, 0)
+        self.assertEqual(self.cpu.profiler.dump()["pcs"], {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from src.cpu.cpu_scheduler import CpuScheduler
+
+class TestCpuScheduler(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case with an empty scheduler and a log of fired events.
+        """
+        self.scheduler = CpuScheduler()
+        self.fired = []
+
+    def _log(self, name: str):
+        return lambda cycle: self.fired.append((name, cycle))
+
+    def test_order(self):
+        self.scheduler.schedule(30, self._log("c"))
+        self.scheduler.schedule(10, self._log("a"))
+        self.scheduler.schedule(30, self._log("d"))
+        self.scheduler.schedule(20, self._log("b"))
+
+        self.assertEqual(self.scheduler.deadline, 10)
+        self.assertEqual(self.scheduler.run_due(25), 2)
+        self.assertEqual(self.scheduler.deadline, 30)
+
+        self.scheduler.run_due(100)
+
+        self.assertEqual(self.fired, [("a", 10), ("b", 20), ("c", 30), ("d", 30)])
+        self.assertEqual(self.scheduler.deadline, float("inf"))
+
+    def test_cancel(self):
+        first = self.scheduler.schedule(10, self._log("a"))
+        self.scheduler.schedule(20, self._log("b"))
+
+        self.scheduler.cancel(first)
+
+        self.assertEqual(self.scheduler.deadline, 20)
+        self.assertEqual(len(self.scheduler), 1)
+
+        self.scheduler.run_due(20)
+        self.assertEqual(self.fired, [("b", 20)])
+
+    def test_rescheduling_callback(self):
+        # A periodic timer reschedules itself from its due cycle, so it never drifts
+        def tick(cycle: int) -> None:
+            self.fired.append(("tick", cycle))
+            self.scheduler.schedule(cycle + 10, tick)
+
+        self.scheduler.schedule(10, tick)
+        self.scheduler.run_due(35)
+
+        self.assertEqual(self.fired, [("tick", 10), ("tick", 20), ("tick", 30)])
+        self.assertEqual(self.scheduler.deadline, 40)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from src.cpu.cpu import Cpu
+from src.cpu.cpu_snapshot import SNAPSHOT_SIZE
+
+# LDX #$00; loop: TXA; STA $0200,X; INX; CPX #$10; BNE loop; BRK
+PROGRAM = bytes([0xA2, 0x00, 0x8A, 0x9D, 0x00, 0x02, 0xE8, 0xE0, 0x10, 0xD0, 0xF7, 0x00])
+
+class TestCpuSnapshot(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case with a cpu stopped halfway through a program.
+        """
+        self.cpu = Cpu()
+        self.cpu.load(PROGRAM, 0x0400)
+        self.cpu.run(max_instructions=20)
+
+    def _assert_same_machine(self, cpu: Cpu, other: Cpu):
+        for register in ("A", "X", "Y", "SP", "SR", "PC"):
+            self.assertEqual(getattr(cpu.state, f"register_{register}"), getattr(other.state, f"register_{register}"))
+
+        self.assertEqual(cpu.state.cycles, other.state.cycles)
+        self.assertEqual(bytes(cpu.bus.ram), bytes(other.bus.ram))
+
+    def test_round_trip(self):
+        snapshot = self.cpu.snapshot()
+        self.assertEqual(len(snapshot), SNAPSHOT_SIZE)
+
+        other = Cpu(state_handler="checked")
+        other.restore(snapshot)
+
+        self._assert_same_machine(self.cpu, other)
+
+        # Both machines carry on identically
+        self.cpu.run()
+        other.run()
+
+        self._assert_same_machine(self.cpu, other)
+
+    def test_compressed_round_trip(self):
+        snapshot = self.cpu.snapshot(compressed=True)
+        self.assertLess(len(snapshot), SNAPSHOT_SIZE)
+
+        other = Cpu()
+        other.restore(snapshot)
+
+        self._assert_same_machine(self.cpu, other)
+
+    def test_restore_rewinds(self):
+        snapshot = self.cpu.snapshot()
+        cycles = self.cpu.state.cycles
+
+        self.cpu.run()
+        self.cpu.restore(snapshot)
+
+        self.assertEqual(self.cpu.state.cycles, cycles)
+
+    def test_restore_with_invalid_snapshot(self):
+        snapshot = self.cpu.snapshot()
+
+        with self.assertRaises(ValueError):
+            self.cpu.restore(b"6510" + snapshot[4:])
+
+        with self.assertRaises(ValueError):
+            self.cpu.restore(snapshot[:4] + bytes([99]) + snapshot[5:])
+
+        with self.assertRaises(ValueError):
+            self.cpu.restore(snapshot[:-1])
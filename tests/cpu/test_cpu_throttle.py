@@ -0,0 +1,89 @@
+import unittest
+from unittest import mock
+
+from src.cpu.cpu import Cpu, ExitReason
+from src.cpu.cpu_throttle import CpuThrottle, ONE_MHZ
+
+# loop: JMP loop
+SPIN = bytes([0x4C, 0x00, 0x04])
+
+class FakeClock:
+    """
+    Nanosecond clock that only moves when slept on, or by 100 ns per reading
+    """
+    def __init__(self):
+        self.now = 0
+        self.sleeps = []
+
+    def perf_counter_ns(self) -> int:
+        self.now += 100
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += int(seconds * 1e9)
+
+
+class TestCpuThrottle(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case with a cpu spinning forever and a fake clock.
+        """
+        self.cpu = Cpu()
+        self.cpu.load(SPIN, 0x0400)
+
+        self.clock = FakeClock()
+
+        patcher = mock.patch.multiple(
+            "src.cpu.cpu_throttle", perf_counter_ns=self.clock.perf_counter_ns, sleep=self.clock.sleep
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_paced(self):
+        report = CpuThrottle(self.cpu, ONE_MHZ, slice_cycles=1000).run(max_cycles=100_000)
+
+        self.assertEqual(self.cpu.exit_reason, ExitReason.MAX_CYCLES)
+        self.assertEqual(report.cycles, 100_002)
+        self.assertEqual(report.slices, 100)
+
+        # One sleep per slice, the rest of each slice is spun
+        self.assertEqual(len(self.clock.sleeps), 100)
+        self.assertEqual(report.max_lag_ns, 0)
+        self.assertAlmostEqual(report.achieved_mhz, 1.0, places=2)
+
+    def test_slow_host_drops_lag(self):
+        throttle = CpuThrottle(self.cpu, ONE_MHZ, slice_cycles=1000, tolerance_ns=5_000_000)
+
+        # Each 1 ms slice takes 3 ms on the host
+        run = self.cpu.run
+
+        def slow_run(*args, **kwargs):
+            self.clock.now += 3_000_000
+            return run(*args, **kwargs)
+
+        with mock.patch.object(self.cpu, "run", slow_run):
+            report = throttle.run(max_cycles=20_000)
+
+        self.assertEqual(self.clock.sleeps, [])
+        self.assertGreater(report.dropped_ns, 0)
+
+        # Lag levels off at the tolerance plus one slice instead of growing
+        self.assertLess(report.max_lag_ns, 5_000_000 + 3_000_000)
+        self.assertAlmostEqual(report.achieved_mhz, 1 / 3, places=2)
+
+    def test_stops_on_brk(self):
+        self.cpu.load(bytes([0xEA] * 5000 + [0x00]), 0x0400)
+
+        report = CpuThrottle(self.cpu, ONE_MHZ, slice_cycles=1000).run()
+
+        self.assertEqual(self.cpu.exit_reason, ExitReason.BRK)
+        self.assertEqual(report.cycles, 5000 * 2 + 7)
+        self.assertEqual(report.slices, 11)
+
+    def test_invalid_frequency(self):
+        with self.assertRaises(ValueError):
+            CpuThrottle(self.cpu, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+
+from src.cpu.cpu import Cpu, ExitReason
+from src.cpu.cpu_time_travel import CpuTimeTravel
+
+# LDX #$00; loop: TXA; STA $0200,X; INX; BNE loop; BRK
+PROGRAM = bytes([0xA2, 0x00, 0x8A, 0x9D, 0x00, 0x02, 0xE8, 0xD0, 0xF9, 0x00])
+
+class TestCpuTimeTravel(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case with a recorder attached to a freshly loaded cpu.
+        """
+        self.cpu = Cpu()
+        self.cpu.load(PROGRAM, 0x0400)
+
+        self.travel = CpuTimeTravel(self.cpu, interval=200, window=8)
+        self.travel.attach()
+
+    def test_reverse_step(self):
+        states = [self.cpu.snapshot()]
+
+        for _ in range(40):
+            self.travel.step()
+            states.append(self.cpu.snapshot())
+
+        while len(states) > 1:
+            states.pop()
+            self.assertTrue(self.travel.reverse_step())
+            self.assertEqual(self.cpu.snapshot(), states[-1])
+
+    def test_reverse_step_stops_at_oldest_snapshot(self):
+        self.travel.run()
+        self.assertEqual(self.cpu.exit_reason, ExitReason.BRK)
+
+        # Only the last 8 snapshots of a 200 cycle interval are kept
+        self.assertEqual(len(self.travel.checkpoints), 8)
+        self.assertGreater(self.travel.oldest_cycle, 0)
+
+        steps = 0
+
+        while self.travel.reverse_step():
+            steps += 1
+
+        self.assertEqual(self.cpu.state.cycles, self.travel.oldest_cycle)
+        self.assertLess(steps, 8 * 200)
+
+        with self.assertRaises(ValueError):
+            self.travel.seek(0)
+
+    def test_seek(self):
+        reference = Cpu()
+        reference.load(PROGRAM, 0x0400)
+
+        boundaries = {}
+
+        while reference.state.cycles < 3000:
+            reference.step()
+            boundaries[reference.state.cycles] = reference.snapshot()
+
+        self.travel.run(max_cycles=3000)
+
+        for cycle in (2900, 1634, 2999, 2500, 2000):
+            target = min(boundary for boundary in boundaries if boundary >= cycle)
+
+            self.assertEqual(self.travel.seek(cycle), target)
+            self.assertEqual(self.cpu.snapshot(), boundaries[target])
+
+    def test_seek_replays_at_most_one_interval(self):
+        self.travel.run(max_cycles=3000)
+
+        steps = []
+        self.travel.step = lambda step=self.travel.step: steps.append(1) or step()
+
+        self.travel.seek(2100)
+        self.assertLessEqual(len(steps), 200)
+
+    def test_recording_after_going_back(self):
+        self.travel.run(max_cycles=1000)
+        self.travel.seek(500)
+
+        # The new future replaces the old one
+        self.cpu.bus.write(0x02F0, 0xEE)
+        self.assertGreaterEqual(self.travel.seek(600), 600)
+
+        self.travel.run()
+
+        self.assertEqual(self.cpu.bus.read(0x02F0), 0xF0)
+        self.assertTrue(all(checkpoint.cycles <= self.cpu.state.cycles for checkpoint in self.travel.checkpoints))
+
+        self.travel.seek(self.travel.oldest_cycle)
+        self.travel.run()
+
+        self.assertEqual(bytes(self.cpu.bus.read_block(0x0200, 0x100)), bytes(range(0x100)))
+
+    def test_reverse_continue(self):
+        self.travel.run(max_cycles=1500)
+
+        self.cpu.add_breakpoint(0x0402)
+        self.assertEqual(self.travel.reverse_continue(), ExitReason.BREAKPOINT)
+        self.assertEqual(self.cpu.state.register_PC, 0x0402)
+
+        x = self.cpu.state.register_X
+        self.assertEqual(self.travel.reverse_continue(), ExitReason.BREAKPOINT)
+        self.assertEqual(self.cpu.state.register_X, x - 1)
+
+        self.cpu.remove_breakpoint(0x0402)
+        self.cpu.add_watchpoint(0x0270)
+
+        self.assertEqual(self.travel.reverse_continue(), ExitReason.WATCHPOINT)
+        self.assertEqual(self.cpu.state.register_PC, 0x0403)
+        self.assertEqual(self.cpu.state.register_A, 0x70)
+        self.assertEqual(self.cpu.bus.read(0x0270), 0x00)
+
+        self.assertIsNone(self.travel.reverse_continue())
+        self.assertEqual(self.cpu.state.cycles, self.travel.oldest_cycle)
+
+    def test_detach(self):
+        self.travel.detach()
+
+        # Plain RAM again, the bus goes back to its fast path
+        self.assertIn("write", self.cpu.bus.__dict__)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import io
+import os
+import tempfile
+import unittest
+
+from src.cpu.cpu import Cpu
+from src.cpu.cpu_trace import BufferedFileTraceSink, StreamTraceSink, TraceLevel, TraceSink
+
+# LDA #$01; LDX #$02; BRK
+PROGRAM = bytes([0xA9, 0x01, 0xA2, 0x02, 0x00])
+
+class TestCpuTrace(unittest.TestCase):
+    def _run(self, cpu: Cpu) -> None:
+        cpu.load(PROGRAM, 0x0400)
+        cpu.run()
+
+    def test_headless(self):
+        # Without a sink, or with a sink at level OFF, nothing is traced
+        cpu = Cpu(trace=StreamTraceSink(io.StringIO(), TraceLevel.OFF))
+        self.assertIsNone(cpu.trace)
+
+        self._run(cpu)
+        self.assertEqual(cpu.state.register_X, 0x02)
+
+    def test_pc_level(self):
+        stream = io.StringIO()
+        self._run(Cpu(trace=StreamTraceSink(stream, TraceLevel.PC)))
+
+        self.assertEqual(stream.getvalue().split(), ["0400", "0402", "0404"])
+
+    def test_full_level(self):
+        stream = io.StringIO()
+        self._run(Cpu(trace=StreamTraceSink(stream, TraceLevel.FULL)))
+
+        lines = stream.getvalue().splitlines()
+
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("0400  A9  LDA IMM  A:01 X:00 Y:00"))
+
+    def test_buffered_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.txt")
+
+            with BufferedFileTraceSink(path, TraceLevel.PC, buffer_size=2) as sink:
+                self._run(Cpu(trace=sink))
+
+            with open(path) as f:
+                self.assertEqual(f.read().split(), ["0400", "0402", "0404"])
+
+    def test_sink_without_emit(self):
+        class NoEmitSink(TraceSink):
+            pass
+
+        with self.assertRaises(TypeError):
+            NoEmitSink()
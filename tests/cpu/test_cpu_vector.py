@@ -0,0 +1,158 @@
+import random
+import unittest
+
+from src.cpu.cpu import Cpu, ExitReason
+from src.cpu.cpu_vector import CpuVector, numpy
+
+# LDX #$00; loop: INX; STX $10; CPX #$20; BNE loop; BRK
+LOOP = bytes([0xA2, 0x00, 0xE8, 0x86, 0x10, 0xE0, 0x20, 0xD0, 0xF9, 0x00])
+
+# LDA $10; CLC; ADC $11; STA $12; BRK, adds the lane inputs at $10 and $11
+ADD = bytes([0xA5, 0x10, 0x18, 0x65, 0x11, 0x85, 0x12, 0x00])
+
+def machine(image: bytes, pc: int, registers: list) -> Cpu:
+    cpu = Cpu()
+    cpu.bus.write_block(0x0000, image)
+
+    cpu.state.register_PC = pc
+    cpu.state.register_A, cpu.state.register_X, cpu.state.register_Y, cpu.state.register_SP, cpu.state.register_SR = registers
+
+    return cpu
+
+def outcome(cpu: Cpu) -> tuple:
+    state = cpu.state
+
+    return (
+        state.register_A, state.register_X, state.register_Y, state.register_SP, state.register_SR,
+        state.register_PC, state.cycles, bytes(cpu.bus.ram),
+    )
+
+@unittest.skipUnless(numpy, "numpy is not installed")
+class TestCpuVector(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case by creating a CpuVector with a few lanes.
+        """
+        self.vector = CpuVector(4)
+
+    def test_invalid_lane_count(self):
+        with self.assertRaises(ValueError):
+            CpuVector(0)
+
+    def test_loop_matches_scalar(self):
+        scalar = Cpu()
+        scalar.load(LOOP, 0x0400)
+        scalar.run()
+
+        self.vector.load(LOOP, 0x0400)
+        cycles = self.vector.run()
+
+        for lane in range(4):
+            self.assertEqual(self.vector.exit_reason(lane), ExitReason.BRK)
+            self.assertEqual(cycles[lane], scalar.state.cycles)
+            self.assertEqual(outcome(self.vector.lane_cpu(lane)), outcome(scalar))
+
+    def test_lane_inputs(self):
+        self.vector.load(ADD, 0x0400)
+        self.vector.ram[:, 0x10] = [1, 0x7F, 0xFF, 0x80]
+        self.vector.ram[:, 0x11] = [2, 0x01, 0x01, 0x80]
+
+        self.vector.run()
+
+        self.assertEqual(self.vector.ram[:, 0x12].tolist(), [3, 0x80, 0x00, 0x00])
+        self.assertEqual(self.vector.c.tolist(), [0, 0, 1, 1])
+        self.assertEqual(self.vector.v.tolist(), [0, 1, 0, 1])
+
+    def test_divergent_lanes(self):
+        # Each lane counts to its own limit, the lanes leave the loop at different steps
+        self.vector.load(LOOP, 0x0400)
+        self.vector.ram[:, 0x0406] = [1, 5, 0x20, 0]
+
+        cycles = self.vector.run()
+
+        for lane, limit in enumerate([1, 5, 0x20, 0]):
+            scalar = Cpu()
+            scalar.load(LOOP[:6] + bytes([limit]) + LOOP[7:], 0x0400)
+            scalar.run()
+
+            self.assertEqual(cycles[lane], scalar.state.cycles)
+            self.assertEqual(outcome(self.vector.lane_cpu(lane)), outcome(scalar))
+
+    def test_budgets(self):
+        self.vector.load(LOOP, 0x0400)
+        self.vector.ram[:, 0x0406] = [1, 0x20, 0x20, 0x20]
+
+        cycles = self.vector.run(max_cycles=50)
+
+        self.assertEqual(self.vector.exit_reason(0), ExitReason.BRK)
+        self.assertEqual(self.vector.exit_reason(1), ExitReason.MAX_CYCLES)
+        self.assertTrue(all(value >= 50 for value in cycles[1:]))
+
+        self.vector.run(max_instructions=3)
+
+        self.assertEqual(self.vector.exit_reason(1), ExitReason.MAX_INSTRUCTIONS)
+
+    def test_lane_round_trip(self):
+        cpu = Cpu()
+        cpu.load(ADD, 0x0400)
+        cpu.bus.write(0x10, 7)
+        cpu.bus.write(0x11, 8)
+
+        self.vector.set_lane(2, cpu)
+
+        self.assertEqual(self.vector.lane_snapshot(2), cpu.snapshot())
+
+        self.vector.step([2])
+        cpu.step()
+
+        self.assertEqual(outcome(self.vector.lane_cpu(2)), outcome(cpu))
+
+    def test_random_images(self):
+        # Every lane starts from its own random memory and registers, exercising every opcode
+        lanes = 32
+        vector = CpuVector(lanes)
+        scalars = []
+
+        for lane in range(lanes):
+            rng = random.Random(lane)
+
+            image = bytes(rng.getrandbits(8) for _ in range(0x10000))
+            cpu = machine(image, rng.randrange(0x10000), [rng.getrandbits(8) for _ in range(5)])
+
+            vector.set_lane(lane, cpu)
+            scalars.append(cpu)
+
+        vector.run(max_instructions=200)
+        skipped = 0
+
+        for lane, cpu in enumerate(scalars):
+            try:
+                cpu.run(max_instructions=200)
+            except IndexError:
+                # The scalar cpu faults on reads past $FFFF where the vector wraps, see below
+                skipped += 1
+                continue
+
+            with self.subTest(lane=lane):
+                self.assertEqual(vector.exit_reason(lane), cpu.exit_reason)
+                self.assertEqual(outcome(vector.lane_cpu(lane)), outcome(cpu))
+
+        # Such faults are rare, most lanes have to be compared
+        self.assertLessEqual(skipped, lanes // 8)
+
+    def test_reads_past_ffff_wrap(self):
+        # JMP ($FFFF) takes its pointer from $0000 and $0001 where the scalar cpu faults
+        cpu = Cpu()
+        cpu.bus.load(bytes([0x34, 0x12]), 0x0000)
+        cpu.load(bytes([0x6C, 0xFF, 0xFF]), 0x0400)
+
+        self.vector.set_lane(0, cpu)
+        self.vector.step([0])
+
+        self.assertEqual(self.vector.pc[0], 0x1234)
+
+        with self.assertRaises(IndexError):
+            cpu.step()
+
+if __name__ == '__main__':
+    unittest.main()
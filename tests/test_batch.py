@@ -0,0 +1,46 @@
+import unittest
+
+from src.batch import BatchJob, _run_job, run_batch
+
+# LDX #$00; loop: INX; CPX #$10; BNE loop; BRK
+COUNTER = bytes([0xA2, 0x00, 0xE8, 0xE0, 0x10, 0xD0, 0xFB, 0x00])
+
+# loop: JMP loop
+SPIN = bytes([0x4C, 0x00, 0x04])
+
+class TestBatch(unittest.TestCase):
+    def test_run_job(self):
+        result = _run_job(BatchJob("counter", COUNTER, 0x0400))
+
+        self.assertEqual(result["exit_reason"], "brk")
+        self.assertEqual(result["registers"]["X"], 0x10)
+        self.assertEqual(result["cycles"], 2 + 16 * (2 + 2) + 15 * 3 + 2 + 7)
+
+    def test_run_job_resets_cpu(self):
+        # Memory written by one job is gone for the next one
+        _run_job(BatchJob("counter", COUNTER, 0x0400))
+        result = _run_job(BatchJob("empty", bytes([0x00]), 0x0200))
+
+        self.assertEqual(result["registers"]["X"], 0x00)
+        self.assertEqual(result["cycles"], 7)
+
+    def test_run_job_budget(self):
+        result = _run_job(BatchJob("spin", SPIN, 0x0400, max_cycles=30))
+
+        self.assertEqual(result["exit_reason"], "max_cycles")
+        self.assertEqual(result["cycles"], 30)
+
+    def test_run_job_error(self):
+        result = _run_job(BatchJob("too large", bytes(0x10001)))
+
+        self.assertEqual(result["exit_reason"], "error")
+
+    def test_run_batch(self):
+        jobs = [BatchJob(f"counter{i}", COUNTER, 0x0400) for i in range(8)]
+        jobs.append(BatchJob("spin", SPIN, 0x0400, max_instructions=100))
+
+        results = {result["name"]: result for result in run_batch(jobs, workers=2)}
+
+        self.assertEqual(len(results), 9)
+        self.assertEqual(results["counter7"]["registers"]["X"], 0x10)
+        self.assertEqual(results["spin"]["exit_reason"], "max_instructions")
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from src.server import EmulatorServer, percentile, request
+
+# LDX #$00; loop: INX; CPX #$10; BNE loop; BRK
+COUNTER = bytes([0xA2, 0x00, 0xE8, 0xE0, 0x10, 0xD0, 0xFB, 0x00])
+
+# loop: JMP loop
+SPIN = bytes([0x4C, 0x00, 0x04])
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test case with a socket path in a temporary directory.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.path = os.path.join(directory.name, "6502.sock")
+
+    async def _exchange(self, message: dict, payload: bytes = b"") -> list:
+        reader, writer = await asyncio.open_unix_connection(self.path)
+
+        writer.write(json.dumps(message).encode() + b"\n" + payload)
+        await writer.drain()
+
+        responses = []
+
+        while True:
+            response = json.loads(await reader.readline())
+            responses.append(response)
+
+            if response["type"] in ("result", "stats", "error"):
+                break
+
+        writer.close()
+
+        return responses
+
+    def _serve(self, scenario, **kwargs):
+        async def main():
+            server = EmulatorServer(**kwargs)
+            listener = await server.start_unix(self.path)
+
+            try:
+                return await scenario(server)
+            finally:
+                server.close()
+                listener.close()
+
+        return asyncio.run(main())
+
+    def test_run(self):
+        async def scenario(server):
+            return await self._exchange({"op": "run", "address": 0x0400, "size": len(COUNTER)}, COUNTER)
+
+        accepted, result = self._serve(scenario, pool_size=2)
+
+        self.assertEqual(accepted["type"], "accepted")
+        self.assertEqual(result["type"], "result")
+        self.assertEqual(result["exit_reason"], "brk")
+        self.assertEqual(result["registers"]["X"], 0x10)
+        self.assertEqual(result["cycles"], 2 + 16 * (2 + 2) + 15 * 3 + 2 + 7)
+
+    def test_pool_is_reset_between_jobs(self):
+        async def scenario(server):
+            await self._exchange({"op": "run", "address": 0x0400, "size": len(COUNTER)}, COUNTER)
+
+            # LDA $0401 reads the operand of the previous job's LDX if memory was kept
+            program = bytes([0xAD, 0x01, 0x04, 0x00])
+            return await self._exchange({"op": "run", "address": 0x0200, "size": len(program)}, program)
+
+        result = self._serve(scenario, pool_size=1)[-1]
+
+        self.assertEqual(result["registers"]["A"], 0x00)
+        self.assertEqual(result["cycles"], 4 + 7)
+
+    def test_budget_and_trace(self):
+        async def scenario(server):
+            message = {"op": "run", "address": 0x0400, "size": len(SPIN), "max_cycles": 3_000, "trace": "pc"}
+            return await self._exchange(message, SPIN)
+
+        responses = self._serve(scenario, pool_size=1, quantum=1_000)
+        traces = [response["text"] for response in responses if response["type"] == "trace"]
+
+        # One trace message per quantum
+        self.assertEqual(len(traces), 3)
+        self.assertEqual("".join(traces), "0400\n" * 1000)
+
+        self.assertEqual(responses[-1]["exit_reason"], "max_cycles")
+        self.assertEqual(responses[-1]["cycles"], 3_000)
+
+    def test_jobs_share_the_pool(self):
+        async def scenario(server):
+            spin = {"op": "run", "address": 0x0400, "size": len(SPIN), "max_cycles": 200_000}
+            jobs = [self._exchange(spin, SPIN) for _ in range(4)]
+
+            runs = asyncio.gather(*jobs)
+            await asyncio.sleep(0.05)
+
+            # Stats answer while jobs run, two at a time with two waiting
+            stats = await self._exchange({"op": "stats"})
+            await runs
+
+            return stats[0], server.stats()
+
+        during, after = self._serve(scenario, pool_size=2, quantum=1_000)
+
+        self.assertEqual(during["pool_size"], 2)
+        self.assertEqual(during["busy"], 2)
+        self.assertEqual(during["queue_depth"], 2)
+
+        self.assertEqual(after["completed"], 4)
+        self.assertEqual(after["latency_ms"]["samples"], 4)
+        self.assertLessEqual(after["latency_ms"]["p50"], after["latency_ms"]["p99"])
+
+    def test_bad_requests(self):
+        async def scenario(server):
+            return (
+                await self._exchange({"op": "format"}),
+                await self._exchange({"op": "run", "size": 0x10001}),
+                await self._exchange({"op": "run", "address": 0xFFFF, "size": 2}, b"\xEA\xEA"),
+            )
+
+        unknown, too_large, out_of_range = self._serve(scenario, pool_size=1)
+
+        self.assertEqual(unknown[-1]["type"], "error")
+        self.assertEqual(too_large[-1]["type"], "error")
+        self.assertEqual(out_of_range[-1]["exit_reason"], "error")
+
+    def test_invalid_fields(self):
+        fields = [
+            {"max_cycles": "9"},
+            {"max_cycles": 0},
+            {"address": -1},
+            {"address": 0x10000},
+            {"address": "0x0400"},
+            {"start": 0x10000},
+            {"name": 7},
+        ]
+
+        async def scenario(server):
+            reader, writer = await asyncio.open_unix_connection(self.path)
+            responses = []
+
+            # Every request is answered and the connection stays usable
+            for extra in fields:
+                writer.write(json.dumps({"op": "run", "size": len(COUNTER), **extra}).encode() + b"\n" + COUNTER)
+                await writer.drain()
+
+                responses.append(json.loads(await reader.readline()))
+
+            writer.close()
+
+            return responses, server.stats()
+
+        responses, stats = self._serve(scenario, pool_size=1)
+
+        self.assertEqual([response["type"] for response in responses], ["error"] * len(fields))
+        self.assertEqual(stats["completed"] + stats["failed"], 0)
+
+    def test_request_client(self):
+        # The blocking client talks to a server running on a loop in another thread
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+
+        server = EmulatorServer(pool_size=1)
+        listener = asyncio.run_coroutine_threadsafe(server.start_unix(self.path), loop).result()
+
+        try:
+            responses = list(request(self.path, {"op": "run", "address": 0x0400}, COUNTER))
+            stats = list(request(self.path, {"op": "stats"}))
+        finally:
+            async def shutdown():
+                server.close()
+                listener.close()
+                await listener.wait_closed()
+
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+        self.assertEqual([response["type"] for response in responses], ["accepted", "result"])
+        self.assertEqual(stats[0]["completed"], 1)
+
+    def test_percentile(self):
+        self.assertIsNone(percentile([], 0.5))
+        self.assertEqual(percentile([3, 1, 2], 0.5), 2)
+        self.assertEqual(percentile(list(range(1, 101)), 0.99), 99)
+        self.assertEqual(percentile([5], 0.99), 5)
+
+if __name__ == '__main__':
+    unittest.main()